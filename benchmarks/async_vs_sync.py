@@ -0,0 +1,155 @@
+"""Compara o modo síncrono e o modo assíncrono sob carga concorrente.
+
+Sobe o app com uvicorn uma vez em cada modo (ASYNC_MODE=false/true),
+sobre o mesmo banco SQLite em arquivo, e dispara requisições concorrentes
+autenticadas em GET /todo/ e POST /todo/.
+
+Uso:
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine
+
+from fastapi_sincrono.models import table_registry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def start_server(port: int, db_file: Path, async_mode: bool):
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{db_file}',
+        'SECRET_KEY': os.environ.get(
+            'SECRET_KEY', 'benchmark-secret-key-0123456789abcdef'
+        ),
+        'ALGORITHM': os.environ.get('ALGORITHM', 'HS256'),
+        'ACCESS_TOKEN_EXPIRE_MINUTES': '60',
+        'ASYNC_MODE': str(async_mode).lower(),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'uvicorn',
+            'fastapi_sincrono.app:app',
+            '--port',
+            str(port),
+            '--log-level',
+            'warning',
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            await client.get('/')
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+async def get_token(client: httpx.AsyncClient):
+    await client.post(
+        '/users/',
+        json={
+            'username': 'bench',
+            'email': 'bench@example.com',
+            'password': 'bench',
+        },
+    )
+    response = await client.post(
+        '/auth/token', data={'username': 'bench', 'password': 'bench'}
+    )
+    return response.json()['access_token']
+
+
+async def run_load(client, token, total, concurrency):
+    headers = {'Authorization': f'Bearer {token}'}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            if i % 5 == 0:
+                response = await client.post(
+                    '/todo/', headers=headers, json={'title': f'todo {i}'}
+                )
+            else:
+                response = await client.get('/todo/', headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:  # noqa: PLR2004
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+async def bench_mode(async_mode, port, total, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'bench.db'
+        engine = create_engine(f'sqlite:///{db_file}')
+        table_registry.metadata.create_all(engine)
+        engine.dispose()
+
+        server = start_server(port, db_file, async_mode)
+        limits = httpx.Limits(max_connections=concurrency)
+        try:
+            async with httpx.AsyncClient(
+                base_url=f'http://127.0.0.1:{port}', limits=limits
+            ) as client:
+                await wait_ready(client)
+                token = await get_token(client)
+                return await run_load(client, token, total, concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for async_mode in (False, True):
+        result = asyncio.run(
+            bench_mode(async_mode, args.port, args.requests, args.concurrency)
+        )
+        label = 'async' if async_mode else 'sync'
+        print(
+            f'{label:>5}: {result["rps"]:8.1f} req/s  '
+            f'p50={result["p50_ms"]:.1f}ms  p95={result["p95_ms"]:.1f}ms  '
+            f'errors={result["errors"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
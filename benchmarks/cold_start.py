@@ -0,0 +1,122 @@
+"""Tempo de import do app e tempo até a primeira resposta.
+
+Cada rodada usa um processo Python novo:
+
+- `import`: `import fastapi_sincrono.app`, medido dentro do processo;
+- `first_response`: do `Popen` do uvicorn até o primeiro 200 em `GET /`;
+- `first_openapi`: latência do primeiro `GET /openapi.json` do servidor.
+
+O JSON tem o mesmo formato do `benchmarks.endpoints` e é comparado com
+o baseline da mesma forma (sai com código 1 acima de `--threshold`).
+
+Uso:
+    python -m benchmarks.cold_start --runs 10
+    python -m benchmarks.cold_start --save-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.async_vs_sync import start_server
+from benchmarks.endpoints import ROOT, compare, print_stats, summarize
+
+RESULTS_FILE = ROOT / 'benchmarks' / 'results' / 'cold_start.json'
+BASELINE_FILE = ROOT / 'benchmarks' / 'cold_start_baseline.json'
+IMPORT_SNIPPET = (
+    'import time\n'
+    'start = time.perf_counter()\n'
+    'import fastapi_sincrono.app\n'
+    'print(time.perf_counter() - start)\n'
+)
+
+
+def measure_import() -> float:
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET],
+        cwd=ROOT,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout)
+
+
+def measure_first_response(port: int, db_file: Path, async_mode: bool):
+    start = time.perf_counter()
+    server = start_server(port, db_file, async_mode)
+    try:
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}') as client:
+            while True:
+                try:
+                    client.get('/').raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None:
+                        raise RuntimeError('server did not start') from None
+                    time.sleep(0.005)
+            first_response = time.perf_counter() - start
+
+            start = time.perf_counter()
+            client.get('/openapi.json').raise_for_status()
+            return first_response, time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--async-mode', action='store_true')
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    timings = {'import': [], 'first_response': [], 'first_openapi': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'cold.db'
+        for _ in range(args.runs):
+            timings['import'].append(measure_import())
+            first_response, first_openapi = measure_first_response(
+                args.port, db_file, args.async_mode
+            )
+            timings['first_response'].append(first_response)
+            timings['first_openapi'].append(first_openapi)
+
+    label = 'async' if args.async_mode else 'sync'
+    results = {name: summarize(values) for name, values in timings.items()}
+    for name, stats in results.items():
+        print_stats(label, name, stats)
+
+    current = {'runs': args.runs, 'results': {label: results}}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f'baseline saved to {args.baseline}')
+        return
+    if not args.baseline.exists():
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if compare(current, baseline, 'p50_ms', args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
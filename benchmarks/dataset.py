@@ -0,0 +1,90 @@
+"""Bancos SQLite reprodutíveis para os benchmarks de endpoint.
+
+Cada tamanho é gerado uma única vez (seed fixa) e guardado em
+`benchmarks/.data/`; cada execução trabalha numa cópia, já que os
+benchmarks criam e apagam registros. O nome do arquivo leva uma
+impressão digital do schema, então uma migração gera um banco novo.
+"""
+
+import hashlib
+import random
+import shutil
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from fastapi_sincrono.hashing import hash_password
+from fastapi_sincrono.models import Todo, TodoStatus, User, table_registry
+
+DATA_DIR = Path(__file__).resolve().parent / '.data'
+TODOS_PER_USER = 1_000
+PASSWORD = 'bench'
+CHUNK = 10_000
+SEED = 42
+
+
+def schema_fingerprint() -> str:
+    ddl = ''.join(
+        str(CreateTable(table).compile(dialect=sqlite.dialect()))
+        for table in table_registry.metadata.sorted_tables
+    )
+    return hashlib.sha1(ddl.encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+def dataset_path(total_todos: int) -> Path:
+    return DATA_DIR / f'todos-{total_todos}-{schema_fingerprint()}.db'
+
+
+def seed(path: Path, total_todos: int):
+    rng = random.Random(SEED)
+    vocabulary = [f'word{i}' for i in range(2_000)]
+    total_users = max(1, total_todos // TODOS_PER_USER)
+    # todos os usuários têm a mesma senha: um único hash Argon2
+    password = hash_password(PASSWORD)
+
+    engine = create_engine(f'sqlite:///{path}')
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [
+                {
+                    'username': f'user{i}',
+                    'email': f'user{i}@example.com',
+                    'password': password,
+                }
+                for i in range(total_users)
+            ],
+        )
+        for start in range(0, total_todos, CHUNK):
+            session.execute(
+                insert(Todo),
+                [
+                    {
+                        'title': ' '.join(rng.sample(vocabulary, 3)),
+                        'description': ' '.join(rng.sample(vocabulary, 8)),
+                        'state': rng.choice(list(TodoStatus)),
+                        'user_id': i % total_users + 1,
+                    }
+                    for i in range(start, min(start + CHUNK, total_todos))
+                ],
+            )
+        session.commit()
+    engine.dispose()
+
+
+def prepare_dataset(total_todos: int, workdir: Path) -> Path:
+    cached = dataset_path(total_todos)
+    if not cached.exists():
+        DATA_DIR.mkdir(exist_ok=True)
+        partial = cached.with_suffix('.partial')
+        partial.unlink(missing_ok=True)
+        seed(partial, total_todos)
+        partial.rename(cached)
+
+    target = workdir / cached.name
+    shutil.copyfile(cached, target)
+    return target
@@ -0,0 +1,468 @@
+"""Latência e vazão de todas as rotas de auth, users e todo.
+
+Roda o `app` real em processo (TestClient) sobre uma cópia de um banco
+SQLite em arquivo populado com N todos (ver `benchmarks/dataset.py`) e
+mede cada rota em sequência. O resultado vai para um JSON e é comparado
+rota a rota com o baseline: uma piora acima de `--threshold` no
+percentil escolhido faz o comando sair com código 1.
+
+O baseline depende da máquina e não é versionado: grave um com
+`--save-baseline` antes de comparar. Sem ele, o comando sai com código 2
+antes de medir; `--no-compare` só mede.
+
+Uso:
+    python -m benchmarks.endpoints --sizes 1000 --save-baseline
+    python -m benchmarks.endpoints --sizes 1000
+    python -m benchmarks.endpoints --sizes 1000 100000 1000000 --no-compare
+    python -m benchmarks.endpoints --routes /todo/ --requests 500 --no-compare
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+import sqlalchemy
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.dataset import PASSWORD, prepare_dataset
+from fastapi_sincrono.app import app
+from fastapi_sincrono.database import get_session
+from fastapi_sincrono.pagination import encode_cursor
+from fastapi_sincrono.security import get_identity_cache
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_FILE = ROOT / 'benchmarks' / 'results' / 'endpoints.json'
+BASELINE_FILE = ROOT / 'benchmarks' / 'baseline.json'
+BATCH_SIZE = 50
+IMPORT_ROWS = 100
+
+
+class Context:
+    def __init__(self, client: TestClient):
+        self.client = client
+        self.counter = 0
+        self.user_id = 1
+        self.headers = self.login('user0', PASSWORD)
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def login(self, username: str, password: str) -> dict:
+        response = self.client.post(
+            '/auth/token', data={'username': username, 'password': password}
+        )
+        response.raise_for_status()
+        return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+    def create_user(self) -> tuple[int, dict]:
+        username = self.unique('scratch')
+        response = self.client.post(
+            '/users/',
+            json={
+                'username': username,
+                'email': f'{username}@example.com',
+                'password': PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        return response.json()['id'], self.login(username, PASSWORD)
+
+    def create_todos(self, total: int) -> list[int]:
+        ids = []
+        for start in range(0, total, 500):
+            response = self.client.post(
+                '/todo/batch',
+                headers=self.headers,
+                json={
+                    'todos': [
+                        {'title': self.unique('bench todo ')}
+                        for _ in range(min(500, total - start))
+                    ]
+                },
+            )
+            response.raise_for_status()
+            ids.extend(item['id'] for item in response.json()['results'])
+        return ids
+
+
+# cada cenário gera as chamadas a medir; o preparo fica fora da medição
+def auth_token(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(
+            ctx.client.post,
+            '/auth/token',
+            data={'username': 'user0', 'password': PASSWORD},
+        )
+
+
+def auth_refresh_token(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(
+            ctx.client.post, '/auth/refresh-token', headers=ctx.headers
+        )
+
+
+def users_create(ctx: Context, total: int):
+    for _ in range(total):
+        username = ctx.unique('new')
+        yield partial(
+            ctx.client.post,
+            '/users/',
+            json={
+                'username': username,
+                'email': f'{username}@example.com',
+                'password': PASSWORD,
+            },
+        )
+
+
+def users_list(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(ctx.client.get, '/users/?limit=100')
+
+
+def users_get(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(ctx.client.get, f'/users/{ctx.user_id}')
+
+
+def users_update(ctx: Context, total: int):
+    # mesmos dados do seed: o token do usuário continua válido
+    for _ in range(total):
+        yield partial(
+            ctx.client.put,
+            f'/users/{ctx.user_id}',
+            headers=ctx.headers,
+            json={
+                'username': 'user0',
+                'email': 'user0@example.com',
+                'password': PASSWORD,
+            },
+        )
+
+
+def users_delete(ctx: Context, total: int):
+    users = [ctx.create_user() for _ in range(total)]
+    for user_id, headers in users:
+        yield partial(ctx.client.delete, f'/users/{user_id}', headers=headers)
+
+
+def todo_create(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(
+            ctx.client.post,
+            '/todo/',
+            headers=ctx.headers,
+            json={'title': ctx.unique('bench todo ')},
+        )
+
+
+def todo_list_query(query: str):
+    def scenario(ctx: Context, total: int):
+        for _ in range(total):
+            yield partial(
+                ctx.client.get, f'/todo/{query}', headers=ctx.headers
+            )
+
+    return scenario
+
+
+def todo_changes(ctx: Context, total: int):
+    # um cursor além da última versão volta como o cursor em dia
+    cursor = ctx.client.get(
+        '/todo/changes',
+        headers=ctx.headers,
+        params={'since': encode_cursor(version=sys.maxsize, id=0)},
+    ).json()['next_cursor']
+    # a sincronização lê só as mudanças, não a lista inteira do usuário
+    ctx.create_todos(BATCH_SIZE)
+    for _ in range(total):
+        yield partial(
+            ctx.client.get,
+            '/todo/changes',
+            headers=ctx.headers,
+            params={'since': cursor},
+        )
+
+
+def todo_export(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(ctx.client.get, '/todo/export', headers=ctx.headers)
+
+
+def todo_import(ctx: Context, total: int):
+    content = ''.join(
+        json.dumps({'title': f'imported {i}', 'state': 'pending'}) + '\n'
+        for i in range(IMPORT_ROWS)
+    ).encode()
+    for _ in range(total):
+        yield partial(
+            ctx.client.post,
+            '/todo/import',
+            headers=ctx.headers,
+            files={'file': ('todos.ndjson', content)},
+        )
+
+
+def todo_update(ctx: Context, total: int):
+    for todo_id in ctx.create_todos(total):
+        yield partial(
+            ctx.client.patch,
+            f'/todo/{todo_id}',
+            headers=ctx.headers,
+            json={'state': 'done'},
+        )
+
+
+def todo_delete(ctx: Context, total: int):
+    for todo_id in ctx.create_todos(total):
+        yield partial(
+            ctx.client.delete, f'/todo/{todo_id}', headers=ctx.headers
+        )
+
+
+def todo_batch_create(ctx: Context, total: int):
+    for _ in range(total):
+        yield partial(
+            ctx.client.post,
+            '/todo/batch',
+            headers=ctx.headers,
+            json={
+                'todos': [
+                    {'title': ctx.unique('bench todo ')}
+                    for _ in range(BATCH_SIZE)
+                ]
+            },
+        )
+
+
+def todo_batch_update(ctx: Context, total: int):
+    ids = ctx.create_todos(total * BATCH_SIZE)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield partial(
+            ctx.client.patch,
+            '/todo/batch',
+            headers=ctx.headers,
+            json={
+                'todos': [
+                    {'id': todo_id, 'state': 'doing'}
+                    for todo_id in ids[start : start + BATCH_SIZE]
+                ]
+            },
+        )
+
+
+def todo_batch_delete(ctx: Context, total: int):
+    ids = ctx.create_todos(total * BATCH_SIZE)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield partial(
+            ctx.client.request,
+            'DELETE',
+            '/todo/batch',
+            headers=ctx.headers,
+            json={'ids': ids[start : start + BATCH_SIZE]},
+        )
+
+
+# (rota, cenário, divisor de --requests para rotas caras)
+SCENARIOS = [
+    ('POST /auth/token', auth_token, 10),
+    ('POST /auth/refresh-token', auth_refresh_token, 1),
+    ('POST /users/', users_create, 10),
+    ('GET /users/', users_list, 1),
+    ('GET /users/{user_id}', users_get, 1),
+    ('PUT /users/{user_id}', users_update, 10),
+    ('DELETE /users/{user_id}', users_delete, 10),
+    ('POST /todo/', todo_create, 1),
+    ('GET /todo/', todo_list_query(''), 1),
+    ('GET /todo/?state=done', todo_list_query('?state=done'), 1),
+    ('GET /todo/?q=word7', todo_list_query('?q=word7'), 1),
+    ('GET /todo/stats', todo_list_query('stats'), 1),
+    ('GET /todo/changes', todo_changes, 1),
+    ('GET /todo/export', todo_export, 10),
+    ('POST /todo/import', todo_import, 10),
+    ('POST /todo/batch', todo_batch_create, 10),
+    ('PATCH /todo/batch', todo_batch_update, 10),
+    ('DELETE /todo/batch', todo_batch_delete, 10),
+    ('PATCH /todo/{todo_id}', todo_update, 1),
+    ('DELETE /todo/{todo_id}', todo_delete, 1),
+]
+
+
+def measure(name: str, calls) -> list[float]:
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        response = call()
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:  # noqa: PLR2004
+            raise RuntimeError(
+                f'{name}: {response.status_code} {response.text}'
+            )
+    return timings
+
+
+def summarize(timings: list[float]) -> dict:
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'count': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': cuts[49] * 1000,
+        'p90_ms': cuts[89] * 1000,
+        'p99_ms': cuts[98] * 1000,
+        'max_ms': max(timings) * 1000,
+        'rps': len(timings) / sum(timings),
+    }
+
+
+def run_size(size: int, requests: int, routes: list[str]) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        engine = create_engine(f'sqlite:///{prepare_dataset(size, Path(tmp))}')
+        print(
+            f'dataset {size} todos ready in {time.perf_counter() - start:.1f}s'
+        )
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        get_identity_cache().clear()
+        try:
+            with TestClient(app) as client:
+                ctx = Context(client)
+                for name, scenario, divisor in SCENARIOS:
+                    if routes and not any(r in name for r in routes):
+                        continue
+                    total = max(2, requests // divisor)
+                    results[name] = summarize(
+                        measure(name, scenario(ctx, total))
+                    )
+                    print_stats(size, name, results[name])
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+    return results
+
+
+def print_stats(size: int, name: str, stats: dict):
+    print(
+        f'{size:>8} {name:<28} '
+        f'p50={stats["p50_ms"]:8.2f}ms p90={stats["p90_ms"]:8.2f}ms '
+        f'p99={stats["p99_ms"]:8.2f}ms {stats["rps"]:8.1f} req/s'
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],  # noqa: S607
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, metric: str, threshold: float):
+    regressions = []
+    for size, routes in current['results'].items():
+        for name, stats in routes.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = stats[metric] / before[metric]
+            flag = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+            print(
+                f'{size:>8} {name:<28} {metric} '
+                f'{before[metric]:8.2f} -> {stats[metric]:8.2f}ms '
+                f'({ratio - 1:+.0%}) {flag}'
+            )
+            if flag != 'ok':
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000]
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument(
+        '--routes', nargs='*', default=[], help='filtra por trecho do nome'
+    )
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument(
+        '--metric', choices=['p50_ms', 'p90_ms', 'p99_ms'], default='p50_ms'
+    )
+    args = parser.parse_args()
+
+    compare_baseline = not (args.save_baseline or args.no_compare)
+    # falha antes de medir: sem baseline, a comparação não aconteceria
+    if compare_baseline and not args.baseline.exists():
+        print(
+            f'no baseline at {args.baseline}: run with --save-baseline '
+            'first, or --no-compare to only measure',
+            file=sys.stderr,
+        )
+        sys.exit(2)
+
+    current = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'requests': args.requests,
+        'results': {
+            str(size): run_size(size, args.requests, args.routes)
+            for size in args.sizes
+        },
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, indent=2))
+    print(f'results written to {args.output}')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f'baseline saved to {args.baseline}')
+    if not compare_baseline:
+        return
+
+    regressions = compare(
+        current,
+        json.loads(args.baseline.read_text()),
+        args.metric,
+        args.threshold,
+    )
+    if regressions:
+        print(
+            f'{len(regressions)} route(s) regressed over {args.threshold:.0%}'
+        )
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
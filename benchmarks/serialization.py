@@ -0,0 +1,106 @@
+"""Custo por item da serialização das listas de todos e usuários.
+
+Compara o caminho do `response_model` (validação `from_attributes` do
+TodoList/UserList + `dump_json`, como o FastAPI faz) com o caminho usado
+por `GET /todo/` e `GET /users/`, que codifica as linhas direto com
+`FastJSONResponse`. Não usa banco: as instâncias ORM são montadas em
+memória.
+
+Uso:
+    python -m benchmarks.serialization --sizes 10 100 1000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from pydantic import TypeAdapter
+
+from fastapi_sincrono.models import Todo, TodoStatus, User
+from fastapi_sincrono.schemas import TodoList, UserList
+from fastapi_sincrono.serialization import (
+    TODO_FIELDS,
+    USER_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+
+NOW = datetime(2026, 1, 1, 12, 30)
+
+
+def make_todos(size: int):
+    todos = []
+    for i in range(size):
+        todo = Todo(
+            title=f'todo {i}',
+            description=f'descrição do todo {i}',
+            state=TodoStatus.doing,
+            user_id=1,
+        )
+        todo.id, todo.created_at, todo.updated_at = i + 1, NOW, NOW
+        todos.append(todo)
+    return todos
+
+
+def make_users(size: int):
+    users = []
+    for i in range(size):
+        user = User(
+            username=f'user{i}', email=f'user{i}@example.com', password='x'
+        )
+        user.id = i + 1
+        users.append(user)
+    return users
+
+
+def per_item_us(fn, size: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / size * 1_000_000
+
+
+def bench(list_model, rows, fields, repeat):
+    key = next(iter(list_model.model_fields))
+    adapter = TypeAdapter(list_model)
+    response = FastJSONResponse(None)
+
+    def validated():
+        value = adapter.validate_python(
+            {key: rows, 'next_cursor': None}, from_attributes=True
+        )
+        return adapter.dump_json(value)
+
+    def fast():
+        return response.render({
+            key: dump_rows(rows, fields),
+            'next_cursor': None,
+        })
+
+    assert validated() == fast()
+    before = per_item_us(validated, len(rows), repeat)
+    after = per_item_us(fast, len(rows), repeat)
+    print(
+        f'{key:<6} n={len(rows):<5} response_model={before:6.2f}us/item  '
+        f'fast={after:6.2f}us/item  ({before / after:.1f}x)'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 100, 1000]
+    )
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(TodoList, make_todos(size), TODO_FIELDS, args.repeat)
+        bench(UserList, make_users(size), USER_FIELDS, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Compara N chamadas unitárias de todo com uma chamada de /todo/batch.
+
+Roda o `app` real em processo (TestClient) sobre um SQLite em arquivo e
+mede criar, alterar e apagar N todos das duas formas.
+
+Uso:
+    python -m benchmarks.todo_batch --sizes 10 100 500
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.app import app
+from fastapi_sincrono.database import get_session
+from fastapi_sincrono.models import table_registry
+
+
+def elapsed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_size(client, headers, size):
+    payload = [{'title': f'todo {i}'} for i in range(size)]
+
+    def single_create():
+        return [
+            client.post('/todo/', headers=headers, json=todo).json()['id']
+            for todo in payload
+        ]
+
+    ids = []
+    single = {'create': elapsed_ms(lambda: ids.extend(single_create()))}
+    single['update'] = elapsed_ms(
+        lambda: [
+            client.patch(f'/todo/{i}', headers=headers, json={'state': 'done'})
+            for i in ids
+        ]
+    )
+    single['delete'] = elapsed_ms(
+        lambda: [client.delete(f'/todo/{i}', headers=headers) for i in ids]
+    )
+
+    def batch_create():
+        response = client.post(
+            '/todo/batch', headers=headers, json={'todos': payload}
+        )
+        ids[:] = [result['id'] for result in response.json()['results']]
+
+    batch = {'create': elapsed_ms(batch_create)}
+    batch['update'] = elapsed_ms(
+        lambda: client.patch(
+            '/todo/batch',
+            headers=headers,
+            json={'todos': [{'id': i, 'state': 'done'} for i in ids]},
+        )
+    )
+    batch['delete'] = elapsed_ms(
+        lambda: client.request(
+            'DELETE', '/todo/batch', headers=headers, json={'ids': ids}
+        )
+    )
+
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{Path(tmp) / "batch.db"}')
+        table_registry.metadata.create_all(engine)
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        with TestClient(app) as client:
+            client.post(
+                '/users/',
+                json={
+                    'username': 'bench',
+                    'email': 'bench@example.com',
+                    'password': 'bench',
+                },
+            )
+            token = client.post(
+                '/auth/token', data={'username': 'bench', 'password': 'bench'}
+            ).json()['access_token']
+            headers = {'Authorization': f'Bearer {token}'}
+
+            for size in args.sizes:
+                single, batch = bench_size(client, headers, size)
+                for operation in ('create', 'update', 'delete'):
+                    print(
+                        f'n={size:<4} {operation:<6} '
+                        f'single={single[operation]:9.1f}ms  '
+                        f'batch={batch[operation]:7.1f}ms  '
+                        f'({single[operation] / batch[operation]:.0f}x)'
+                    )
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
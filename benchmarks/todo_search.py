@@ -0,0 +1,111 @@
+"""Compara a busca com LIKE '%termo%' e a busca pelo índice FTS5.
+
+Popula um SQLite em arquivo com N todos (1M por padrão) divididos entre
+alguns usuários e mede as duas formas de filtrar um termo raro nos todos
+de um único usuário, exatamente como `GET /todo/` monta as queries.
+
+Uso:
+    python -m benchmarks.todo_search --todos 1000000 --users 10
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.models import Todo, TodoStatus, User, table_registry
+from fastapi_sincrono.pagination import paginate
+from fastapi_sincrono.queries import select_user_todos
+from fastapi_sincrono.schemas import FilterPage, FilterTodo
+
+RARE_WORD = 'zanzibar'
+CHUNK = 10_000
+
+
+def seed(engine, total_todos: int, total_users: int):
+    rng = random.Random(42)
+    vocabulary = [f'word{i}' for i in range(2_000)]
+
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [
+                {
+                    'username': f'user{i}',
+                    'email': f'user{i}@example.com',
+                    'password': 'x',
+                }
+                for i in range(total_users)
+            ],
+        )
+        for start in range(0, total_todos, CHUNK):
+            rows = []
+            for i in range(start, min(start + CHUNK, total_todos)):
+                words = rng.sample(vocabulary, 6)
+                if i % 10_007 == 0:
+                    words[0] = RARE_WORD
+                rows.append({
+                    'title': ' '.join(words[:3]),
+                    'description': ' '.join(words[3:]),
+                    'state': rng.choice(list(TodoStatus)),
+                    'user_id': i % total_users + 1,
+                })
+            session.execute(insert(Todo), rows)
+        session.commit()
+
+
+def timed(session, query, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = session.scalars(query).all()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--todos', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    page = FilterPage(limit=10)
+    like_query = paginate(
+        select_user_todos(1, FilterTodo(title=RARE_WORD)), Todo.id, page
+    )
+    fts_query = paginate(
+        select_user_todos(1, FilterTodo(q=RARE_WORD)),
+        Todo.id,
+        page,
+        ranked=True,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{Path(tmp) / "search.db"}')
+        table_registry.metadata.create_all(engine)
+
+        start = time.perf_counter()
+        seed(engine, args.todos, args.users)
+        print(
+            f'seeded {args.todos} todos in {time.perf_counter() - start:.1f}s'
+        )
+
+        with Session(engine) as session:
+            like_ms, like_rows = timed(session, like_query, args.repeat)
+            fts_ms, fts_rows = timed(session, fts_query, args.repeat)
+
+        engine.dispose()
+
+    print(f"LIKE '%{RARE_WORD}%': {like_ms:9.2f}ms ({like_rows} rows)")
+    print(f'FTS5 MATCH        : {fts_ms:9.2f}ms ({fts_rows} rows)')
+    print(f'speed-up          : {like_ms / fts_ms:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Vazão x latência do group commit em criações concorrentes de todos.
+
+Roda em processo o caminho de escrita de POST /todo/ (`run_todo_write`
+com `create_todo_row`) de várias threads, como o threadpool das rotas
+`def`, sobre um SQLite em arquivo novo para cada janela. `off` é o modo
+padrão: cada requisição faz o próprio commit e disputa o lock de escrita
+do SQLite; as demais janelas (ms) passam pelo `WriteCoalescer`. Sem o
+HTTP, a medida não se mistura ao custo de CPU do resto da requisição.
+
+O JSON em benchmarks/results/write_coalescing.json guarda os números de
+cada janela.
+
+Uso:
+    python -m benchmarks.write_coalescing --requests 2000 --threads 15
+    python -m benchmarks.write_coalescing --windows off 0 2 10
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.endpoints import ROOT, git_revision, summarize
+from fastapi_sincrono.models import User, table_registry
+from fastapi_sincrono.schemas import TodoSchema
+from fastapi_sincrono.write_coalescing import (
+    WriteCoalescer,
+    create_todo_row,
+    run_todo_write,
+)
+
+RESULTS_FILE = ROOT / 'benchmarks' / 'results' / 'write_coalescing.json'
+WINDOWS = ('off', '0', '1', '2', '5', '10')
+MAX_BATCH = 64
+
+
+def create_user(engine) -> int:
+    with Session(engine) as session:
+        user = User(username='bench', email='bench@example.com', password='x')
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def run_window(db_file: Path, window: str, requests: int, threads: int):
+    engine = create_engine(
+        f'sqlite:///{db_file}', pool_size=threads, max_overflow=0
+    )
+    table_registry.metadata.create_all(engine)
+    user_id = create_user(engine)
+    coalescer = (
+        None
+        if window == 'off'
+        else WriteCoalescer(
+            lambda: Session(engine), float(window) / 1000, MAX_BATCH
+        )
+    )
+
+    def one(i):
+        values = TodoSchema(title=f'todo {i}').model_dump()
+        start = time.perf_counter()
+        # a sessão da requisição: só é usada sem o group commit
+        with Session(engine) as session:
+            run_todo_write(
+                session, coalescer, create_todo_row, user_id, values
+            )
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        timings = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    batches = coalescer.batch_sizes if coalescer else None
+    if coalescer:
+        coalescer.close()
+    engine.dispose()
+    return {
+        **summarize(timings),
+        # vazão do conjunto, com as threads em paralelo
+        'rps': requests / elapsed,
+        'commits': batches.count if batches else requests,
+        'mean_batch': batches.sum / batches.count if batches else 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--requests', type=int, default=2000)
+    # o padrão do threadpool: DB_POOL_SIZE + DB_MAX_OVERFLOW
+    parser.add_argument('--threads', type=int, default=15)
+    parser.add_argument('--windows', nargs='+', default=WINDOWS)
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for window in args.windows:
+            result = run_window(
+                Path(tmp) / f'window-{window}.db',
+                window,
+                args.requests,
+                args.threads,
+            )
+            results[window] = result
+            label = 'off' if window == 'off' else f'{window}ms'
+            print(
+                f'{label:>6}: {result["rps"]:8.1f} writes/s  '
+                f'p50={result["p50_ms"]:.2f}ms  '
+                f'p99={result["p99_ms"]:.2f}ms  '
+                f'max={result["max_ms"]:.1f}ms  '
+                f'commits={result["commits"]}  '
+                f'batch={result["mean_batch"]:.1f}'
+            )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                'git': git_revision(),
+                'requests': args.requests,
+                'threads': args.threads,
+                'windows': results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""Statements por requisição nas rotas de escrita unitárias.
+
+Roda os routers (síncronos ou `--async-mode`) em processo sobre um
+SQLite em arquivo e conta, por requisição, os statements enviados ao
+banco (`before_cursor_execute`) e os COMMITs (evento `commit`), além da
+latência. O token já vem do cache de identidade, então só as queries da
+própria escrita entram na conta.
+
+O JSON tem o mesmo formato do `benchmarks.endpoints`; com um baseline
+salvo, mais statements que antes faz o comando sair com código 1.
+
+Uso:
+    python -m benchmarks.write_statements --requests 200
+    python -m benchmarks.write_statements --async-mode --save-baseline
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from importlib import import_module
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from benchmarks.endpoints import ROOT, compare, git_revision, summarize
+from fastapi_sincrono.database import get_async_session, get_session
+from fastapi_sincrono.models import table_registry
+
+RESULTS_FILE = ROOT / 'benchmarks' / 'results' / 'write_statements.json'
+BASELINE_FILE = ROOT / 'benchmarks' / 'write_statements_baseline.json'
+PASSWORD = 'bench'
+
+
+class StatementLog:
+    def __init__(self, engine):
+        self.statements = []
+        self.commits = 0
+        event.listen(engine, 'before_cursor_execute', self.on_execute)
+        event.listen(engine, 'commit', self.on_commit)
+
+    def on_execute(self, conn, cursor, statement, *args):
+        self.statements.append(statement.split(None, 1)[0].upper())
+
+    def on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self):
+        self.statements.clear()
+        self.commits = 0
+
+
+def build_app(db_file: Path, async_mode: bool):
+    engine = create_engine(f'sqlite:///{db_file}')
+    table_registry.metadata.create_all(engine)
+    package = 'fastapi_sincrono.routers' + ('.aio' if async_mode else '')
+    app = FastAPI()
+    for name in ('auth', 'users', 'todo'):
+        app.include_router(import_module(f'{package}.{name}').router)
+
+    if not async_mode:
+
+        def get_session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        return app, engine
+
+    engine.dispose()
+    async_engine = create_async_engine(
+        f'sqlite+aiosqlite:///{db_file}', poolclass=NullPool
+    )
+
+    async def get_async_session_override():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    return app, async_engine.sync_engine
+
+
+def scenarios(client: TestClient, headers: dict, total: int):
+    """(rota, chamadas) de cada escrita; o preparo não é contado."""
+
+    def create_todo(i):
+        return client.post(
+            '/todo/', headers=headers, json={'title': f'todo {i}'}
+        )
+
+    def create_user(i):
+        return client.post(
+            '/users/',
+            json={
+                'username': f'new{i}',
+                'email': f'new{i}@example.com',
+                'password': PASSWORD,
+            },
+        )
+
+    yield 'POST /users/', [lambda i=i: create_user(i) for i in range(total)]
+    yield 'POST /todo/', [lambda i=i: create_todo(i) for i in range(total)]
+
+    ids = [create_todo(i).json()['id'] for i in range(total)]
+    yield (
+        'PATCH /todo/{todo_id}',
+        [
+            lambda todo_id=todo_id: client.patch(
+                f'/todo/{todo_id}', headers=headers, json={'state': 'done'}
+            )
+            for todo_id in ids
+        ],
+    )
+    yield (
+        'DELETE /todo/{todo_id}',
+        [
+            lambda todo_id=todo_id: client.delete(
+                f'/todo/{todo_id}', headers=headers
+            )
+            for todo_id in ids
+        ],
+    )
+
+
+def measure(name: str, calls, log: StatementLog) -> dict:
+    timings, statements, commits, kinds = [], [], [], Counter()
+    for call in calls:
+        log.reset()
+        start = time.perf_counter()
+        response = call()
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:  # noqa: PLR2004
+            raise RuntimeError(
+                f'{name}: {response.status_code} {response.text}'
+            )
+        statements.append(len(log.statements))
+        commits.append(log.commits)
+        kinds.update(log.statements)
+
+    return {
+        **summarize(timings),
+        'statements': statistics.fmean(statements),
+        'commits': statistics.fmean(commits),
+        'kinds': {
+            kind: count / len(timings) for kind, count in sorted(kinds.items())
+        },
+    }
+
+
+def run(requests: int, async_mode: bool) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app, engine = build_app(Path(tmp) / 'writes.db', async_mode)
+        log = StatementLog(engine)
+        with TestClient(app) as client:
+            client.post(
+                '/users/',
+                json={
+                    'username': 'bench',
+                    'email': 'bench@example.com',
+                    'password': PASSWORD,
+                },
+            ).raise_for_status()
+            token = client.post(
+                '/auth/token',
+                data={'username': 'bench', 'password': PASSWORD},
+            ).json()['access_token']
+            headers = {'Authorization': f'Bearer {token}'}
+
+            for name, calls in scenarios(client, headers, requests):
+                results[name] = measure(name, calls, log)
+                stats = results[name]
+                kinds = ' '.join(
+                    f'{kind}={count:g}'
+                    for kind, count in stats['kinds'].items()
+                )
+                print(
+                    f'{name:<24} statements={stats["statements"]:g} '
+                    f'commits={stats["commits"]:g} ({kinds}) '
+                    f'p50={stats["p50_ms"]:.2f}ms'
+                )
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--async-mode', action='store_true')
+    parser.add_argument('--output', type=Path, default=RESULTS_FILE)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    label = 'async' if args.async_mode else 'sync'
+    current = {
+        'git': git_revision(),
+        'requests': args.requests,
+        'results': {label: run(args.requests, args.async_mode)},
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f'baseline saved to {args.baseline}')
+        return
+    if not args.baseline.exists():
+        return
+
+    # número de statements não tem ruído: qualquer aumento é regressão
+    baseline = json.loads(args.baseline.read_text())
+    if compare(current, baseline, 'statements', 0):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
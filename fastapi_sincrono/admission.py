@@ -0,0 +1,184 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from http import HTTPStatus
+from threading import Lock
+
+from anyio import to_thread
+from starlette.responses import JSONResponse
+
+from fastapi_sincrono.database import get_pools
+from fastapi_sincrono.request_metrics import render_metric
+from fastapi_sincrono.settings import Settings, get_settings
+
+
+def threadpool_waiting() -> int:
+    # tarefas esperando uma thread do threadpool do anyio (rotas `def`);
+    # só pode ser lido no event loop
+    return (
+        to_thread.current_default_thread_limiter().statistics().tasks_waiting
+    )
+
+
+def max_pool_wait_ms() -> float:
+    return max(
+        (pool.metrics.recent_wait_ms() for pool in get_pools().values()),
+        default=0.0,
+    )
+
+
+@dataclass
+class AdmissionPolicy:
+    route_limits: dict[str, int] = field(default_factory=dict)
+    max_threadpool_waiting: int | None = None
+    max_pool_wait_ms: float | None = None
+    retry_after: int = 1
+
+    @classmethod
+    def from_settings(cls, settings: Settings):
+        return cls(
+            route_limits=settings.ADMISSION_ROUTE_LIMITS,
+            max_threadpool_waiting=settings.ADMISSION_MAX_THREADPOOL_WAITING,
+            max_pool_wait_ms=settings.ADMISSION_MAX_POOL_WAIT_MS,
+            retry_after=settings.ADMISSION_RETRY_AFTER,
+        )
+
+
+class AdmissionControl:
+    """Decide, antes de rotear, se a requisição entra ou é recusada.
+
+    Cada rota pertence à classe do prefixo mais longo de `route_limits`
+    (`/auth/`, `/todo/`...), com seu próprio limite de requisições em
+    andamento. Com o threadpool ou o pool de conexões saturados, todas as
+    classes recusam: é melhor um 503 imediato do que uma fila que faz
+    todas as requisições estourarem o tempo.
+    """
+
+    def __init__(
+        self,
+        policy: AdmissionPolicy,
+        threadpool_waiting=threadpool_waiting,
+        pool_wait_ms=max_pool_wait_ms,
+    ):
+        self.policy = policy
+        self.threadpool_waiting = threadpool_waiting
+        self.pool_wait_ms = pool_wait_ms
+        self.prefixes = sorted(policy.route_limits, key=len, reverse=True)
+        self._lock = Lock()
+        self.in_flight = defaultdict(int)
+        self.shed = Counter()
+
+    def route_class(self, path: str) -> str | None:
+        return next(
+            (prefix for prefix in self.prefixes if path.startswith(prefix)),
+            None,
+        )
+
+    def overload_reason(self, route_class: str) -> str | None:
+        policy = self.policy
+        if self.in_flight[route_class] >= policy.route_limits[route_class]:
+            return 'in_flight'
+        if policy.max_threadpool_waiting is not None and (
+            self.threadpool_waiting() > policy.max_threadpool_waiting
+        ):
+            return 'threadpool'
+        if policy.max_pool_wait_ms is not None and (
+            self.pool_wait_ms() > policy.max_pool_wait_ms
+        ):
+            return 'db_pool'
+        return None
+
+    def admit(self, route_class: str) -> str | None:
+        """Reserva uma vaga; devolve o motivo da recusa, se houver."""
+        with self._lock:
+            reason = self.overload_reason(route_class)
+            if reason:
+                self.shed[(route_class, reason)] += 1
+            else:
+                self.in_flight[route_class] += 1
+            return reason
+
+    def release(self, route_class: str):
+        with self._lock:
+            self.in_flight[route_class] -= 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            return [
+                *render_metric(
+                    'admission_in_flight',
+                    'gauge',
+                    'Admitted requests being served by route class.',
+                    [
+                        ('', {'route_class': prefix}, self.in_flight[prefix])
+                        for prefix in sorted(self.prefixes)
+                    ],
+                ),
+                *render_metric(
+                    'admission_limit',
+                    'gauge',
+                    'Maximum in-flight requests by route class.',
+                    [
+                        ('', {'route_class': prefix}, limit)
+                        for prefix, limit in sorted(
+                            self.policy.route_limits.items()
+                        )
+                    ],
+                ),
+                *render_metric(
+                    'http_requests_shed_total',
+                    'counter',
+                    'Requests rejected with 503 by route class and reason.',
+                    [
+                        ('', {'route_class': key[0], 'reason': key[1]}, count)
+                        for key, count in sorted(self.shed.items())
+                    ],
+                ),
+            ]
+
+
+@lru_cache
+def get_admission_control() -> AdmissionControl:
+    return AdmissionControl(AdmissionPolicy.from_settings(get_settings()))
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que recusa com 503 + Retry-After sob sobrecarga.
+
+    Roda antes do roteamento e do threadpool: a requisição recusada não
+    ocupa thread nem conexão. A vaga só é devolvida no fim da resposta
+    (inclusive de streaming).
+    """
+
+    def __init__(self, app, control: AdmissionControl | None = None):
+        self.app = app
+        self._control = control
+
+    @property
+    def control(self) -> AdmissionControl:
+        return self._control or get_admission_control()
+
+    async def __call__(self, scope, receive, send):
+        control = self.control
+        route_class = (
+            control.route_class(scope['path'])
+            if scope['type'] == 'http'
+            else None
+        )
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if control.admit(route_class):
+            response = JSONResponse(
+                {'detail': 'Service Unavailable'},
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(control.policy.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            control.release(route_class)
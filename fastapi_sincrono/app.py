@@ -1,15 +1,59 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
+from importlib import import_module
 
 from fastapi import FastAPI
 
-from fastapi_sincrono.routers import auth, todo, users
+from fastapi_sincrono.admission import AdmissionMiddleware
+from fastapi_sincrono.openapi import load_openapi
+from fastapi_sincrono.replicas import ReadYourWritesMiddleware
+from fastapi_sincrono.request_metrics import (
+    MetricsMiddleware,
+    instrument_queries,
+)
+from fastapi_sincrono.routers import internal, metrics
 from fastapi_sincrono.schemas import Message
+from fastapi_sincrono.settings import get_settings
+from fastapi_sincrono.threadpool import configure_threadpool
+from fastapi_sincrono.todo_events import get_todo_events
+from fastapi_sincrono.warmup import readiness, warm_up_worker
+from fastapi_sincrono.write_coalescing import get_write_coalescer
 
-app = FastAPI()
 
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(todo.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # schema gerado no build (python -m fastapi_sincrono.openapi)
+    load_openapi(app)
+    configure_threadpool(get_settings())
+    if get_settings().WARMUP_ON_STARTUP:
+        await warm_up_worker()
+    readiness.ready = True
+    yield
+    readiness.ready = False
+    get_todo_events().close()
+    # commita o que ainda está na fila do group commit
+    if coalescer := get_write_coalescer():
+        coalescer.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+# a admissão roda dentro das métricas: os 503 também são medidos
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_queries()
+
+# só os routers do modo ativo são importados
+ROUTERS_PACKAGE = (
+    'fastapi_sincrono.routers.aio'
+    if get_settings().ASYNC_MODE
+    else 'fastapi_sincrono.routers'
+)
+for name in ('auth', 'users', 'todo'):
+    app.include_router(import_module(f'{ROUTERS_PACKAGE}.{name}').router)
+
+app.include_router(internal.router)
+app.include_router(metrics.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
@@ -0,0 +1,101 @@
+import csv
+import json
+from dataclasses import dataclass, field
+
+from pydantic import ValidationError
+
+from fastapi_sincrono.schemas import TodoSchema
+
+# o resumo guarda só os primeiros erros; `failed` conta todos
+MAX_IMPORT_ERRORS = 100
+
+
+@dataclass
+class ImportSummary:
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def add_error(self, line: int, errors: list[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+
+def decode_lines(binary_file, strict: bool):
+    # decodifica linha a linha: o arquivo nunca é lido inteiro
+    for raw_line in binary_file:
+        try:
+            yield raw_line.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            if strict:
+                raise
+            yield None
+
+
+def read_csv_records(binary_file):
+    # um registro CSV pode ocupar várias linhas: encoding inválido encerra
+    reader = csv.DictReader(decode_lines(binary_file, strict=True))
+    for record in reader:
+        # colunas vazias ficam com o default do TodoSchema
+        values = {key: value for key, value in record.items() if key and value}
+        yield reader.line_num, values, None
+
+
+def read_ndjson_records(binary_file):
+    lines = decode_lines(binary_file, strict=False)
+    for line_number, line in enumerate(lines, start=1):
+        if line is None:
+            yield line_number, None, ['Invalid UTF-8']
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError:
+            yield line_number, None, ['Invalid JSON']
+
+
+def read_records(binary_file, file_format: str):
+    """Lê o arquivo linha a linha, gerando `(linha, registro, erros)`."""
+    if file_format == 'csv':
+        records = read_csv_records(binary_file)
+    else:
+        records = read_ndjson_records(binary_file)
+
+    line_number = 0
+    try:
+        for line_number, record, errors in records:
+            yield line_number, record, errors
+    except UnicodeDecodeError:
+        yield line_number + 1, None, ['File is not valid UTF-8']
+
+
+def validate_record(record):
+    try:
+        return TodoSchema.model_validate(record), None
+    except ValidationError as e:
+        return None, [
+            f'{".".join(map(str, error["loc"])) or "row"}: {error["msg"]}'
+            for error in e.errors()
+        ]
+
+
+def iter_todo_chunks(records, user_id: int, chunk_size: int, summary):
+    chunk = []
+
+    for line_number, record, read_errors in records:
+        todo, errors = (
+            (None, read_errors) if read_errors else validate_record(record)
+        )
+        if errors:
+            summary.add_error(line_number, errors)
+            continue
+
+        chunk.append({**todo.model_dump(), 'user_id': user_id})
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
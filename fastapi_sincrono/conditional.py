@@ -0,0 +1,88 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+
+from fastapi import HTTPException, Request, Response
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(
+        repr(parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def http_date(value: datetime) -> str:
+    # o banco guarda UTC sem timezone (CURRENT_TIMESTAMP)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+
+    # comparação fraca: W/"x" e "x" são equivalentes
+    candidates = {
+        tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+    }
+    return etag.removeprefix('W/') in candidates
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None):
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None = None,
+):
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        # o handler do Starlette responde 304 sem corpo
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_MODIFIED, headers=headers
+        )
+
+    response.headers.update(headers)
+
+
+def user_etag(user) -> str:
+    return make_etag(user.id, user.username, user.email, user.updated_at)
+
+
+def todos_etag(request: Request, user_id: int, version: int, *extra) -> str:
+    # a lista muda com filtros e paginação: a query entra no ETag; o path
+    # separa as rotas que usam a mesma versão (/todo/, /todo/stats). Em
+    # `extra`, o que muda a resposta sem escrita (a janela das estatísticas)
+    return make_etag(
+        user_id, version, request.url.path, request.url.query, *extra
+    )
@@ -1,11 +1,156 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
-from fastapi_sincrono.settings import Settings
+from fastapi_sincrono.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from fastapi_sincrono.replicas import ReplicaRouter
+from fastapi_sincrono.settings import Settings, get_settings
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+psycopg',
+}
+
+
+def get_async_database_url(settings: Settings) -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return to_async_url(settings.DATABASE_URL)
+
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    return url.set(
+        drivername=ASYNC_DRIVERS.get(backend, url.drivername)
+    ).render_as_string(hide_password=False)
+
+
+def get_pool_options(settings: Settings, database_url: str, poolclass):
+    url = make_url(database_url)
+    options = {'pool_pre_ping': settings.DB_POOL_PRE_PING}
+
+    # SQLite em memória usa SingletonThreadPool/StaticPool, sem fila
+    if url.get_backend_name() == 'sqlite' and url.database in {
+        None,
+        '',
+        ':memory:',
+    }:
+        return options
+
+    return {
+        **options,
+        'poolclass': poolclass,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+    }
+
+
+def build_engine(settings: Settings, database_url: str):
+    engine = create_engine(
+        database_url,
+        **get_pool_options(settings, database_url, InstrumentedQueuePool),
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def build_async_engine(settings: Settings, database_url: str):
+    async_engine = create_async_engine(
+        database_url,
+        **get_pool_options(settings, database_url, InstrumentedAsyncQueuePool),
+    )
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
 
-engine = create_engine(Settings().DATABASE_URL)
 
+# engines criados no primeiro uso: importar o app não abre pool nem
+# carrega o driver assíncrono
+@lru_cache
+def get_engine():
+    settings = get_settings()
+    return build_engine(settings, settings.DATABASE_URL)
 
-def get_session():  # pragma: no cover
-    with Session(engine) as sessinon:
+
+@lru_cache
+def get_async_engine():
+    settings = get_settings()
+    return build_async_engine(settings, get_async_database_url(settings))
+
+
+@lru_cache
+def get_replica_router():
+    settings = get_settings()
+    return ReplicaRouter(
+        get_engine(),
+        [
+            build_engine(settings, url)
+            for url in settings.DATABASE_REPLICA_URLS
+        ],
+        settings.READ_YOUR_WRITES_SECONDS,
+    )
+
+
+@lru_cache
+def get_async_replica_router():
+    settings = get_settings()
+    urls = settings.ASYNC_DATABASE_REPLICA_URLS or [
+        to_async_url(url) for url in settings.DATABASE_REPLICA_URLS
+    ]
+    return ReplicaRouter(
+        get_async_engine(),
+        [build_async_engine(settings, url) for url in urls],
+        settings.READ_YOUR_WRITES_SECONDS,
+    )
+
+
+def get_pools() -> dict:
+    # só os engines já criados; não cria o do outro modo
+    pools = {}
+    if get_engine.cache_info().currsize:
+        pools['sync'] = get_engine().pool
+    if get_async_engine.cache_info().currsize:
+        pools['async'] = get_async_engine().sync_engine.pool
+    if get_replica_router.cache_info().currsize:
+        for number, engine in enumerate(get_replica_router().replicas):
+            pools[f'replica{number}'] = engine.pool
+    if get_async_replica_router.cache_info().currsize:
+        for number, engine in enumerate(get_async_replica_router().replicas):
+            pools[f'async_replica{number}'] = engine.sync_engine.pool
+    return pools
+
+
+def get_pool_snapshots() -> dict:
+    return {
+        name: pool.metrics.snapshot(pool) for name, pool in get_pools().items()
+    }
+
+
+# leituras (GET/HEAD) vão para uma réplica, se configurada; ver ReplicaRouter
+def get_session(
+    request: Request,
+    router: ReplicaRouter = Depends(get_replica_router),
+):
+    with Session(router.engine_for_request(request)) as sessinon:
+        router.watch_writes(sessinon, request)
         yield sessinon
+
+
+async def get_async_session(
+    request: Request,
+    router: ReplicaRouter = Depends(get_async_replica_router),
+):  # pragma: no cover
+    async with AsyncSession(
+        router.engine_for_request(request), expire_on_commit=False
+    ) as session:
+        router.watch_writes(session.sync_session, request)
+        yield session
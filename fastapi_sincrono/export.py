@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from fastapi_sincrono.models import Todo
+
+# linhas acumuladas antes de cada escrita no socket
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_COLUMNS = (
+    Todo.id,
+    Todo.title,
+    Todo.description,
+    Todo.state,
+    Todo.created_at,
+    Todo.updated_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def select_todo_export(user_id: int):
+    # só colunas (sem entidades ORM): nada vai para o identity map
+    return (
+        select(*EXPORT_COLUMNS)
+        .where(Todo.user_id == user_id)
+        .order_by(Todo.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE, stream_results=True)
+    )
+
+
+def row_values(row):
+    return (
+        row.id,
+        row.title,
+        row.description,
+        row.state.value,
+        row.created_at.isoformat(),
+        row.updated_at.isoformat(),
+    )
+
+
+def ndjson_line(row) -> str:
+    return json.dumps(dict(zip(EXPORT_FIELDS, row_values(row)))) + '\n'
+
+
+def csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def csv_row(row) -> str:
+    return csv_line(row_values(row))
+
+
+SERIALIZERS = {
+    'ndjson': (None, ndjson_line),
+    'csv': (csv_line(EXPORT_FIELDS), csv_row),
+}
+
+
+def stream_rows(rows, export_format: str):
+    header, serialize = SERIALIZERS[export_format]
+    chunk = [header] if header else []
+
+    for row in rows:
+        chunk.append(serialize(row))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def stream_rows_async(rows, export_format: str):
+    header, serialize = SERIALIZERS[export_format]
+    chunk = [header] if header else []
+
+    async for row in rows:
+        chunk.append(serialize(row))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from http import HTTPStatus
+from threading import BoundedSemaphore
+
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+
+
+@lru_cache
+def get_password_context() -> PasswordHash:
+    # criado no primeiro hash; em processos do pool, uma vez por worker
+    return PasswordHash.recommended()
+
+
+# funções de módulo para poderem ser enviadas a um ProcessPoolExecutor
+def hash_password(password: str) -> str:
+    return get_password_context().hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+class BoundedExecutor:
+    """Executor exclusivo para o Argon2, com limite de tarefas pendentes.
+
+    Quando `max_pending` tarefas já estão em execução ou na fila, novas
+    submissões são recusadas com 503 em vez de acumular requisições.
+    """
+
+    def __init__(self, executor, max_pending: int):
+        self._executor = executor
+        self._slots = BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self.rejected = 0
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Server busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def create_hash_executor(kind: str, workers: int, max_pending: int):
+    if kind == 'process':
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    else:
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='argon2'
+        )
+
+    return BoundedExecutor(executor, max_pending)
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from fastapi_sincrono.models import User
+
+
+class IdentityCache:
+    """Cache LRU com TTL das identidades resolvidas por `get_current_user`.
+
+    Guarda um snapshot das colunas do usuário (nunca a instância ligada à
+    sessão da requisição) indexado pelo id do token. `maxsize=0` desliga.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: int, snapshot: dict):
+        if not self.maxsize:
+            return
+
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self.evictions = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def identity_snapshot(user: User) -> dict:
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'password': user.password,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at,
+    }
+
+
+def restore_identity(snapshot: dict) -> User:
+    """Recria o usuário como instância *detached*, sem ir ao banco.
+
+    Deve ser anexado à sessão com `session.merge(user, load=False)`.
+    """
+    user = User(
+        username=snapshot['username'],
+        email=snapshot['email'],
+        password=snapshot['password'],
+    )
+    user.id = snapshot['id']
+    user.created_at = snapshot['created_at']
+    user.updated_at = snapshot['updated_at']
+    make_transient_to_detached(user)
+    return user
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 # registrador de metadados das tabelas
@@ -31,11 +31,22 @@ class User:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    # incrementado a cada escrita nos todos do usuário (ETag da lista)
+    todos_version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default='0'
+    )
 
 
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    # todas as queries de todo filtram por user_id e paginam por id
+    __table_args__ = (
+        Index('ix_todos_user_id_id', 'user_id', 'id'),
+        Index('ix_todos_user_id_state_id', 'user_id', 'state', 'id'),
+        Index('ix_todos_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+        Index('ix_todos_user_id_version_id', 'user_id', 'version', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -48,3 +59,272 @@ class Todo:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    # `todos_version` do usuário na última escrita (GET /todo/changes)
+    version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default='0'
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TodoTombstone:
+    """Todo removido, gravado pelo trigger de TODO_TOMBSTONE_DDL."""
+
+    __tablename__ = 'todo_tombstones'
+    __table_args__ = (
+        Index('ix_todo_tombstones_user_id_version', 'user_id', 'version'),
+    )
+
+    # id do todo removido
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # as lápides saem com o usuário
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    version: Mapped[int]
+    deleted_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+# contadores por usuário mantidos pelos triggers de TODO_STATS_DDL, na
+# mesma transação da escrita no todo: GET /todo/stats não agrega a tabela.
+# Os triggers não apagam linhas zeradas: elas saem com o usuário
+@table_registry.mapped_as_dataclass
+class TodoStateCount:
+    __tablename__ = 'todo_state_counts'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    state: Mapped[TodoStatus] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class TodoDailyCount:
+    """Todos existentes criados no dia e, dos que estão `done`, quantos
+    tiveram a última alteração (a conclusão) no dia."""
+
+    __tablename__ = 'todo_daily_counts'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    created: Mapped[int] = mapped_column(default=0)
+    done: Mapped[int] = mapped_column(default=0)
+
+
+# busca textual: FTS5 (SQLite) com conteúdo externo mantido por triggers,
+# ou índice GIN sobre tsvector (PostgreSQL). Ver `queries.search_todos`.
+TODO_SEARCH_DDL = {
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+            title, description, content='todos', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_ai AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todos_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_au
+        AFTER UPDATE OF title, description ON todos
+        BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO todos_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE INDEX IF NOT EXISTS ix_todos_search ON todos USING gin (
+            to_tsvector(
+                'simple',
+                coalesce(title, '') || ' ' || coalesce(description, '')
+            )
+        )
+        """,
+    ],
+}
+
+for dialect, statements in TODO_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(
+            Todo.__table__,
+            'after_create',
+            DDL(statement).execute_if(dialect=dialect),
+        )
+
+# os contadores de TodoStateCount/TodoDailyCount. O dia é a data UTC de
+# created_at (criados) e de updated_at (concluídos)
+TODO_STATS_DDL = {
+    'sqlite': [
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_stats_ai AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            VALUES (new.user_id, new.state, 1)
+            ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+            INSERT INTO todo_daily_counts (user_id, day, created, done)
+            VALUES (new.user_id, date(new.created_at), 1, 0)
+            ON CONFLICT (user_id, day) DO UPDATE SET created = created + 1;
+            INSERT INTO todo_daily_counts (user_id, day, created, done)
+            SELECT new.user_id, date(new.updated_at), 0, 1
+            WHERE new.state = 'done'
+            ON CONFLICT (user_id, day) DO UPDATE SET done = done + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_stats_ad AFTER DELETE ON todos
+        BEGIN
+            UPDATE todo_state_counts SET count = count - 1
+            WHERE user_id = old.user_id AND state = old.state;
+            UPDATE todo_daily_counts SET created = created - 1
+            WHERE user_id = old.user_id AND day = date(old.created_at);
+            UPDATE todo_daily_counts SET done = done - 1
+            WHERE old.state = 'done'
+            AND user_id = old.user_id AND day = date(old.updated_at);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_stats_au
+        AFTER UPDATE OF state, updated_at ON todos
+        BEGIN
+            UPDATE todo_state_counts SET count = count - 1
+            WHERE old.state <> new.state
+            AND user_id = old.user_id AND state = old.state;
+            INSERT INTO todo_state_counts (user_id, state, count)
+            SELECT new.user_id, new.state, 1 WHERE old.state <> new.state
+            ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+            UPDATE todo_daily_counts SET done = done - 1
+            WHERE old.state = 'done'
+            AND user_id = old.user_id AND day = date(old.updated_at);
+            INSERT INTO todo_daily_counts (user_id, day, created, done)
+            SELECT new.user_id, date(new.updated_at), 0, 1
+            WHERE new.state = 'done'
+            ON CONFLICT (user_id, day) DO UPDATE SET done = done + 1;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_stats_apply(
+            todo todos, sign integer
+        ) RETURNS void AS $$
+        BEGIN
+            INSERT INTO todo_state_counts AS c (user_id, state, count)
+            VALUES (todo.user_id, todo.state, sign)
+            ON CONFLICT (user_id, state)
+            DO UPDATE SET count = c.count + sign;
+            INSERT INTO todo_daily_counts AS c (user_id, day, created, done)
+            VALUES (todo.user_id, todo.created_at::date, sign, 0)
+            ON CONFLICT (user_id, day)
+            DO UPDATE SET created = c.created + sign;
+            IF todo.state = 'done' THEN
+                INSERT INTO todo_daily_counts AS c (
+                    user_id, day, created, done
+                )
+                VALUES (todo.user_id, todo.updated_at::date, 0, sign)
+                ON CONFLICT (user_id, day)
+                DO UPDATE SET done = c.done + sign;
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION todo_stats_trigger() RETURNS trigger AS $$
+        BEGIN
+            -- UPDATE = remove a versão antiga e soma a nova; `created`
+            -- não muda porque created_at é o mesmo nas duas
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM todo_stats_apply(OLD, -1);
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                PERFORM todo_stats_apply(NEW, 1);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        'DROP TRIGGER IF EXISTS todo_stats ON todos',
+        """
+        CREATE TRIGGER todo_stats
+        AFTER INSERT OR DELETE OR UPDATE OF state, updated_at ON todos
+        FOR EACH ROW EXECUTE FUNCTION todo_stats_trigger()
+        """,
+    ],
+}
+
+# tombstones dos todos removidos, com a versão do usuário na remoção: as
+# rotas incrementam `todos_version` antes de escrever nos todos
+TODO_TOMBSTONE_DDL = {
+    'sqlite': [
+        """
+        CREATE TRIGGER IF NOT EXISTS todo_tombstones_ad AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todo_tombstones (id, user_id, version, deleted_at)
+            SELECT old.id, old.user_id, todos_version, CURRENT_TIMESTAMP
+            FROM users WHERE id = old.user_id
+            ON CONFLICT (id) DO UPDATE SET
+                user_id = excluded.user_id,
+                version = excluded.version,
+                deleted_at = excluded.deleted_at;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION todo_tombstone_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO todo_tombstones (id, user_id, version, deleted_at)
+            SELECT OLD.id, OLD.user_id, todos_version, now()
+            FROM users WHERE id = OLD.user_id
+            ON CONFLICT (id) DO UPDATE SET
+                user_id = EXCLUDED.user_id,
+                version = EXCLUDED.version,
+                deleted_at = EXCLUDED.deleted_at;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        'DROP TRIGGER IF EXISTS todo_tombstones ON todos',
+        """
+        CREATE TRIGGER todo_tombstones AFTER DELETE ON todos
+        FOR EACH ROW EXECUTE FUNCTION todo_tombstone_trigger()
+        """,
+    ],
+}
+
+# depois de todas as tabelas: os triggers usam todos, users, os contadores
+# e os tombstones
+for dialect, statements in (
+    *TODO_STATS_DDL.items(),
+    *TODO_TOMBSTONE_DDL.items(),
+):
+    for statement in statements:
+        event.listen(
+            table_registry.metadata,
+            'after_create',
+            DDL(statement).execute_if(dialect=dialect),
+        )
+
+event.listen(
+    Todo.__table__,
+    'after_drop',
+    DDL('DROP TABLE IF EXISTS todos_fts').execute_if(dialect='sqlite'),
+)
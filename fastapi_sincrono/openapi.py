@@ -0,0 +1,51 @@
+"""Documento OpenAPI gerado em tempo de build.
+
+O FastAPI monta o schema na primeira requisição a /openapi.json ou
+/docs, o que custa caro numa instância recém-criada. O arquivo gerado
+aqui é carregado no startup do app; `tests/test_app.py` garante que ele
+está em dia com as rotas.
+
+Uso:
+    python -m fastapi_sincrono.openapi
+"""
+
+import json
+from importlib import import_module
+from pathlib import Path
+
+from fastapi import FastAPI
+
+OPENAPI_FILE = Path(__file__).with_name('openapi.json')
+
+
+def build_openapi(app: FastAPI) -> dict:
+    # ignora um schema já carregado de arquivo
+    app.openapi_schema = None
+    return FastAPI.openapi(app)
+
+
+def dump_openapi(schema: dict) -> str:
+    return json.dumps(schema, indent=2, ensure_ascii=False) + '\n'
+
+
+def load_openapi(app: FastAPI, path: Path = OPENAPI_FILE) -> bool:
+    if not path.exists():
+        return False
+
+    schema = json.loads(path.read_text(encoding='utf-8'))
+    app.openapi_schema = schema
+    # forma documentada de trocar o gerador; o FastAPI regeraria o schema
+    # ao comparar a versão interna das rotas
+    app.openapi = lambda: schema
+    return True
+
+
+def main():
+    # importado aqui: o app importa este módulo
+    app = import_module('fastapi_sincrono.app').app
+    OPENAPI_FILE.write_text(dump_openapi(build_openapi(app)), encoding='utf-8')
+    print(f'OpenAPI written to {OPENAPI_FILE}')
+
+
+if __name__ == '__main__':
+    main()
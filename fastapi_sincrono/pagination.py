@@ -0,0 +1,74 @@
+import base64
+import binascii
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fastapi_sincrono.schemas import FilterPage
+
+
+def encode_cursor(**position: int) -> str:
+    payload = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, key: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded))[key]
+        if not isinstance(value, int):
+            raise TypeError
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        ValueError,
+        KeyError,
+        TypeError,
+    ) as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        ) from e
+
+    return value
+
+
+def paginate(query, key_column, page: FilterPage, ranked: bool = False):
+    """Aplica ordenação estável, cursor e limite à query.
+
+    Busca `limit + 1` linhas para saber se existe próxima página sem
+    precisar de um COUNT. Em resultados ranqueados (busca textual) a ordem
+    não é pela chave, então o cursor guarda o deslocamento.
+
+    O `skip` só vale na primeira página: o cursor já parte dele, e
+    repeti-lo pularia as linhas duas vezes.
+    """
+    if page.cursor and page.skip:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='skip cannot be combined with cursor',
+        )
+
+    query = query.order_by(key_column)
+
+    if ranked:
+        offset = decode_cursor(page.cursor, 'offset') if page.cursor else 0
+        return query.offset(page.skip + offset).limit(page.limit + 1)
+
+    if page.cursor:
+        query = query.where(key_column > decode_cursor(page.cursor, 'id'))
+
+    return query.offset(page.skip).limit(page.limit + 1)
+
+
+def build_page(rows, page: FilterPage, ranked: bool = False):
+    if len(rows) <= page.limit or not page.limit:
+        return rows[: page.limit], None
+
+    rows = rows[: page.limit]
+
+    if ranked:
+        offset = decode_cursor(page.cursor, 'offset') if page.cursor else 0
+        return rows, encode_cursor(offset=offset + page.skip + page.limit)
+
+    return rows, encode_cursor(id=rows[-1].id)
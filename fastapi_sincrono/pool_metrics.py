@@ -0,0 +1,163 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# limites superiores (ms) dos buckets do histograma de espera por conexão
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# média móvel da espera recente: peso de cada amostra e meia-vida (s) do
+# decaimento, que zera o sinal mesmo quando ninguém mais pede conexão
+RECENT_WAIT_WEIGHT = 0.2
+RECENT_WAIT_HALF_LIFE = 1.0
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.overflow_hits = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.waiting = 0
+        self.recent_wait = 0.0
+        self.recent_at = time.monotonic()
+
+    def _decayed_wait(self, now: float) -> float:
+        elapsed = now - self.recent_at
+        return self.recent_wait * 0.5 ** (elapsed / RECENT_WAIT_HALF_LIFE)
+
+    def recent_wait_ms(self) -> float:
+        with self._lock:
+            return self._decayed_wait(time.monotonic())
+
+    def observe_wait(self, elapsed_ms: float):
+        now = time.monotonic()
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, elapsed_ms)] += 1
+            self.recent_wait = (
+                self._decayed_wait(now) * (1 - RECENT_WAIT_WEIGHT)
+                + elapsed_ms * RECENT_WAIT_WEIGHT
+            )
+            self.recent_at = now
+
+    def add_waiting(self, delta: int):
+        with self._lock:
+            self.waiting += delta
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool):
+        with self._lock:
+            # buckets cumulativos, como num histograma Prometheus
+            buckets, total = {}, 0
+            for limit, count in zip(WAIT_BUCKETS_MS, self.wait_buckets):
+                total += count
+                buckets[f'le_{limit}'] = total
+            buckets['le_inf'] = total + self.wait_buckets[-1]
+
+            # SingletonThreadPool/StaticPool (SQLite em memória) não têm fila;
+            # o `size` do SingletonThreadPool é um atributo, não o método
+            queued = isinstance(pool, QueuePool)
+            return {
+                'pool_size': pool.size() if queued else 0,
+                'checked_out': pool.checkedout() if queued else 0,
+                'overflow': max(pool.overflow(), 0) if queued else 0,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'overflow_hits': self.overflow_hits,
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+                'waiting': self.waiting,
+                'wait_count': self.wait_count,
+                'wait_total_ms': round(self.wait_total_ms, 3),
+                'recent_wait_ms': round(
+                    self._decayed_wait(time.monotonic()), 3
+                ),
+                'wait_histogram_ms': buckets,
+            }
+
+
+class InstrumentedPoolMixin:
+    """Mede a espera por uma conexão em `connect()`.
+
+    O SQLAlchemy só emite o evento `checkout` depois que a conexão foi
+    obtida, então o tempo de fila é medido em volta de `Pool.connect()`, a
+    API pública que o engine chama a cada checkout. Inclui abrir uma
+    conexão nova e o pre-ping, quando ligado.
+    """
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        self.metrics.add_waiting(1)
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metrics.incr('timeouts')
+            raise
+        finally:
+            self.metrics.add_waiting(-1)
+            self.metrics.observe_wait((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # `engine.dispose()` recria o pool; as métricas continuam as mesmas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine):
+    """Registra os listeners de pool e devolve o `PoolMetrics` do engine."""
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        metrics.incr('connects')
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.incr('checkouts')
+        pool = engine.pool
+        # conta as entradas no overflow, não cada checkout dentro dele: a
+        # conexão que acabou de sair é a primeira além de `pool_size`
+        if isinstance(pool, QueuePool) and (
+            pool.checkedout() == pool.size() + 1
+        ):
+            metrics.incr('overflow_hits')
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.incr('checkins')
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr('invalidations')
+
+    @event.listens_for(engine, 'soft_invalidate')
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr('invalidations')
+
+    return metrics
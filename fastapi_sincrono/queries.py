@@ -0,0 +1,228 @@
+from sqlalchemy import (
+    and_,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    update,
+)
+from sqlalchemy.dialects.postgresql import plainto_tsquery, to_tsvector
+from sqlalchemy.exc import IntegrityError
+
+from fastapi_sincrono.models import (
+    Todo,
+    TodoDailyCount,
+    TodoStateCount,
+    TodoTombstone,
+    User,
+)
+from fastapi_sincrono.schemas import FilterTodo
+
+# queries compartilhadas pelos routers síncronos e assíncronos
+
+todos_fts = table(
+    'todos_fts', column('rowid'), column('rank'), column('todos_fts')
+)
+
+# precisa ser idêntica à expressão do índice `ix_todos_search`
+todo_search_vector = to_tsvector(
+    literal_column("'simple'"),
+    func
+    .coalesce(Todo.title, literal_column("''"))
+    .op('||')(literal_column("' '"))
+    .op('||')(func.coalesce(Todo.description, literal_column("''"))),
+)
+
+
+def fts5_query(term: str) -> str:
+    # cada palavra vira um prefixo entre aspas: sem sintaxe FTS5 do usuário
+    words = [word.replace('"', '""') for word in term.split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_todos(query, term: str, dialect: str):
+    """Filtra e ordena por relevância usando o índice textual do banco."""
+    if dialect == 'sqlite':
+        return (
+            query
+            .join(todos_fts, todos_fts.c.rowid == Todo.id)
+            .where(todos_fts.c.todos_fts.op('MATCH')(fts5_query(term)))
+            .order_by(todos_fts.c.rank)
+        )
+
+    if dialect == 'postgresql':
+        ts_query = plainto_tsquery(literal_column("'simple'"), term)
+        return query.where(todo_search_vector.op('@@')(ts_query)).order_by(
+            func.ts_rank(todo_search_vector, ts_query).desc()
+        )
+
+    return query.where(
+        or_(Todo.title.contains(term), Todo.description.contains(term))
+    )
+
+
+def select_user_todos(
+    user_id: int, filter_params: FilterTodo, dialect: str = 'sqlite'
+):
+    query = select(Todo).where(Todo.user_id == user_id)
+
+    if filter_params.title:
+        query = query.filter(Todo.title.contains(filter_params.title))
+    if filter_params.description:
+        query = query.filter(
+            Todo.description.contains(filter_params.description)
+        )
+    if filter_params.state:
+        query = query.filter(Todo.state == filter_params.state)
+    if filter_params.q and filter_params.q.strip():
+        query = search_todos(query, filter_params.q, dialect)
+
+    return query
+
+
+def select_user_todo(user_id: int, todo_id: int):
+    return select(Todo).where(Todo.id == todo_id, Todo.user_id == user_id)
+
+
+def select_user_todos_by_ids(user_id: int, todo_ids: list[int]):
+    return select(Todo).where(Todo.user_id == user_id, Todo.id.in_(todo_ids))
+
+
+def insert_todo_returning(user_id: int, todo: dict, version: int):
+    return (
+        insert(Todo)
+        .values(**todo, user_id=user_id, version=version)
+        .returning(Todo)
+    )
+
+
+def update_user_todo_returning(
+    user_id: int, todo_id: int, changes: dict, version: int
+):
+    # sem campos para alterar não há UPDATE: só devolve o todo
+    if not changes:
+        return select_user_todo(user_id, todo_id)
+    return (
+        update(Todo)
+        .where(Todo.id == todo_id, Todo.user_id == user_id)
+        .values(**changes, version=version)
+        .returning(Todo)
+    )
+
+
+def delete_user_todo_returning(user_id: int, todo_id: int):
+    return (
+        delete(Todo)
+        .where(Todo.id == todo_id, Todo.user_id == user_id)
+        .returning(Todo.id)
+    )
+
+
+def insert_todos_returning():
+    # INSERT multi-linha com RETURNING; `sort_by_parameter_order` faria o
+    # SQLite voltar a um INSERT por linha, então quem chama ordena por id
+    return insert(Todo).returning(Todo)
+
+
+def delete_user_todos_returning(user_id: int, todo_ids: list[int]):
+    return (
+        delete(Todo)
+        .where(Todo.user_id == user_id, Todo.id.in_(todo_ids))
+        .returning(Todo.id)
+    )
+
+
+def insert_user_returning(username: str, email: str, password: str):
+    return (
+        insert(User)
+        .values(username=username, email=email, password=password)
+        .returning(User)
+    )
+
+
+def unique_violation(error: IntegrityError, columns: tuple[str, ...]):
+    """Coluna da constraint UNIQUE violada, pelo nome ou pela mensagem.
+
+    SQLite: `UNIQUE constraint failed: users.email`; PostgreSQL expõe o
+    nome da constraint (`users_email_key`) em `diag.constraint_name`.
+    """
+    diag = getattr(error.orig, 'diag', None)
+    name = getattr(diag, 'constraint_name', None) or str(error.orig)
+    return next((column for column in columns if column in name), None)
+
+
+def bump_todos_version(user_id: int):
+    """Incrementa e devolve a versão dos todos do usuário.
+
+    Executado antes da escrita nos todos, que grava a nova versão: o
+    UPDATE trava a linha do usuário até o commit, então as versões de um
+    usuário ficam visíveis na ordem em que foram atribuídas.
+    """
+    # `updated_at` é mantido: a versão dos todos não altera o usuário
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            todos_version=User.todos_version + 1,
+            updated_at=User.updated_at,
+        )
+        .returning(User.todos_version)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def select_todos_version(user_id: int):
+    return select(User.todos_version).where(User.id == user_id)
+
+
+def select_todo_changes(
+    user_id: int, after: tuple[int, int], upto: int, limit: int
+):
+    # (versão, id) depois do cursor, até a versão lida no início
+    version, todo_id = after
+    return (
+        select(Todo)
+        .where(
+            Todo.user_id == user_id,
+            or_(
+                Todo.version > version,
+                and_(Todo.version == version, Todo.id > todo_id),
+            ),
+            Todo.version <= upto,
+        )
+        .order_by(Todo.version, Todo.id)
+        .limit(limit + 1)
+    )
+
+
+def select_todo_tombstones(user_id: int, since: int, upto: int):
+    return (
+        select(TodoTombstone.id)
+        .where(
+            TodoTombstone.user_id == user_id,
+            TodoTombstone.version.between(since, upto),
+        )
+        .order_by(TodoTombstone.version, TodoTombstone.id)
+    )
+
+
+def select_todo_state_counts(user_id: int):
+    return select(TodoStateCount.state, TodoStateCount.count).where(
+        TodoStateCount.user_id == user_id
+    )
+
+
+def select_todo_daily_counts(user_id: int, since):
+    return (
+        select(TodoDailyCount.day, TodoDailyCount.created, TodoDailyCount.done)
+        .where(
+            TodoDailyCount.user_id == user_id,
+            TodoDailyCount.day >= since,
+            or_(TodoDailyCount.created != 0, TodoDailyCount.done != 0),
+        )
+        .order_by(TodoDailyCount.day)
+    )
@@ -0,0 +1,237 @@
+import math
+import mmap
+import struct
+import time
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from itertools import count
+
+from jwt import PyJWTError, decode
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from fastapi_sincrono.settings import get_settings
+
+# métodos que não escrevem: podem ler de uma réplica
+READ_METHODS = frozenset({'GET', 'HEAD'})
+# instante (epoch) da última escrita do cliente
+LAST_WRITE_COOKIE = 'last_write'
+# posições da tabela de pinos (16 bytes cada: 1 MiB)
+PIN_SLOTS = 65536
+PIN = struct.Struct('=qd')
+# chaves de `session.info`: quem observa a sessão e se ela escreveu
+WRITE_WATCH = 'replica_write_watch'
+WROTE = 'replica_wrote'
+
+
+def token_claims(authorization: str | None) -> dict:
+    """Claims do bearer token, ou `{}` se ausente ou inválido.
+
+    A validação de verdade (401) continua com `get_current_user`.
+    """
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return {}
+
+    settings = get_settings()
+    try:
+        return decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except PyJWTError:
+        return {}
+
+
+def parse_last_write(cookie: str | None) -> float | None:
+    try:
+        return float(cookie) if cookie else None
+    except ValueError:
+        return None
+
+
+def last_write_cookie(max_age: float) -> str:
+    cookie = SimpleCookie()
+    cookie[LAST_WRITE_COOKIE] = f'{time.time():.3f}'
+    cookie[LAST_WRITE_COOKIE].update({
+        'max-age': math.ceil(max_age),
+        'path': '/',
+        'httponly': True,
+        'samesite': 'lax',
+    })
+    return cookie.output(header='').strip()
+
+
+class WritePins:
+    """Até quando cada usuário lê do primário, visível a todos os workers.
+
+    Uma tabela de tamanho fixo em memória anônima compartilhada, indexada
+    por `uid % slots`: criada antes do fork, é a mesma em todos os workers
+    (`main.py` importa o app no mestre). Dois usuários na mesma posição
+    disputam o pino; quem perde volta a depender do cookie `last_write`.
+    """
+
+    def __init__(self, slots: int = PIN_SLOTS):
+        self.slots = slots
+        self._memory = mmap.mmap(-1, slots * PIN.size)
+
+    def pin(self, user_id: int, until: float):
+        PIN.pack_into(
+            self._memory, user_id % self.slots * PIN.size, user_id, until
+        )
+
+    def is_pinned(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        pinned_id, until = PIN.unpack_from(
+            self._memory, user_id % self.slots * PIN.size
+        )
+        return pinned_id == user_id and time.time() < until
+
+
+# criada na importação, no mestre: memória alocada depois do fork não
+# seria compartilhada entre os workers
+WRITE_PINS = WritePins()
+
+
+class ReplicaRouter:
+    """Escolhe o engine de cada requisição: primário ou réplica.
+
+    Leituras (GET/HEAD) vão para as réplicas em rodízio; o resto vai para
+    o primário. Para ler as próprias escritas, o usuário que fez commit de
+    uma escrita lê do primário por `pin_seconds`, assim como um token
+    recém-emitido (logo após o cadastro, a réplica pode ainda não ter o
+    usuário).
+
+    O pino é do `uid` do token, em `WritePins`, e vale em qualquer worker
+    sem depender de cookies. A resposta da escrita também leva o cookie
+    `last_write` (`ReadYourWritesMiddleware`), que cobre o cliente sem
+    token e o que cair em outra máquina.
+    """
+
+    def __init__(
+        self, primary, replicas=(), pin_seconds: float = 5, pins=None
+    ):
+        self.primary = primary
+        self.replicas = tuple(replicas)
+        self.pin_seconds = pin_seconds
+        self.pins = WRITE_PINS if pins is None else pins
+        self._next = count()
+
+    def is_recent(self, timestamp: float | None) -> bool:
+        return timestamp is not None and time.time() - timestamp < (
+            self.pin_seconds
+        )
+
+    def engine_for(
+        self,
+        method: str,
+        authorization: str | None = None,
+        last_write: str | None = None,
+    ):
+        if not self.replicas or method not in READ_METHODS:
+            return self.primary
+
+        claims = token_claims(authorization)
+        if (
+            self.pins.is_pinned(claims.get('uid'))
+            or self.is_recent(parse_last_write(last_write))
+            or self.is_recent(claims.get('iat'))
+        ):
+            return self.primary
+        return self.replicas[next(self._next) % len(self.replicas)]
+
+    def engine_for_request(self, request):
+        return self.engine_for(
+            request.method,
+            request.headers.get('authorization'),
+            request.cookies.get(LAST_WRITE_COOKIE),
+        )
+
+    def watch_writes(self, session: Session, request):
+        """Prende o usuário ao primário quando a sessão gravar algo."""
+        if self.replicas and request.method not in READ_METHODS:
+            session.info[WRITE_WATCH] = (self, request)
+
+    def record_write(self, request):
+        user_id = token_claims(request.headers.get('authorization')).get('uid')
+        if user_id is not None:
+            self.pins.pin(user_id, time.time() + self.pin_seconds)
+        # o cookie sai com a resposta (ReadYourWritesMiddleware)
+        request.state.last_write_max_age = self.pin_seconds
+
+
+def record_session_write(session: Session):
+    """Registra a escrita da requisição dona da sessão, se observada.
+
+    Chamada no commit da própria sessão e pelo group commit, cuja escrita
+    é feita em outra sessão.
+    """
+    watch = session.info.get(WRITE_WATCH)
+    if watch is not None:
+        router, request = watch
+        router.record_write(request)
+
+
+# só commits com INSERT/UPDATE/DELETE contam: POST /auth/token, por
+# exemplo, abre sessão no primário mas não escreve
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_statement(orm_execute_state):
+    if WRITE_WATCH in orm_execute_state.session.info and (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info[WROTE] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    if WRITE_WATCH in session.info:
+        session.info[WROTE] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _record_commit(session):
+    if session.info.pop(WROTE, False):
+        record_session_write(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rollback(session):
+    session.info.pop(WROTE, None)
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI que devolve o cookie `last_write` após uma escrita.
+
+    Só age nas requisições que fizeram commit de uma escrita com réplicas
+    configuradas (`ReplicaRouter.record_write`) e terminaram sem erro.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # o mesmo dicionário de `request.state` na rota
+        state = scope.setdefault('state', {})
+
+        async def send_with_cookie(message):
+            max_age = state.get('last_write_max_age')
+            if (
+                message['type'] == 'http.response.start'
+                and max_age is not None
+                and message['status'] < HTTPStatus.BAD_REQUEST
+            ):
+                MutableHeaders(scope=message).append(
+                    'set-cookie', last_write_cookie(max_age)
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,406 @@
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from fastapi_sincrono.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# limites superiores (s) dos buckets de latência por rota
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# limites superiores dos buckets de queries por requisição
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SQL_LOG_LENGTH = 300
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """Orçamento de queries de uma rota (None = sem limite).
+
+    Usado como dependência para sobrescrever o padrão das settings:
+    `dependencies=[Depends(QueryBudget(max_queries=None))]`.
+    """
+
+    max_queries: int | None = None
+    max_repeats: int | None = None
+
+    async def __call__(self):
+        stats = current_request.get()
+        if stats is not None:
+            stats.budget = self
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    scope: dict = field(default_factory=dict, repr=False)
+    statements: Counter = field(default_factory=Counter, repr=False)
+    budget: QueryBudget | None = None
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get('route'), 'path', 'unmatched')
+
+    def server_timing(self, elapsed: float) -> str:
+        db_ms, app_ms = self.db_seconds * 1000, elapsed * 1000
+        return (
+            f'db;dur={db_ms:.2f};desc="{self.queries} queries", '
+            f'app;dur={app_ms:.2f}'
+        )
+
+
+# estatísticas da requisição em andamento; chega às threads do threadpool
+# porque o anyio copia o contexto
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    'current_request', default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for limit, count in zip(self.buckets, self.counts):
+            total += count
+            yield str(limit), total
+        yield '+Inf', total + self.counts[-1]
+
+
+def escape(value) -> str:
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(**labels) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{key}="{escape(value)}"' for key, value in labels.items()
+    )
+    return f'{{{pairs}}}'
+
+
+def render_metric(name: str, kind: str, help_text: str, samples):
+    """Formata uma métrica no formato texto do Prometheus.
+
+    `samples` é uma sequência de (sufixo, labels, valor).
+    """
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    lines.extend(
+        f'{name}{suffix}{format_labels(**labels)} {value}'
+        for suffix, labels, value in samples
+    )
+    return lines
+
+
+def histogram_samples(histograms: dict, label_names: tuple):
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key))
+        for limit, count in histogram.cumulative():
+            yield '_bucket', {**labels, 'le': limit}, count
+        yield '_sum', labels, round(histogram.sum, 6)
+        yield '_count', labels, histogram.count
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.in_flight = 0
+        self.requests = defaultdict(int)
+        self.latency = {}
+        self.db_queries = {}
+        self.db_seconds = defaultdict(float)
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, key: tuple[str, str], status: int, elapsed: float, stats):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(*key, str(status))] += 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(
+                elapsed
+            )
+            self.db_queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(
+                stats.queries
+            )
+            self.db_seconds[key] += stats.db_seconds
+
+    def render(self) -> list[str]:
+        with self._lock:
+            route = ('method', 'route')
+            return [
+                *render_metric(
+                    'http_requests_in_flight',
+                    'gauge',
+                    'Requests being served.',
+                    [('', {}, self.in_flight)],
+                ),
+                *render_metric(
+                    'http_requests_total',
+                    'counter',
+                    'Requests by route and status.',
+                    [
+                        ('', dict(zip((*route, 'status'), key)), count)
+                        for key, count in sorted(self.requests.items())
+                    ],
+                ),
+                *render_metric(
+                    'http_request_duration_seconds',
+                    'histogram',
+                    'Request latency by route.',
+                    histogram_samples(self.latency, route),
+                ),
+                *render_metric(
+                    'http_request_db_queries',
+                    'histogram',
+                    'Database queries per request by route.',
+                    histogram_samples(self.db_queries, route),
+                ),
+                *render_metric(
+                    'http_request_db_seconds_total',
+                    'counter',
+                    'Time spent in database queries by route.',
+                    [
+                        ('', dict(zip(route, key)), round(seconds, 6))
+                        for key, seconds in sorted(self.db_seconds.items())
+                    ],
+                ),
+            ]
+
+
+request_metrics = RequestMetrics()
+
+
+def short_sql(statement: str) -> str:
+    sql = ' '.join(statement.split())
+    if len(sql) > SQL_LOG_LENGTH:
+        return sql[:SQL_LOG_LENGTH] + '...'
+    return sql
+
+
+def params_shape(parameters) -> str:
+    # só a forma dos parâmetros: os valores podem ter dados pessoais
+    if isinstance(parameters, (list, tuple)) and parameters:
+        first = parameters[0]
+        if isinstance(first, (list, tuple, dict)):
+            return f'{len(parameters)} x {params_shape(first)}'
+    if isinstance(parameters, dict):
+        return f'dict[{", ".join(parameters)}]'
+    if isinstance(parameters, (list, tuple)):
+        return f'{type(parameters).__name__}[{len(parameters)}]'
+    return type(parameters).__name__
+
+
+@dataclass
+class QueryPolicy:
+    slow_query_ms: float | None = None
+    budget: QueryBudget = field(default_factory=QueryBudget)
+    strict: bool = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings):
+        return cls(
+            slow_query_ms=settings.SLOW_QUERY_MS,
+            budget=QueryBudget(
+                settings.QUERY_BUDGET, settings.QUERY_REPEAT_LIMIT
+            ),
+            strict=settings.QUERY_BUDGET_STRICT,
+        )
+
+    def observe(self, statement, parameters, elapsed: float, stats):
+        if self.slow_query_ms is None or elapsed * 1000 < self.slow_query_ms:
+            return
+        logger.warning(
+            'slow query %.1fms route=%s params=%s sql=%s',
+            elapsed * 1000,
+            stats.route if stats is not None else '-',
+            params_shape(parameters),
+            short_sql(statement),
+        )
+
+    def check(self, stats: RequestStats):
+        budget = stats.budget or self.budget
+        problems = []
+        if budget.max_queries is not None and (
+            stats.queries > budget.max_queries
+        ):
+            problems.append(
+                f'{stats.queries} queries (budget {budget.max_queries})'
+            )
+        if budget.max_repeats is not None:
+            problems.extend(
+                f'same statement {count} times '
+                f'(limit {budget.max_repeats}, possible N+1): '
+                f'{short_sql(statement)}'
+                for statement, count in stats.statements.most_common()
+                if count > budget.max_repeats
+            )
+        if not problems:
+            return
+
+        message = f'{stats.scope["method"]} {stats.route}: ' + '; '.join(
+            problems
+        )
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning('query budget exceeded %s', message)
+
+
+@lru_cache
+def get_query_policy() -> QueryPolicy:
+    return QueryPolicy.from_settings(get_settings())
+
+
+def render_pool_metrics(snapshots: dict) -> list[str]:
+    counters = ('checkouts', 'checkins', 'connects', 'timeouts')
+    lines = []
+    for name in ('pool_size', 'checked_out', 'overflow', 'waiting'):
+        lines += render_metric(
+            f'db_pool_{name}',
+            'gauge',
+            f'Connection pool {name.replace("_", " ")}.',
+            [
+                ('', {'pool': pool}, snap[name])
+                for pool, snap in snapshots.items()
+            ],
+        )
+    for name in counters:
+        lines += render_metric(
+            f'db_pool_{name}_total',
+            'counter',
+            f'Connection pool {name}.',
+            [
+                ('', {'pool': pool}, snap[name])
+                for pool, snap in snapshots.items()
+            ],
+        )
+
+    samples = []
+    for pool, snap in snapshots.items():
+        for bucket, count in snap['wait_histogram_ms'].items():
+            limit = bucket.removeprefix('le_').replace('inf', '+Inf')
+            samples.append(('_bucket', {'pool': pool, 'le': limit}, count))
+        samples.append(('_sum', {'pool': pool}, snap['wait_total_ms']))
+        samples.append(('_count', {'pool': pool}, snap['wait_count']))
+    lines += render_metric(
+        'db_pool_recent_wait_milliseconds',
+        'gauge',
+        'Decaying average of recent connection waits.',
+        [
+            ('', {'pool': pool}, snap['recent_wait_ms'])
+            for pool, snap in snapshots.items()
+        ],
+    )
+    lines += render_metric(
+        'db_pool_wait_milliseconds',
+        'histogram',
+        'Time waiting for a pooled connection.',
+        samples,
+    )
+    return lines
+
+
+def instrument_queries(target=Engine):
+    """Conta queries e tempo de banco da requisição corrente.
+
+    Registrado na classe `Engine`, vale para todos os engines, inclusive
+    o `sync_engine` do engine assíncrono.
+    """
+
+    @event.listens_for(target, 'before_cursor_execute')
+    def before_cursor_execute(conn, *args):
+        conn.info['query_start'] = time.perf_counter()
+
+    @event.listens_for(target, 'after_cursor_execute')
+    def after_cursor_execute(conn, *args):
+        _, statement, parameters, _, _ = args
+        elapsed = time.perf_counter() - conn.info['query_start']
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            stats.statements[statement] += 1
+        get_query_policy().observe(statement, parameters, elapsed, stats)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI de latência, status e tempo de banco por rota.
+
+    A rota é o template (`/todo/{todo_id}`), lido do escopo depois que o
+    roteador do FastAPI encontrou o endpoint. Ao fim de cada requisição
+    bem-sucedida, confere o orçamento de queries (`QueryPolicy`).
+    """
+
+    def __init__(
+        self,
+        app,
+        metrics: RequestMetrics = request_metrics,
+        policy: QueryPolicy | None = None,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.policy = policy
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                MutableHeaders(scope=message).append(
+                    'Server-Timing',
+                    stats.server_timing(time.perf_counter() - start),
+                )
+            await send(message)
+
+        self.metrics.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.metrics.finish(
+                (scope['method'], stats.route),
+                status,
+                time.perf_counter() - start,
+                stats,
+            )
+            current_request.reset(token)
+
+        (self.policy or get_query_policy()).check(stats)
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_sincrono.database import get_async_session
+from fastapi_sincrono.models import User
+from fastapi_sincrono.schemas import Token
+from fastapi_sincrono.security import (
+    create_access_token,
+    get_current_user_async,
+    verify_password_async,
+)
+
+router = APIRouter(prefix='/auth', tags=['auth'])
+
+AuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
+SessionUser = Annotated[AsyncSession, Depends(get_async_session)]
+CurrentUser = Annotated[User, Depends(get_current_user_async)]
+
+
+@router.post('/token', response_model=Token)
+async def login_for_acess_token(
+    form_data: AuthForm,
+    session: SessionUser,
+):
+    user = await session.scalar(
+        select(User).where(User.username == form_data.username)
+    )
+
+    if not user or not await verify_password_async(
+        form_data.password, user.password
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Incorrect Username or password',
+        )
+
+    acess_token = create_access_token(
+        data={'sub': user.username, 'uid': user.id}
+    )
+
+    return {'access_token': acess_token, 'token_type': 'bearer'}
+
+
+@router.post('/refresh-token', response_model=Token)
+async def refresh_token(
+    current_user: CurrentUser,
+):
+    new_token = create_access_token(
+        data={'sub': current_user.username, 'uid': current_user.id}
+    )
+    return {'access_token': new_token, 'token_type': 'bearer'}
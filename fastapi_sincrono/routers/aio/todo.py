@@ -0,0 +1,473 @@
+from datetime import date
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from fastapi_sincrono.bulk_import import (
+    ImportSummary,
+    iter_todo_chunks,
+    read_records,
+)
+from fastapi_sincrono.conditional import check_not_modified, todos_etag
+from fastapi_sincrono.database import get_async_session
+from fastapi_sincrono.export import (
+    MEDIA_TYPES,
+    select_todo_export,
+    stream_rows_async,
+)
+from fastapi_sincrono.models import Todo, User
+from fastapi_sincrono.pagination import build_page, paginate
+from fastapi_sincrono.queries import (
+    delete_user_todo_returning,
+    delete_user_todos_returning,
+    insert_todos_returning,
+    select_todo_changes,
+    select_todo_daily_counts,
+    select_todo_state_counts,
+    select_todo_tombstones,
+    select_todos_version,
+    select_user_todos,
+    select_user_todos_by_ids,
+)
+from fastapi_sincrono.request_metrics import QueryBudget
+from fastapi_sincrono.schemas import (
+    BatchStatus,
+    ChangesParams,
+    FileFormat,
+    FilterPage,
+    FilterTodo,
+    ImportParams,
+    Message,
+    StatsParams,
+    TodoBatchCreate,
+    TodoBatchDelete,
+    TodoBatchPatch,
+    TodoBatchResponse,
+    TodoChanges,
+    TodoImportSummary,
+    TodoList,
+    TodoPublic,
+    TodoSchema,
+    TodoStats,
+    TodoUpdate,
+)
+from fastapi_sincrono.security import (
+    get_current_user_async,
+    get_streaming_user_async,
+    next_todos_version_async,
+)
+from fastapi_sincrono.serialization import (
+    TODO_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+from fastapi_sincrono.todo_changes import (
+    changes_page,
+    read_changes_cursor,
+    tombstones_since,
+)
+from fastapi_sincrono.todo_events import (
+    RESYNC,
+    EventStreamResponse,
+    get_todo_events,
+)
+from fastapi_sincrono.todo_stats import build_todo_stats, stats_since
+from fastapi_sincrono.write_coalescing import (
+    WriteCoalescer,
+    create_todo_row,
+    get_write_coalescer,
+    run_todo_write_async,
+    update_todo_row,
+)
+
+router = APIRouter(prefix='/todo', tags=['todo'])
+SessionUser = Annotated[AsyncSession, Depends(get_async_session)]
+CurrentUser = Annotated[User, Depends(get_current_user_async)]
+StreamingUser = Annotated[User, Depends(get_streaming_user_async)]
+Coalescer = Annotated[WriteCoalescer | None, Depends(get_write_coalescer)]
+TodoFilterParams = Annotated[FilterTodo, Depends()]
+FilterPageParams = Annotated[FilterPage, Depends()]
+ImportParamsQuery = Annotated[ImportParams, Query()]
+StatsParamsQuery = Annotated[StatsParams, Query()]
+ChangesParamsQuery = Annotated[ChangesParams, Query()]
+
+
+async def todos_not_modified(
+    request: Request,
+    response: Response,
+    session: SessionUser,
+    current_user: CurrentUser,
+):
+    # só a versão é lida: com o ETag igual os todos nem são carregados
+    version = await session.scalar(select_todos_version(current_user.id))
+    check_not_modified(
+        request, response, todos_etag(request, current_user.id, version)
+    )
+
+
+async def stats_not_modified(
+    request: Request,
+    response: Response,
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: StatsParamsQuery,
+) -> date:
+    # a janela de dias anda à meia-noite UTC, mesmo sem escritas: o início
+    # entra no ETag e a rota usa o mesmo valor
+    since = stats_since(params.days)
+    version = await session.scalar(select_todos_version(current_user.id))
+    check_not_modified(
+        request, response, todos_etag(request, current_user.id, version, since)
+    )
+    return since
+
+
+@router.post('/', response_model=TodoPublic)
+async def create_todo(
+    todo: TodoSchema,
+    session: SessionUser,
+    current_user: CurrentUser,
+    coalescer: Coalescer,
+):
+    # a mesma escrita das rotas síncronas, na sessão ou no group commit
+    result, version = await run_todo_write_async(
+        session, coalescer, create_todo_row, current_user.id, todo.model_dump()
+    )
+    get_todo_events().publish_todo(current_user.id, 'created', result, version)
+
+    return result
+
+
+@router.get(
+    '/',
+    response_model=TodoList,
+    dependencies=[Depends(todos_not_modified)],
+)
+async def list_todos(
+    session: SessionUser,
+    current_user: CurrentUser,
+    filter_params: TodoFilterParams,
+    pagination: FilterPageParams,
+    response: Response,
+):
+    query = select_user_todos(
+        current_user.id, filter_params, session.bind.dialect.name
+    )
+    ranked = bool(filter_params.q and filter_params.q.strip())
+
+    todo_db = await session.scalars(
+        paginate(query, Todo.id, pagination, ranked)
+    )
+    todos, next_cursor = build_page(todo_db.all(), pagination, ranked)
+
+    # linhas do banco: dispensa a revalidação pelo TodoList
+    return FastJSONResponse(
+        {'todos': dump_rows(todos, TODO_FIELDS), 'next_cursor': next_cursor},
+        headers=response.headers,
+    )
+
+
+# contadores mantidos por trigger: não agrega a tabela de todos
+@router.get('/stats', response_model=TodoStats)
+async def get_todo_stats(
+    session: SessionUser,
+    current_user: CurrentUser,
+    since: Annotated[date, Depends(stats_not_modified)],
+):
+    states = await session.execute(select_todo_state_counts(current_user.id))
+    days = await session.execute(
+        select_todo_daily_counts(current_user.id, since)
+    )
+    return build_todo_stats(dict(states.all()), days.all())
+
+
+# delta para clientes offline: só o que mudou depois do cursor
+@router.get('/changes', response_model=TodoChanges)
+async def list_todo_changes(
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: ChangesParamsQuery,
+):
+    after = read_changes_cursor(params.since)
+    # versões até `upto` já foram commitadas (ver bump_todos_version)
+    upto = await session.scalar(select_todos_version(current_user.id))
+    rows = (
+        await session.scalars(
+            select_todo_changes(current_user.id, after, upto, params.limit)
+        )
+    ).all()
+    todos, last_version, next_cursor, has_more = changes_page(
+        rows, params.limit, upto
+    )
+    # na primeira sincronização o cliente não tem o que remover
+    deleted = (
+        (
+            await session.scalars(
+                select_todo_tombstones(
+                    current_user.id, tombstones_since(after), last_version
+                )
+            )
+        ).all()
+        if params.since
+        else []
+    )
+
+    return FastJSONResponse({
+        'todos': dump_rows(todos, TODO_FIELDS),
+        'deleted': deleted,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    })
+
+
+# SSE: eventos das escritas do usuário, sem sessão aberta durante o stream
+@router.get('/stream', response_class=StreamingResponse)
+async def stream_todos(current_user: StreamingUser):
+    subscription = get_todo_events().subscribe(current_user.id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Too many open streams',
+        )
+
+    return EventStreamResponse(get_todo_events(), subscription)
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_todos(
+    session: SessionUser,
+    current_user: CurrentUser,
+    export_format: Annotated[FileFormat, Query(alias='format')] = (
+        FileFormat.ndjson
+    ),
+):
+    rows = await session.stream(select_todo_export(current_user.id))
+
+    return StreamingResponse(
+        stream_rows_async(rows, export_format.value),
+        media_type=MEDIA_TYPES[export_format.value],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format.value}"'
+            )
+        },
+    )
+
+
+# uma query por bloco do arquivo: o número de queries é ilimitado
+@router.post(
+    '/import',
+    response_model=TodoImportSummary,
+    dependencies=[Depends(QueryBudget())],
+)
+async def import_todos(
+    file: UploadFile,
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: ImportParamsQuery,
+):
+    summary = ImportSummary()
+    chunks = iter_todo_chunks(
+        read_records(file.file, params.format.value),
+        current_user.id,
+        params.chunk_size,
+        summary,
+    )
+
+    # a leitura do arquivo é bloqueante: fica fora do event loop
+    number = 0
+    # uma versão por transação: os blocos de um commit a compartilham
+    version = await next_todos_version_async(session, current_user.id)
+    async for chunk in iterate_in_threadpool(chunks):
+        number += 1
+        for row in chunk:
+            row['version'] = version
+        await session.execute(insert(Todo), chunk)
+        summary.imported += len(chunk)
+        if number % params.commit_every == 0:
+            await session.commit()
+            version = await next_todos_version_async(session, current_user.id)
+
+    await session.commit()
+    # muitos eventos de uma vez: o cliente busca o delta em /todo/changes
+    get_todo_events().publish(current_user.id, RESYNC)
+
+    return summary
+
+
+@router.post('/batch', response_model=TodoBatchResponse)
+async def create_todos_batch(
+    batch: TodoBatchCreate, session: SessionUser, current_user: CurrentUser
+):
+    version = await next_todos_version_async(session, current_user.id)
+    todos_db = (
+        await session.scalars(
+            insert_todos_returning(),
+            [
+                {
+                    **todo.model_dump(),
+                    'user_id': current_user.id,
+                    'version': version,
+                }
+                for todo in batch.todos
+            ],
+        )
+    ).all()
+
+    # serializa antes do commit, que expira as instâncias
+    results = [
+        {
+            'id': todo.id,
+            'status': BatchStatus.created,
+            'todo': TodoPublic.model_validate(todo),
+        }
+        for todo in sorted(todos_db, key=lambda todo: todo.id)
+    ]
+    await session.commit()
+    for result in results:
+        get_todo_events().publish_todo(
+            current_user.id, 'created', result['todo'], version
+        )
+
+    return {'results': results}
+
+
+@router.patch('/batch', response_model=TodoBatchResponse)
+async def update_todos_batch(
+    batch: TodoBatchPatch, session: SessionUser, current_user: CurrentUser
+):
+    query = select_user_todos_by_ids(
+        current_user.id, [item.id for item in batch.todos]
+    )
+    todos_db = {todo.id: todo for todo in await session.scalars(query)}
+
+    version = (
+        await next_todos_version_async(session, current_user.id)
+        if todos_db
+        else None
+    )
+    for item in batch.todos:
+        if item.id not in todos_db:
+            continue
+        changes = item.model_dump(exclude_unset=True, exclude={'id'})
+        for key, value in {**changes, 'version': version}.items():
+            setattr(todos_db[item.id], key, value)
+
+    if todos_db:
+        # um UPDATE em lote e um SELECT para recarregar o updated_at
+        await session.flush()
+        (
+            await session.scalars(
+                query.execution_options(populate_existing=True)
+            )
+        ).all()
+
+    results = [
+        {
+            'id': item.id,
+            'status': BatchStatus.updated,
+            'todo': TodoPublic.model_validate(todos_db[item.id]),
+        }
+        if item.id in todos_db
+        else {'id': item.id, 'status': BatchStatus.not_found}
+        for item in batch.todos
+    ]
+    await session.commit()
+    for result in results:
+        if 'todo' in result:
+            get_todo_events().publish_todo(
+                current_user.id, 'updated', result['todo'], version
+            )
+
+    return {'results': results}
+
+
+@router.delete('/batch', response_model=TodoBatchResponse)
+async def delete_todos_batch(
+    batch: TodoBatchDelete, session: SessionUser, current_user: CurrentUser
+):
+    # a versão vem antes: o trigger grava nos tombstones
+    version = await next_todos_version_async(session, current_user.id)
+    deleted_ids = set(
+        await session.scalars(
+            delete_user_todos_returning(current_user.id, batch.ids)
+        )
+    )
+    # sem remoções, a versão (e o ETag da lista) não muda
+    if deleted_ids:
+        await session.commit()
+    else:
+        await session.rollback()
+    for todo_id in sorted(deleted_ids):
+        get_todo_events().publish_deleted(current_user.id, todo_id, version)
+
+    return {
+        'results': [
+            {
+                'id': todo_id,
+                'status': BatchStatus.deleted
+                if todo_id in deleted_ids
+                else BatchStatus.not_found,
+            }
+            for todo_id in batch.ids
+        ]
+    }
+
+
+@router.delete('/{todo_id}', response_model=Message)
+async def delete_todo(
+    session: SessionUser,
+    current_user: CurrentUser,
+    todo_id: int,
+):
+    # a versão vem antes: o trigger grava no tombstone
+    version = await next_todos_version_async(session, current_user.id)
+    deleted_id = await session.scalar(
+        delete_user_todo_returning(current_user.id, todo_id)
+    )
+    if deleted_id is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Todo not found'
+        )
+
+    await session.commit()
+    get_todo_events().publish_deleted(current_user.id, deleted_id, version)
+    return {'message': 'Todo deleted successfully'}
+
+
+@router.patch('/{todo_id}', response_model=TodoPublic)
+async def update_todo(
+    todo_id: int,
+    session: SessionUser,
+    current_user: CurrentUser,
+    todo_update: TodoUpdate,
+    coalescer: Coalescer,
+):
+    result, version = await run_todo_write_async(
+        session,
+        coalescer,
+        update_todo_row,
+        current_user.id,
+        todo_id,
+        todo_update.model_dump(exclude_unset=True),
+    )
+    # sem alterações, nada a avisar
+    if version is not None:
+        get_todo_events().publish_todo(
+            current_user.id, 'updated', result, version
+        )
+
+    return result
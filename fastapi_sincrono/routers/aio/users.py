@@ -0,0 +1,136 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_sincrono.conditional import check_not_modified, user_etag
+from fastapi_sincrono.database import get_async_session
+from fastapi_sincrono.models import User
+from fastapi_sincrono.pagination import build_page, paginate
+from fastapi_sincrono.queries import insert_user_returning, unique_violation
+from fastapi_sincrono.schemas import (
+    FilterPage,
+    Message,
+    UserList,
+    UserPublic,
+    UserSchema,
+)
+from fastapi_sincrono.security import (
+    get_current_user_async,
+    get_identity_cache,
+    get_password_hash_async,
+)
+from fastapi_sincrono.serialization import (
+    USER_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+
+router = APIRouter(prefix='/users', tags=['users'])
+
+SessionUser = Annotated[AsyncSession, Depends(get_async_session)]
+CurrentUser = Annotated[User, Depends(get_current_user_async)]
+FilterPageParams = Annotated[FilterPage, Query()]
+
+
+@router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
+async def create_user(user: UserSchema, session: SessionUser):
+    password = await get_password_hash_async(user.password)
+    # unicidade garantida pelas constraints do banco: um único INSERT
+    try:
+        db_user = await session.scalar(
+            insert_user_returning(user.username, user.email, password)
+        )
+    except IntegrityError as e:
+        column = unique_violation(e, ('email', 'username'))
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Email Already Exists'
+            if column == 'email'
+            else 'Username Already Exists',
+        ) from e
+
+    result = UserPublic.model_validate(db_user)
+    await session.commit()
+    return result
+
+
+@router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
+async def get_users(session: SessionUser, fiter_page: FilterPageParams):
+    user_list = await session.scalars(
+        paginate(select(User), User.id, fiter_page)
+    )
+    users, next_cursor = build_page(user_list.all(), fiter_page)
+    # linhas do banco: dispensa a revalidação (EmailStr) pelo UserList
+    return FastJSONResponse({
+        'users': dump_rows(users, USER_FIELDS),
+        'next_cursor': next_cursor,
+    })
+
+
+@router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
+async def get_user(
+    user_id: int, session: SessionUser, request: Request, response: Response
+):
+    user = await session.scalar(select(User).where(User.id == user_id))
+
+    if not user:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='User Not Found'
+        )
+
+    check_not_modified(request, response, user_etag(user), user.updated_at)
+
+    return user
+
+
+@router.put('/{user_id}', response_model=UserPublic)
+async def update_users(
+    user_id: int,
+    user: UserSchema,
+    session: SessionUser,
+    current_user: CurrentUser,
+):
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Not enough permissions',
+        )
+
+    try:
+        current_user.email = user.email
+        current_user.username = user.username
+        current_user.password = await get_password_hash_async(user.password)
+        await session.commit()
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Username or Email already exists',
+        ) from e
+
+    get_identity_cache().invalidate(user_id)
+    await session.refresh(current_user)
+
+    return current_user
+
+
+@router.delete('/{user_id}', status_code=HTTPStatus.OK, response_model=Message)
+async def delete_user(
+    user_id: int,
+    session: SessionUser,
+    current_user: CurrentUser,
+):
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Not enough permissions',
+        )
+
+    await session.delete(current_user)
+    await session.commit()
+    get_identity_cache().invalidate(user_id)
+
+    return {'message': 'User deleted'}
@@ -12,8 +12,9 @@ from fastapi_sincrono.schemas import Token
 from fastapi_sincrono.security import (
     create_access_token,
     get_current_user,
-    verify_password,
+    verify_password_async,
 )
+from fastapi_sincrono.threadpool import run_in_threadpool
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
@@ -23,21 +24,25 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
 @router.post('/token', response_model=Token)
-def login_for_acess_token(
+async def login_for_acess_token(
     form_data: AuthForm,
     session: SessionUser,
 ):
-    user = session.scalar(
-        select(User).where(User.username == form_data.username)
+    user = await run_in_threadpool(
+        session.scalar, select(User).where(User.username == form_data.username)
     )
 
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await verify_password_async(
+        form_data.password, user.password
+    ):
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect Username or password',
         )
 
-    acess_token = create_access_token(data={'sub': user.username})
+    acess_token = create_access_token(
+        data={'sub': user.username, 'uid': user.id}
+    )
 
     return {'access_token': acess_token, 'token_type': 'bearer'}
 
@@ -46,5 +51,7 @@ def login_for_acess_token(
 def refresh_token(
     current_user: CurrentUser,
 ):
-    new_token = create_access_token(data={'sub': current_user.username})
+    new_token = create_access_token(
+        data={'sub': current_user.username, 'uid': current_user.id}
+    )
     return {'access_token': new_token, 'token_type': 'bearer'}
@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from fastapi_sincrono.database import get_pool_snapshots
+from fastapi_sincrono.schemas import IdentityCacheStats, PoolStatsList
+from fastapi_sincrono.security import get_identity_cache
+from fastapi_sincrono.warmup import readiness
+
+router = APIRouter(
+    prefix='/internal', tags=['internal'], include_in_schema=False
+)
+
+
+@router.get('/pool', status_code=HTTPStatus.OK, response_model=PoolStatsList)
+def get_pool_stats():
+    return {'pools': get_pool_snapshots()}
+
+
+@router.get(
+    '/identity-cache',
+    status_code=HTTPStatus.OK,
+    response_model=IdentityCacheStats,
+)
+def get_identity_cache_stats():
+    return get_identity_cache().stats()
+
+
+# async: a sonda não espera na fila do threadpool de um worker saturado
+@router.get('/ready', response_class=JSONResponse)
+async def get_readiness():
+    return JSONResponse(
+        {
+            'ready': readiness.ready,
+            'steps_ms': readiness.steps,
+            'connections': readiness.connections,
+        },
+        status_code=HTTPStatus.OK
+        if readiness.ready
+        else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
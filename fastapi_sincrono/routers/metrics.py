@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from fastapi_sincrono.admission import get_admission_control
+from fastapi_sincrono.database import get_pool_snapshots
+from fastapi_sincrono.request_metrics import (
+    render_pool_metrics,
+    request_metrics,
+)
+from fastapi_sincrono.threadpool import threadpool_metrics
+from fastapi_sincrono.todo_events import get_todo_events
+from fastapi_sincrono.write_coalescing import get_write_coalescer
+
+router = APIRouter(tags=['internal'], include_in_schema=False)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# `async def`: lê o limiter no event loop e não disputa o threadpool que
+# está medindo
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    lines = (
+        request_metrics.render()
+        + get_admission_control().render()
+        + render_pool_metrics(get_pool_snapshots())
+        + threadpool_metrics.render()
+        + get_todo_events().render()
+    )
+    if coalescer := get_write_coalescer():
+        lines += coalescer.render()
+    return PlainTextResponse(
+        '\n'.join(lines) + '\n', media_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -1,71 +1,411 @@
+from datetime import date
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from fastapi_sincrono.bulk_import import (
+    ImportSummary,
+    iter_todo_chunks,
+    read_records,
+)
+from fastapi_sincrono.conditional import check_not_modified, todos_etag
 from fastapi_sincrono.database import get_session
+from fastapi_sincrono.export import (
+    MEDIA_TYPES,
+    select_todo_export,
+    stream_rows,
+)
 from fastapi_sincrono.models import Todo, User
+from fastapi_sincrono.pagination import build_page, paginate
+from fastapi_sincrono.queries import (
+    delete_user_todo_returning,
+    delete_user_todos_returning,
+    insert_todos_returning,
+    select_todo_changes,
+    select_todo_daily_counts,
+    select_todo_state_counts,
+    select_todo_tombstones,
+    select_todos_version,
+    select_user_todos,
+    select_user_todos_by_ids,
+)
+from fastapi_sincrono.request_metrics import QueryBudget
 from fastapi_sincrono.schemas import (
+    BatchStatus,
+    ChangesParams,
+    FileFormat,
     FilterPage,
     FilterTodo,
+    ImportParams,
     Message,
+    StatsParams,
+    TodoBatchCreate,
+    TodoBatchDelete,
+    TodoBatchPatch,
+    TodoBatchResponse,
+    TodoChanges,
+    TodoImportSummary,
     TodoList,
     TodoPublic,
     TodoSchema,
+    TodoStats,
     TodoUpdate,
 )
-from fastapi_sincrono.security import get_current_user
+from fastapi_sincrono.security import (
+    get_current_user,
+    get_streaming_user,
+    next_todos_version,
+)
+from fastapi_sincrono.serialization import (
+    TODO_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+from fastapi_sincrono.todo_changes import (
+    changes_page,
+    read_changes_cursor,
+    tombstones_since,
+)
+from fastapi_sincrono.todo_events import (
+    RESYNC,
+    EventStreamResponse,
+    get_todo_events,
+)
+from fastapi_sincrono.todo_stats import build_todo_stats, stats_since
+from fastapi_sincrono.write_coalescing import (
+    WriteCoalescer,
+    create_todo_row,
+    get_write_coalescer,
+    run_todo_write,
+    update_todo_row,
+)
 
 router = APIRouter(prefix='/todo', tags=['todo'])
 SessionUser = Annotated[Session, Depends(get_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+StreamingUser = Annotated[User, Depends(get_streaming_user)]
+Coalescer = Annotated[WriteCoalescer | None, Depends(get_write_coalescer)]
 TodoFilterParams = Annotated[FilterTodo, Depends()]
 FilterPageParams = Annotated[FilterPage, Depends()]
+ImportParamsQuery = Annotated[ImportParams, Query()]
+StatsParamsQuery = Annotated[StatsParams, Query()]
+ChangesParamsQuery = Annotated[ChangesParams, Query()]
+
+
+def todos_not_modified(
+    request: Request,
+    response: Response,
+    session: SessionUser,
+    current_user: CurrentUser,
+):
+    # só a versão é lida: com o ETag igual os todos nem são carregados
+    version = session.scalar(select_todos_version(current_user.id))
+    check_not_modified(
+        request, response, todos_etag(request, current_user.id, version)
+    )
+
+
+def stats_not_modified(
+    request: Request,
+    response: Response,
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: StatsParamsQuery,
+) -> date:
+    # a janela de dias anda à meia-noite UTC, mesmo sem escritas: o início
+    # entra no ETag e a rota usa o mesmo valor
+    since = stats_since(params.days)
+    version = session.scalar(select_todos_version(current_user.id))
+    check_not_modified(
+        request, response, todos_etag(request, current_user.id, version, since)
+    )
+    return since
 
 
 @router.post('/', response_model=TodoPublic)
 def create_todo(
-    todo: TodoSchema, session: SessionUser, current_user: CurrentUser
+    todo: TodoSchema,
+    session: SessionUser,
+    current_user: CurrentUser,
+    coalescer: Coalescer,
 ):
-    todo_db = Todo(
-        title=todo.title,
-        description=todo.description,
-        state=todo.state,
-        user_id=current_user.id,
+    result, version = run_todo_write(
+        session, coalescer, create_todo_row, current_user.id, todo.model_dump()
     )
+    get_todo_events().publish_todo(current_user.id, 'created', result, version)
 
-    session.add(todo_db)
-    session.commit()
-    session.refresh(todo_db)
-
-    return todo_db
+    return result
 
 
-@router.get('/', response_model=TodoList)
+@router.get(
+    '/',
+    response_model=TodoList,
+    dependencies=[Depends(todos_not_modified)],
+)
 def list_todos(
     session: SessionUser,
     current_user: CurrentUser,
     filter_params: TodoFilterParams,
     pagination: FilterPageParams,
+    response: Response,
+):
+    query = select_user_todos(
+        current_user.id, filter_params, session.bind.dialect.name
+    )
+    ranked = bool(filter_params.q and filter_params.q.strip())
+
+    todo_db = session.scalars(
+        paginate(query, Todo.id, pagination, ranked)
+    ).all()
+    todos, next_cursor = build_page(todo_db, pagination, ranked)
+
+    # linhas do banco: dispensa a revalidação pelo TodoList
+    return FastJSONResponse(
+        {'todos': dump_rows(todos, TODO_FIELDS), 'next_cursor': next_cursor},
+        headers=response.headers,
+    )
+
+
+# contadores mantidos por trigger: não agrega a tabela de todos
+@router.get('/stats', response_model=TodoStats)
+def get_todo_stats(
+    session: SessionUser,
+    current_user: CurrentUser,
+    since: Annotated[date, Depends(stats_not_modified)],
 ):
-    query = select(Todo).where(Todo.user_id == current_user.id)
+    states = session.execute(select_todo_state_counts(current_user.id))
+    days = session.execute(select_todo_daily_counts(current_user.id, since))
+    return build_todo_stats(dict(states.all()), days.all())
 
-    if filter_params.title:
-        query = query.filter(Todo.title.contains(filter_params.title))
-    if filter_params.description:
-        query = query.filter(
-            Todo.description.contains(filter_params.description)
+
+# delta para clientes offline: só o que mudou depois do cursor
+@router.get('/changes', response_model=TodoChanges)
+def list_todo_changes(
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: ChangesParamsQuery,
+):
+    after = read_changes_cursor(params.since)
+    # versões até `upto` já foram commitadas (ver bump_todos_version)
+    upto = session.scalar(select_todos_version(current_user.id))
+    rows = session.scalars(
+        select_todo_changes(current_user.id, after, upto, params.limit)
+    ).all()
+    todos, last_version, next_cursor, has_more = changes_page(
+        rows, params.limit, upto
+    )
+    # na primeira sincronização o cliente não tem o que remover
+    deleted = (
+        session.scalars(
+            select_todo_tombstones(
+                current_user.id, tombstones_since(after), last_version
+            )
+        ).all()
+        if params.since
+        else []
+    )
+
+    return FastJSONResponse({
+        'todos': dump_rows(todos, TODO_FIELDS),
+        'deleted': deleted,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    })
+
+
+# SSE: eventos das escritas do usuário, sem sessão aberta durante o stream
+@router.get('/stream', response_class=StreamingResponse)
+async def stream_todos(current_user: StreamingUser):
+    subscription = get_todo_events().subscribe(current_user.id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Too many open streams',
         )
-    if filter_params.state:
-        query = query.filter(Todo.state == filter_params.state)
 
-    todo_db = session.scalars(
-        query.offset(pagination.skip).limit(pagination.limit)
+    return EventStreamResponse(get_todo_events(), subscription)
+
+
+@router.get('/export', response_class=StreamingResponse)
+def export_todos(
+    session: SessionUser,
+    current_user: CurrentUser,
+    export_format: Annotated[FileFormat, Query(alias='format')] = (
+        FileFormat.ndjson
+    ),
+):
+    rows = session.execute(select_todo_export(current_user.id))
+
+    return StreamingResponse(
+        stream_rows(rows, export_format.value),
+        media_type=MEDIA_TYPES[export_format.value],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format.value}"'
+            )
+        },
+    )
+
+
+# uma query por bloco do arquivo: o número de queries é ilimitado
+@router.post(
+    '/import',
+    response_model=TodoImportSummary,
+    dependencies=[Depends(QueryBudget())],
+)
+def import_todos(
+    file: UploadFile,
+    session: SessionUser,
+    current_user: CurrentUser,
+    params: ImportParamsQuery,
+):
+    summary = ImportSummary()
+    chunks = iter_todo_chunks(
+        read_records(file.file, params.format.value),
+        current_user.id,
+        params.chunk_size,
+        summary,
+    )
+
+    # uma versão por transação: os blocos de um commit a compartilham
+    version = next_todos_version(session, current_user.id)
+    for number, chunk in enumerate(chunks, start=1):
+        for row in chunk:
+            row['version'] = version
+        session.execute(insert(Todo), chunk)
+        summary.imported += len(chunk)
+        if number % params.commit_every == 0:
+            session.commit()
+            version = next_todos_version(session, current_user.id)
+
+    session.commit()
+    # muitos eventos de uma vez: o cliente busca o delta em /todo/changes
+    get_todo_events().publish(current_user.id, RESYNC)
+
+    return summary
+
+
+@router.post('/batch', response_model=TodoBatchResponse)
+def create_todos_batch(
+    batch: TodoBatchCreate, session: SessionUser, current_user: CurrentUser
+):
+    version = next_todos_version(session, current_user.id)
+    todos_db = session.scalars(
+        insert_todos_returning(),
+        [
+            {
+                **todo.model_dump(),
+                'user_id': current_user.id,
+                'version': version,
+            }
+            for todo in batch.todos
+        ],
     ).all()
 
-    return {'todos': todo_db}
+    # serializa antes do commit, que expira as instâncias
+    results = [
+        {
+            'id': todo.id,
+            'status': BatchStatus.created,
+            'todo': TodoPublic.model_validate(todo),
+        }
+        for todo in sorted(todos_db, key=lambda todo: todo.id)
+    ]
+    session.commit()
+    for result in results:
+        get_todo_events().publish_todo(
+            current_user.id, 'created', result['todo'], version
+        )
+
+    return {'results': results}
+
+
+@router.patch('/batch', response_model=TodoBatchResponse)
+def update_todos_batch(
+    batch: TodoBatchPatch, session: SessionUser, current_user: CurrentUser
+):
+    query = select_user_todos_by_ids(
+        current_user.id, [item.id for item in batch.todos]
+    )
+    todos_db = {todo.id: todo for todo in session.scalars(query)}
+
+    version = (
+        next_todos_version(session, current_user.id) if todos_db else None
+    )
+    for item in batch.todos:
+        if item.id not in todos_db:
+            continue
+        changes = item.model_dump(exclude_unset=True, exclude={'id'})
+        for key, value in {**changes, 'version': version}.items():
+            setattr(todos_db[item.id], key, value)
+
+    if todos_db:
+        # um UPDATE em lote e um SELECT para recarregar o updated_at
+        session.flush()
+        session.scalars(query.execution_options(populate_existing=True)).all()
+
+    results = [
+        {
+            'id': item.id,
+            'status': BatchStatus.updated,
+            'todo': TodoPublic.model_validate(todos_db[item.id]),
+        }
+        if item.id in todos_db
+        else {'id': item.id, 'status': BatchStatus.not_found}
+        for item in batch.todos
+    ]
+    session.commit()
+    for result in results:
+        if 'todo' in result:
+            get_todo_events().publish_todo(
+                current_user.id, 'updated', result['todo'], version
+            )
+
+    return {'results': results}
+
+
+@router.delete('/batch', response_model=TodoBatchResponse)
+def delete_todos_batch(
+    batch: TodoBatchDelete, session: SessionUser, current_user: CurrentUser
+):
+    # a versão vem antes: o trigger grava nos tombstones
+    version = next_todos_version(session, current_user.id)
+    deleted_ids = set(
+        session.scalars(
+            delete_user_todos_returning(current_user.id, batch.ids)
+        )
+    )
+    # sem remoções, a versão (e o ETag da lista) não muda
+    if deleted_ids:
+        session.commit()
+    else:
+        session.rollback()
+    for todo_id in sorted(deleted_ids):
+        get_todo_events().publish_deleted(current_user.id, todo_id, version)
+
+    return {
+        'results': [
+            {
+                'id': todo_id,
+                'status': BatchStatus.deleted
+                if todo_id in deleted_ids
+                else BatchStatus.not_found,
+            }
+            for todo_id in batch.ids
+        ]
+    }
 
 
 @router.delete('/{todo_id}', response_model=Message)
@@ -74,16 +414,18 @@ def delete_todo(
     current_user: CurrentUser,
     todo_id: int,
 ):
-    todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == current_user.id)
+    # a versão vem antes: o trigger grava no tombstone
+    version = next_todos_version(session, current_user.id)
+    deleted_id = session.scalar(
+        delete_user_todo_returning(current_user.id, todo_id)
     )
-    if not todo:
+    if deleted_id is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Todo not found'
         )
 
-    session.delete(todo)
     session.commit()
+    get_todo_events().publish_deleted(current_user.id, deleted_id, version)
     return {'message': 'Todo deleted successfully'}
 
 
@@ -93,21 +435,20 @@ def update_todo(
     session: SessionUser,
     current_user: CurrentUser,
     todo_update: TodoUpdate,
+    coalescer: Coalescer,
 ):
-    db_todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == current_user.id)
+    result, version = run_todo_write(
+        session,
+        coalescer,
+        update_todo_row,
+        current_user.id,
+        todo_id,
+        todo_update.model_dump(exclude_unset=True),
     )
-
-    if not db_todo:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Todo not found'
+    # sem alterações, nada a avisar
+    if version is not None:
+        get_todo_events().publish_todo(
+            current_user.id, 'updated', result, version
         )
 
-    for key, value in todo_update.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
-
-    session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
-
-    return db_todo
+    return result
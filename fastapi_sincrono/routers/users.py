@@ -1,13 +1,16 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from fastapi_sincrono.conditional import check_not_modified, user_etag
 from fastapi_sincrono.database import get_session
 from fastapi_sincrono.models import User
+from fastapi_sincrono.pagination import build_page, paginate
+from fastapi_sincrono.queries import insert_user_returning, unique_violation
 from fastapi_sincrono.schemas import (
     FilterPage,
     Message,
@@ -17,8 +20,15 @@ from fastapi_sincrono.schemas import (
 )
 from fastapi_sincrono.security import (
     get_current_user,
-    get_password_hash,
+    get_identity_cache,
+    get_password_hash_async,
 )
+from fastapi_sincrono.serialization import (
+    USER_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+from fastapi_sincrono.threadpool import run_in_threadpool
 
 router = APIRouter(prefix='/users', tags=['users'])
 
@@ -28,48 +38,48 @@ FilterPageParams = Annotated[FilterPage, Query()]
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: SessionUser):
-    db_user = session.scalar(
-        select(User).where(
-            or_(User.email == user.email, User.username == user.username)
-        )
-    )
+async def create_user(user: UserSchema, session: SessionUser):
+    password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(insert_user, session, user, password)
 
-    if db_user:
-        if db_user.email == user.email:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Email Already Exists',
-            )
-
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Username Already Exists',
-            )
-
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        password=get_password_hash(user.password),
-    )
 
-    session.add(db_user)
+def insert_user(session: Session, user: UserSchema, password: str):
+    # unicidade garantida pelas constraints do banco: um único INSERT
+    try:
+        db_user = session.scalar(
+            insert_user_returning(user.username, user.email, password)
+        )
+    except IntegrityError as e:
+        column = unique_violation(e, ('email', 'username'))
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Email Already Exists'
+            if column == 'email'
+            else 'Username Already Exists',
+        ) from e
+
+    result = UserPublic.model_validate(db_user)
     session.commit()
-    session.refresh(db_user)
-    return db_user
+    return result
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
 def get_users(session: SessionUser, fiter_page: FilterPageParams):
     user_list = session.scalars(
-        select(User).limit(fiter_page.limit).offset(fiter_page.skip)
+        paginate(select(User), User.id, fiter_page)
     ).all()
-    return {'users': user_list}
+    users, next_cursor = build_page(user_list, fiter_page)
+    # linhas do banco: dispensa a revalidação (EmailStr) pelo UserList
+    return FastJSONResponse({
+        'users': dump_rows(users, USER_FIELDS),
+        'next_cursor': next_cursor,
+    })
 
 
 @router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def get_user(user_id: int, session: SessionUser):
+def get_user(
+    user_id: int, session: SessionUser, request: Request, response: Response
+):
     user = session.scalar(select(User).where(User.id == user_id))
 
     if not user:
@@ -77,11 +87,13 @@ def get_user(user_id: int, session: SessionUser):
             status_code=HTTPStatus.NOT_FOUND, detail='User Not Found'
         )
 
+    check_not_modified(request, response, user_etag(user), user.updated_at)
+
     return user
 
 
 @router.put('/{user_id}', response_model=UserPublic)
-def update_users(
+async def update_users(
     user_id: int,
     user: UserSchema,
     session: SessionUser,
@@ -93,21 +105,31 @@ def update_users(
             detail='Not enough permissions',
         )
 
+    password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(
+        save_user, session, current_user, user, password
+    )
+
+
+def save_user(
+    session: Session, current_user: User, user: UserSchema, password: str
+):
     try:
         current_user.email = user.email
         current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
+        current_user.password = password
         session.commit()
-        session.refresh(current_user)
-
-        return current_user
-
     except IntegrityError as e:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Username or Email already exists',
         ) from e
 
+    get_identity_cache().invalidate(current_user.id)
+    session.refresh(current_user)
+
+    return current_user
+
 
 @router.delete('/{user_id}', status_code=HTTPStatus.OK, response_model=Message)
 def delete_user(
@@ -123,5 +145,6 @@ def delete_user(
 
     session.delete(current_user)
     session.commit()
+    get_identity_cache().invalidate(user_id)
 
     return {'message': 'User deleted'}
@@ -1,10 +1,20 @@
-from datetime import datetime
+from datetime import date, datetime
+from enum import Enum
 from typing import List
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 from fastapi_sincrono.models import TodoStatus
 
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_COMMIT_EVERY = 10
+MAX_IMPORT_CHUNK_SIZE = 10_000
+MAX_STATS_DAYS = 366
+CHANGES_PAGE_SIZE = 100
+MAX_CHANGES_PAGE_SIZE = 1000
+
 
 class Message(BaseModel):
     message: str
@@ -29,6 +39,7 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -38,13 +49,15 @@ class Token(BaseModel):
 
 class FilterPage(BaseModel):
     skip: int = Field(0, ge=0)
-    limit: int = Field(10, ge=0)
+    limit: int = Field(10, ge=0, le=MAX_PAGE_SIZE)
+    cursor: str | None = None
 
 
 class FilterTodo(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TodoStatus | None = None
+    q: str | None = None
 
 
 class TodoSchema(BaseModel):
@@ -62,9 +75,131 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: List[TodoPublic]
+    next_cursor: str | None = None
 
 
 class TodoUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TodoStatus | None = None
+
+
+class TodoBatchUpdate(TodoUpdate):
+    id: int
+
+
+class TodoBatchCreate(BaseModel):
+    todos: list[TodoSchema] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TodoBatchPatch(BaseModel):
+    todos: list[TodoBatchUpdate] = Field(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+
+class TodoBatchDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class FileFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+class BatchStatus(str, Enum):
+    created = 'created'
+    updated = 'updated'
+    deleted = 'deleted'
+    not_found = 'not_found'
+
+
+class TodoBatchResult(BaseModel):
+    id: int
+    status: BatchStatus
+    todo: TodoPublic | None = None
+
+
+class TodoBatchResponse(BaseModel):
+    results: list[TodoBatchResult]
+
+
+class ImportParams(BaseModel):
+    format: FileFormat = FileFormat.ndjson
+    chunk_size: int = Field(IMPORT_CHUNK_SIZE, ge=1, le=MAX_IMPORT_CHUNK_SIZE)
+    # commit a cada N chunks inseridos
+    commit_every: int = Field(IMPORT_COMMIT_EVERY, ge=1)
+
+
+class TodoImportError(BaseModel):
+    line: int
+    errors: list[str]
+
+
+class TodoImportSummary(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TodoImportError]
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    checkins: int
+    connects: int
+    overflow_hits: int
+    timeouts: int
+    invalidations: int
+    waiting: int
+    wait_count: int
+    wait_total_ms: float
+    recent_wait_ms: float
+    wait_histogram_ms: dict[str, int]
+
+
+class PoolStatsList(BaseModel):
+    pools: dict[str, PoolStats]
+
+
+class IdentityCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class StatsParams(BaseModel):
+    days: int = Field(30, ge=1, le=MAX_STATS_DAYS)
+
+
+class TodoDayStats(BaseModel):
+    day: date
+    created: int
+    done: int
+
+
+class TodoStats(BaseModel):
+    total: int
+    states: dict[TodoStatus, int]
+    # só dias com movimento, do mais antigo ao mais recente
+    days: list[TodoDayStats]
+
+
+class ChangesParams(BaseModel):
+    # next_cursor da resposta anterior; vazio = sincronização completa
+    since: str | None = None
+    limit: int = Field(CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE)
+
+
+class TodoChanges(BaseModel):
+    # o cliente aplica as remoções antes dos todos: um id removido e
+    # recriado aparece nas duas listas
+    todos: list[TodoPublic]
+    deleted: list[int]
+    next_cursor: str
+    # True: há mais mudanças, buscar de novo já com o next_cursor
+    has_more: bool
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
 
@@ -7,67 +8,198 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 
 # from jwt.exceptions import PyJWTError
-from pwdlib import PasswordHash
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from fastapi_sincrono.database import get_session
+from fastapi_sincrono.database import get_async_session, get_session
+from fastapi_sincrono.hashing import (
+    check_password,
+    create_hash_executor,
+    hash_password,
+)
+from fastapi_sincrono.identity_cache import (
+    IdentityCache,
+    identity_snapshot,
+    restore_identity,
+)
 from fastapi_sincrono.models import User
-from fastapi_sincrono.settings import Settings
+from fastapi_sincrono.queries import bump_todos_version
+from fastapi_sincrono.settings import get_settings
 
-pwd_context = PasswordHash.recommended()
-settings = Settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+@lru_cache
+def get_identity_cache() -> IdentityCache:
+    # por processo: cada worker guarda as identidades que resolveu
+    settings = get_settings()
+    return IdentityCache(
+        settings.IDENTITY_CACHE_SIZE, settings.IDENTITY_CACHE_TTL
+    )
+
+
+@lru_cache
+def get_hash_executor():
+    # criado no primeiro hash, não ao importar o módulo
+    settings = get_settings()
+    return create_hash_executor(
+        settings.PASSWORD_HASH_EXECUTOR,
+        settings.PASSWORD_HASH_WORKERS,
+        settings.PASSWORD_HASH_MAX_PENDING,
+    )
+
+
+# só versões `async`: o Argon2 é esperado fora do threadpool, que fica com
+# o trabalho no banco; uma rota `def` seguraria um token durante o hash.
+# Scripts e testes chamam `hashing.hash_password` direto
+
 
+async def get_password_hash_async(password):
+    return await get_hash_executor().run_async(hash_password, password)
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await get_hash_executor().run_async(
+        check_password, plain_password, hashed_password
+    )
 
 
 def create_access_token(data: dict):
+    settings = get_settings()
     to_encode = data.copy()
 
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    to_encode.update({'exp': expire})
+    now = datetime.now(tz=ZoneInfo('UTC'))
+    expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # `iat` recente: leituras vão para o primário (ver ReplicaRouter)
+    to_encode.update({'exp': expire, 'iat': now})
     emcoded_jwt = encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return emcoded_jwt
 
 
-def get_current_user(
-    session: Session = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
-    credencials_exception = HTTPException(
+def get_credentials_exception():
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
+
+def get_token_claims(token: str):
+    settings = get_settings()
+    credencials_exception = get_credentials_exception()
+
     try:
         decoded_token = decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        payload_username = decoded_token.get('sub')
-        if not payload_username:
+        if not decoded_token.get('sub'):
             raise credencials_exception
     except DecodeError as e:
         raise credencials_exception from e
     except ExpiredSignatureError as e:
         raise credencials_exception from e
 
-    user_db = session.scalar(
-        select(User).where(User.username == payload_username)
-    )
+    return decoded_token
+
+
+def get_cached_identity(claims: dict):
+    user_id = claims.get('uid')
+    if user_id is None:
+        return None
+
+    snapshot = get_identity_cache().get(user_id)
+    # token emitido antes de uma troca de username não vale mais
+    if snapshot is None or snapshot['username'] != claims['sub']:
+        return None
+
+    return restore_identity(snapshot)
 
-    if not user_db:
-        raise credencials_exception
 
+def check_identity(user_db: User | None, claims: dict):
+    if not user_db or user_db.username != claims['sub']:
+        raise get_credentials_exception()
+
+    get_identity_cache().set(user_db.id, identity_snapshot(user_db))
     return user_db
+
+
+def check_todos_version(version: int | None, user_id: int) -> int:
+    # o cache de identidade é do processo: um usuário removido por outro
+    # worker ainda autentica aqui até o TTL, mas não escreve sem a linha
+    if version is None:
+        get_identity_cache().invalidate(user_id)
+        raise get_credentials_exception()
+    return version
+
+
+def next_todos_version(session: Session, user_id: int) -> int:
+    """`bump_todos_version` com 401 se o usuário não existe mais."""
+    return check_todos_version(
+        session.scalar(bump_todos_version(user_id)), user_id
+    )
+
+
+async def next_todos_version_async(session: AsyncSession, user_id: int):
+    return check_todos_version(
+        await session.scalar(bump_todos_version(user_id)), user_id
+    )
+
+
+def get_current_user(
+    session: Session = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    claims = get_token_claims(token)
+
+    cached_user = get_cached_identity(claims)
+    if cached_user:
+        return session.merge(cached_user, load=False)
+
+    # tokens antigos não têm `uid`: busca pelo username
+    if 'uid' in claims:
+        user_db = session.get(User, claims['uid'])
+    else:
+        user_db = session.scalar(
+            select(User).where(User.username == claims['sub'])
+        )
+
+    return check_identity(user_db, claims)
+
+
+async def get_current_user_async(
+    session: AsyncSession = Depends(get_async_session),
+    token: str = Depends(oauth2_scheme),
+):
+    claims = get_token_claims(token)
+
+    cached_user = get_cached_identity(claims)
+    if cached_user:
+        return await session.merge(cached_user, load=False)
+
+    if 'uid' in claims:
+        user_db = await session.get(User, claims['uid'])
+    else:
+        user_db = await session.scalar(
+            select(User).where(User.username == claims['sub'])
+        )
+
+    return check_identity(user_db, claims)
+
+
+# respostas longas (GET /todo/stream): com `scope='function'` a sessão
+# fecha logo depois da autenticação, não no fim da resposta
+def get_streaming_user(
+    session: Session = Depends(get_session, scope='function'),
+    token: str = Depends(oauth2_scheme),
+):
+    return get_current_user(session, token)
+
+
+async def get_streaming_user_async(
+    session: AsyncSession = Depends(get_async_session, scope='function'),
+    token: str = Depends(oauth2_scheme),
+):
+    return await get_current_user_async(session, token)
@@ -0,0 +1,21 @@
+from typing import override
+
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+
+from fastapi_sincrono.schemas import TodoPublic, UserPublic
+
+# mesma ordem de campos da serialização feita pelo FastAPI
+TODO_FIELDS = tuple(TodoPublic.model_fields)
+USER_FIELDS = tuple(UserPublic.model_fields)
+
+
+class FastJSONResponse(JSONResponse):
+    # confia no conteúdo: codifica direto, sem validar pelo response_model
+    @override
+    def render(self, content) -> bytes:
+        return to_json(content)
+
+
+def dump_rows(rows, fields: tuple[str, ...]) -> list[dict]:
+    return [{field: getattr(row, field) for field in fields} for row in rows]
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,3 +12,85 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    # modo assíncrono: rotas `async def` sobre AsyncEngine/AsyncSession
+    ASYNC_MODE: bool = False
+    # se vazio, é derivada da DATABASE_URL (ex.: sqlite -> sqlite+aiosqlite)
+    ASYNC_DATABASE_URL: str | None = None
+
+    # réplicas de leitura (lista JSON); as assíncronas, se vazias, são
+    # derivadas das síncronas. Quem escreve lê do primário por
+    # READ_YOUR_WRITES_SECONDS (pino por usuário, visto por todos os
+    # workers, e cookie `last_write`)
+    DATABASE_REPLICA_URLS: list[str] = []
+    ASYNC_DATABASE_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_SECONDS: float = 5
+
+    # aquece validadores, JWT e Argon2 e pré-conecta o pool no startup,
+    # antes de /internal/ready ficar verde (ligado pelo main.py)
+    WARMUP_ON_STARTUP: bool = False
+
+    # pool de conexões (ignorado para SQLite em memória)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+
+    # tokens do threadpool das rotas/dependências `def` (None = capacidade
+    # do pool: DB_POOL_SIZE + DB_MAX_OVERFLOW). Conferido com o pool no
+    # startup; THREADPOOL_STRICT levanta erro em vez de logar
+    THREADPOOL_TOKENS: int | None = None
+    THREADPOOL_STRICT: bool = False
+
+    # cache de identidades de get_current_user (0 desliga)
+    IDENTITY_CACHE_SIZE: int = 1024
+    IDENTITY_CACHE_TTL: float = 60
+
+    # executor exclusivo do Argon2 (hash/verify de senha)
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # controle de admissão (AdmissionMiddleware): máximo de requisições em
+    # andamento por prefixo de rota (o mais longo vale; rotas fora da lista
+    # nunca são recusadas) e limites de saturação do threadpool e da espera
+    # por conexão. Acima deles, 503 com Retry-After. None desliga o limite
+    ADMISSION_ROUTE_LIMITS: dict[str, int] = {
+        '/auth/': 16,
+        '/users/': 64,
+        '/todo/': 64,
+        '/todo/stream': 1024,
+    }
+    ADMISSION_MAX_THREADPOOL_WAITING: int | None = 64
+    ADMISSION_MAX_POOL_WAIT_MS: float | None = 1000
+    ADMISSION_RETRY_AFTER: int = 1
+
+    # group commit de create/update de todos (ver write_coalescing): janela
+    # em ms para juntar escritas concorrentes num commit (None desliga; 0
+    # junta só o que já está na fila) e máximo de escritas por commit
+    WRITE_COALESCE_WINDOW_MS: float | None = None
+    WRITE_COALESCE_MAX_BATCH: int = 64
+
+    # GET /todo/stream (SSE): conexões simultâneas por usuário (acima
+    # delas, 429), eventos pendentes por conexão (acima deles, o cliente
+    # recebe `resync`) e intervalo do heartbeat
+    STREAM_MAX_CONNECTIONS_PER_USER: int = 5
+    STREAM_QUEUE_SIZE: int = 100
+    STREAM_HEARTBEAT_SECONDS: float = 15
+
+    # log de queries lentas e orçamento de queries por requisição
+    # (None desliga; QUERY_BUDGET_STRICT levanta erro em vez de logar)
+    SLOW_QUERY_MS: float | None = 200
+    QUERY_BUDGET: int | None = 15
+    QUERY_REPEAT_LIMIT: int | None = 5
+    QUERY_BUDGET_STRICT: bool = False
+
+
+@lru_cache
+def get_settings() -> Settings:
+    # uma única leitura do ambiente/.env por processo. O que depende dos
+    # settings (engines, caches, políticas) também fica num `lru_cache`
+    # criado no primeiro uso, nunca na importação: o main.py relê os
+    # settings (`cache_clear`) depois de importar o app
+    return Settings()
@@ -0,0 +1,169 @@
+"""Capacidade do threadpool do anyio e métricas de saturação.
+
+Rotas e dependências `def` rodam no threadpool padrão do anyio, e cada
+chamada ocupa um token do `CapacityLimiter` padrão (40 no anyio). No modo
+síncrono, cada token pode virar uma conexão do pool: mais tokens que o
+pool comporta deixam threads presas no checkout; menos que `pool_size`
+deixam conexões ociosas. `THREADPOOL_TOKENS` ajusta a capacidade no
+startup e o valor é conferido com o pool configurado.
+
+Os gauges leem o limiter padrão; a espera por um token só é medida nas
+chamadas que passam por `run_in_threadpool` deste módulo, que entrega ao
+anyio o limiter envolvido em `TimedLimiter`.
+"""
+
+import logging
+import time
+from threading import Lock
+
+from anyio import to_thread
+
+from fastapi_sincrono.database import get_pool_options
+from fastapi_sincrono.request_metrics import Histogram, render_metric
+from fastapi_sincrono.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# limites superiores (s) dos buckets de espera por um token
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class ThreadpoolMisconfigured(RuntimeError):
+    pass
+
+
+class ThreadpoolMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.limiter = None
+        self.wait = Histogram(WAIT_BUCKETS)
+
+    def observe_wait(self, elapsed: float):
+        with self._lock:
+            self.wait.observe(elapsed)
+
+    def snapshot(self) -> dict:
+        # só no event loop (GET /metrics é `async def`): numa thread,
+        # `statistics()` copiaria o conjunto de tokens enquanto o loop o altera
+        if self.limiter is None:
+            return {'total_tokens': 0, 'in_use': 0, 'waiting': 0}
+        statistics = self.limiter.statistics()
+        return {
+            'total_tokens': statistics.total_tokens,
+            'in_use': statistics.borrowed_tokens,
+            'waiting': statistics.tasks_waiting,
+        }
+
+    def render(self) -> list[str]:
+        snapshot = self.snapshot()
+        with self._lock:
+            samples = [
+                ('_bucket', {'le': limit}, count)
+                for limit, count in self.wait.cumulative()
+            ]
+            samples += [
+                ('_sum', {}, round(self.wait.sum, 6)),
+                ('_count', {}, self.wait.count),
+            ]
+        return [
+            *render_metric(
+                'threadpool_tokens',
+                'gauge',
+                'Threadpool capacity (tokens).',
+                [('', {}, snapshot['total_tokens'])],
+            ),
+            *render_metric(
+                'threadpool_tokens_in_use',
+                'gauge',
+                'Threadpool tokens held by running sync calls.',
+                [('', {}, snapshot['in_use'])],
+            ),
+            *render_metric(
+                'threadpool_waiting',
+                'gauge',
+                'Sync calls waiting for a threadpool token.',
+                [('', {}, snapshot['waiting'])],
+            ),
+            *render_metric(
+                'threadpool_wait_seconds',
+                'histogram',
+                'Time run_in_threadpool calls waited for a token.',
+                samples,
+            ),
+        ]
+
+
+threadpool_metrics = ThreadpoolMetrics()
+
+
+class TimedLimiter:
+    """Envolve o `CapacityLimiter` padrão e mede a espera por um token.
+
+    `to_thread.run_sync` só usa `async with limiter`.
+    """
+
+    def __init__(self, limiter, metrics: ThreadpoolMetrics):
+        self.limiter = limiter
+        self.metrics = metrics
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await self.limiter.acquire()
+        self.metrics.observe_wait(time.perf_counter() - start)
+
+    async def __aexit__(self, *exc_info):
+        self.limiter.release()
+
+
+async def run_in_threadpool(func, *args):
+    """Roda `func(*args)` no threadpool padrão, medindo a espera."""
+    limiter = TimedLimiter(
+        to_thread.current_default_thread_limiter(), threadpool_metrics
+    )
+    return await to_thread.run_sync(func, *args, limiter=limiter)
+
+
+def threadpool_tokens(settings: Settings) -> int:
+    """`THREADPOOL_TOKENS` ou, se vazio, a capacidade do pool primário."""
+    if settings.THREADPOOL_TOKENS is not None:
+        return settings.THREADPOOL_TOKENS
+    options = get_pool_options(settings, settings.DATABASE_URL, None)
+    if 'pool_size' not in options:
+        return to_thread.current_default_thread_limiter().total_tokens
+    return options['pool_size'] + options['max_overflow']
+
+
+def check_threadpool(settings: Settings, tokens: int) -> str | None:
+    # no modo assíncrono o banco não passa pelo threadpool
+    options = get_pool_options(settings, settings.DATABASE_URL, None)
+    if settings.ASYNC_MODE or 'pool_size' not in options:
+        return None
+
+    size = options['pool_size']
+    capacity = size + options['max_overflow']
+    if tokens > capacity:
+        return (
+            f'threadpool has {tokens} tokens but the pool holds {capacity} '
+            'connections: threads will block waiting for a connection'
+        )
+    if tokens < size:
+        return (
+            f'threadpool has {tokens} tokens but DB_POOL_SIZE is {size}: '
+            'pooled connections will sit idle'
+        )
+    return None
+
+
+def configure_threadpool(settings: Settings, metrics=threadpool_metrics):
+    """Ajusta a capacidade do threadpool do event loop corrente (lifespan)."""
+    tokens = threadpool_tokens(settings)
+    problem = check_threadpool(settings, tokens)
+    if problem and settings.THREADPOOL_STRICT:
+        raise ThreadpoolMisconfigured(problem)
+    if problem:
+        logger.warning(problem)
+
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = tokens
+    metrics.limiter = limiter
+    return limiter
@@ -0,0 +1,36 @@
+"""Delta de todos para clientes offline (GET /todo/changes).
+
+Cada escrita grava nos todos a `todos_version` do usuário, incrementada
+logo antes (`queries.bump_todos_version`), e cada remoção deixa um
+tombstone com essa versão (`models.TODO_TOMBSTONE_DDL`). O cursor é a
+posição (versão, id) já entregue: a sincronização lê só o que mudou
+depois dela, pelo índice (user_id, version, id), e o custo acompanha as
+mudanças em vez do tamanho da lista.
+"""
+
+from fastapi_sincrono.pagination import decode_cursor, encode_cursor
+
+
+def read_changes_cursor(since: str | None) -> tuple[int, int]:
+    # sem cursor: tudo, inclusive os todos anteriores às versões (0)
+    if since is None:
+        return 0, 0
+    return decode_cursor(since, 'version'), decode_cursor(since, 'id')
+
+
+def tombstones_since(after: tuple[int, int]) -> int:
+    # cursor no meio de uma versão: os tombstones dela já foram entregues
+    version, todo_id = after
+    return version + 1 if todo_id else version
+
+
+def changes_page(rows, limit: int, upto: int):
+    """(todos, última versão coberta, next_cursor, has_more) da página."""
+    if len(rows) <= limit:
+        # em dia até `upto`: a próxima leitura começa na versão seguinte
+        return rows, upto, encode_cursor(version=upto + 1, id=0), False
+
+    rows = rows[:limit]
+    last = rows[-1]
+    cursor = encode_cursor(version=last.version, id=last.id)
+    return rows, last.version, cursor, True
@@ -0,0 +1,223 @@
+"""Eventos de todos em tempo real (GET /todo/stream, Server-Sent Events).
+
+Pub/sub em memória do processo: as rotas de escrita publicam depois do
+commit e cada conexão de stream assina os eventos do seu usuário numa
+fila limitada, no event loop da conexão. A publicação não bloqueia: rotas
+`def` publicam de uma thread do threadpool (`call_soon_threadsafe`) e um
+cliente lento não segura quem escreve. Se a fila encher, os eventos
+pendentes são descartados e o cliente recebe um `resync`, para buscar o
+que perdeu em GET /todo/changes.
+
+Cada worker só vê as escritas que ele atendeu: com vários workers, o
+cliente deve tratar o stream como aviso e reconciliar com GET
+/todo/changes ao conectar e a cada `resync`.
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+
+from pydantic_core import to_json
+from starlette.responses import StreamingResponse
+
+from fastapi_sincrono.request_metrics import render_metric
+from fastapi_sincrono.settings import Settings, get_settings
+
+# o cliente reconecta depois de 3 s se a conexão cair
+RETRY_MS = 3000
+
+
+@dataclass(frozen=True)
+class TodoEvent:
+    type: str
+    data: bytes
+    # versão dos todos do usuário depois da escrita (ver todo_changes)
+    version: int | None = None
+
+    def encode(self) -> bytes:
+        event_id = b'' if self.version is None else b'id: %d\n' % self.version
+        return b'%sevent: %s\ndata: %s\n\n' % (
+            event_id,
+            self.type.encode(),
+            self.data,
+        )
+
+
+RESYNC = TodoEvent('resync', b'{}')
+# sentinela do desligamento: encerra o stream
+CLOSE = TodoEvent('close', b'')
+HEARTBEAT = b': ping\n\n'
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.overflows = 0
+
+    def deliver(self, event: TodoEvent):
+        # só roda no event loop da conexão
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # cliente lento: descarta o pendente e pede ressincronização
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSE if event is CLOSE else RESYNC)
+            self.overflows += 1
+
+    async def next(self, timeout: float) -> TodoEvent | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class TodoEventBus:
+    def __init__(
+        self,
+        max_connections_per_user: int,
+        queue_size: int,
+        heartbeat_seconds: float,
+    ):
+        self.max_connections_per_user = max_connections_per_user
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._lock = Lock()
+        self._subscriptions = defaultdict(set)
+        self.counts = Counter()
+
+    @classmethod
+    def from_settings(cls, settings: Settings):
+        return cls(
+            settings.STREAM_MAX_CONNECTIONS_PER_USER,
+            settings.STREAM_QUEUE_SIZE,
+            settings.STREAM_HEARTBEAT_SECONDS,
+        )
+
+    def subscribe(self, user_id: int) -> Subscription | None:
+        """Assina os eventos do usuário; None acima do limite de conexões."""
+        with self._lock:
+            subscriptions = self._subscriptions[user_id]
+            if len(subscriptions) >= self.max_connections_per_user:
+                self.counts['rejected'] += 1
+                return None
+            subscription = Subscription(user_id, self.queue_size)
+            subscriptions.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions[subscription.user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self.counts['overflows'] += subscription.overflows
+            subscription.overflows = 0
+
+    def _send(self, subscriptions, event: TodoEvent):
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, event
+                )
+            except RuntimeError:
+                # event loop já fechado: a conexão não existe mais
+                self.unsubscribe(subscription)
+
+    def publish(self, user_id: int, event: TodoEvent):
+        """Entrega o evento às conexões do usuário; seguro entre threads."""
+        with self._lock:
+            subscriptions = tuple(self._subscriptions.get(user_id, ()))
+            self.counts['published'] += 1
+        self._send(subscriptions, event)
+
+    def publish_todo(self, user_id: int, event_type: str, todo, version):
+        self.publish(user_id, TodoEvent(event_type, to_json(todo), version))
+
+    def publish_deleted(self, user_id: int, todo_id: int, version):
+        self.publish(
+            user_id, TodoEvent('deleted', to_json({'id': todo_id}), version)
+        )
+
+    def close(self):
+        """Encerra todos os streams (desligamento do worker)."""
+        with self._lock:
+            subscriptions = [
+                subscription
+                for user_subscriptions in self._subscriptions.values()
+                for subscription in user_subscriptions
+            ]
+        self._send(subscriptions, CLOSE)
+
+    async def stream(self, subscription: Subscription):
+        yield b'retry: %d\n\n' % RETRY_MS
+        while True:
+            event = await subscription.next(self.heartbeat_seconds)
+            if event is CLOSE:
+                return
+            # o ping também detecta o cliente que já desconectou
+            yield HEARTBEAT if event is None else event.encode()
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(map(len, self._subscriptions.values()))
+
+    def render(self) -> list[str]:
+        connections = self.connections()
+        with self._lock:
+            counts = dict(self.counts)
+        return [
+            *render_metric(
+                'todo_stream_connections',
+                'gauge',
+                'Open GET /todo/stream connections.',
+                [('', {}, connections)],
+            ),
+            *render_metric(
+                'todo_events_published_total',
+                'counter',
+                'Todo events published after commit.',
+                [('', {}, counts.get('published', 0))],
+            ),
+            *render_metric(
+                'todo_stream_overflows_total',
+                'counter',
+                'Slow stream consumers whose queue overflowed (resync).',
+                [('', {}, counts.get('overflows', 0))],
+            ),
+            *render_metric(
+                'todo_stream_rejected_total',
+                'counter',
+                'Streams rejected by the per-user connection limit.',
+                [('', {}, counts.get('rejected', 0))],
+            ),
+        ]
+
+
+class EventStreamResponse(StreamingResponse):
+    media_type = 'text/event-stream'
+
+    def __init__(self, bus: TodoEventBus, subscription: Subscription):
+        super().__init__(
+            bus.stream(subscription),
+            # sem cache nem buffer em proxies (nginx)
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+        self.bus = bus
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        # libera a vaga mesmo se o cliente cair antes do primeiro evento
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.bus.unsubscribe(self.subscription)
+
+
+@lru_cache
+def get_todo_events() -> TodoEventBus:
+    return TodoEventBus.from_settings(get_settings())
@@ -0,0 +1,117 @@
+"""Estatísticas de todos por usuário (GET /todo/stats).
+
+Os contadores de `todo_state_counts` e `todo_daily_counts` são mantidos
+pelos triggers de `models.TODO_STATS_DDL`, na transação de cada escrita.
+Se divergirem (restore parcial, SQL manual com os triggers desligados),
+este módulo os recalcula a partir de `todos`.
+
+Uso:
+    python -m fastapi_sincrono.todo_stats
+    python -m fastapi_sincrono.todo_stats --user-id 42
+"""
+
+import argparse
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, literal, select, text, union_all
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.database import get_engine
+from fastapi_sincrono.models import (
+    Todo,
+    TodoDailyCount,
+    TodoStateCount,
+    TodoStatus,
+)
+
+
+def stats_since(days: int) -> date:
+    # os dias dos contadores são datas UTC (ver TODO_STATS_DDL)
+    return datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+
+def build_todo_stats(states: dict, days) -> dict:
+    counts = {state: states.get(state, 0) for state in TodoStatus}
+    return {
+        'total': sum(counts.values()),
+        'states': counts,
+        'days': [
+            {'day': day, 'created': created, 'done': done}
+            for day, created, done in days
+        ],
+    }
+
+
+def rebuild_statements(user_id: int | None = None):
+    """DELETE e INSERT ... SELECT que recalculam os contadores."""
+    todos = [Todo.user_id == user_id] if user_id else []
+    states = [TodoStateCount.user_id == user_id] if user_id else []
+    days = [TodoDailyCount.user_id == user_id] if user_id else []
+    created_day = func.date(Todo.created_at)
+    done_day = func.date(Todo.updated_at)
+
+    daily = union_all(
+        select(
+            Todo.user_id,
+            created_day.label('day'),
+            func.count().label('created'),
+            literal(0).label('done'),
+        )
+        .where(*todos)
+        .group_by(Todo.user_id, created_day),
+        select(
+            Todo.user_id,
+            done_day.label('day'),
+            literal(0).label('created'),
+            func.count().label('done'),
+        )
+        .where(*todos, Todo.state == TodoStatus.done)
+        .group_by(Todo.user_id, done_day),
+    ).subquery()
+
+    return [
+        delete(TodoStateCount).where(*states),
+        delete(TodoDailyCount).where(*days),
+        insert(TodoStateCount).from_select(
+            ['user_id', 'state', 'count'],
+            select(Todo.user_id, Todo.state, func.count())
+            .where(*todos)
+            .group_by(Todo.user_id, Todo.state),
+        ),
+        insert(TodoDailyCount).from_select(
+            ['user_id', 'day', 'created', 'done'],
+            select(
+                daily.c.user_id,
+                daily.c.day,
+                func.sum(daily.c.created),
+                func.sum(daily.c.done),
+            ).group_by(daily.c.user_id, daily.c.day),
+        ),
+    ]
+
+
+def rebuild_todo_stats(session: Session, user_id: int | None = None):
+    # no PostgreSQL, escritas concorrentes esperam o fim do recálculo;
+    # no SQLite o primeiro DELETE já pega o lock de escrita do banco
+    if session.bind.dialect.name == 'postgresql':
+        session.execute(text('LOCK TABLE todos IN SHARE MODE'))
+    for statement in rebuild_statements(user_id):
+        session.execute(statement)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--user-id', type=int)
+    args = parser.parse_args()
+
+    with Session(get_engine()) as session:
+        rebuild_todo_stats(session, args.user_id)
+        session.commit()
+        rows = session.scalar(select(func.count()).select_from(TodoStateCount))
+    print(f'todo stats rebuilt: {rows} state counters')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Aquecimento antes de aceitar tráfego e estado de prontidão.
+
+Os passos de processo (validadores Pydantic, JWT, Argon2) rodam uma vez;
+com o `main.py`, no processo mestre antes do fork, e os workers herdam o
+resultado. A pré-conexão do pool roda em cada worker, no lifespan, porque
+conexões não sobrevivem ao fork. `GET /internal/ready` só responde 200
+depois disso.
+"""
+
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from fastapi_sincrono.database import (
+    get_async_replica_router,
+    get_replica_router,
+)
+from fastapi_sincrono.hashing import check_password, hash_password
+from fastapi_sincrono.schemas import (
+    TodoBatchCreate,
+    TodoList,
+    TodoUpdate,
+    UserPublic,
+    UserSchema,
+)
+from fastapi_sincrono.security import create_access_token, get_token_claims
+from fastapi_sincrono.serialization import (
+    TODO_FIELDS,
+    USER_FIELDS,
+    FastJSONResponse,
+    dump_rows,
+)
+from fastapi_sincrono.settings import get_settings
+
+SAMPLE_TODO = {
+    'id': 1,
+    'title': 'warmup',
+    'description': None,
+    'state': 'pending',
+    'created_at': datetime(2000, 1, 1, tzinfo=timezone.utc),
+    'updated_at': datetime(2000, 1, 1, tzinfo=timezone.utc),
+}
+SAMPLE_USER = {'id': 1, 'username': 'warmup', 'email': 'warmup@example.com'}
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        # duração (ms) de cada passo e conexões abertas por pool
+        self.steps = {}
+        self.connections = {}
+
+    def run(self, name: str, step, *args):
+        start = time.perf_counter()
+        result = step(*args)
+        self.steps[name] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+
+readiness = Readiness()
+
+
+def warm_validators():
+    # primeira validação/serialização de cada schema usado nas rotas
+    UserSchema.model_validate({**SAMPLE_USER, 'password': 'warmup'})
+    TodoBatchCreate.model_validate({'todos': [SAMPLE_TODO]})
+    TodoUpdate.model_validate({'state': 'done'})
+    TodoList.model_validate({'todos': [SAMPLE_TODO]}).model_dump_json()
+    UserPublic.model_validate(SAMPLE_USER).model_dump_json()
+    FastJSONResponse({
+        'todos': dump_rows([SimpleNamespace(**SAMPLE_TODO)], TODO_FIELDS),
+        'users': dump_rows([SimpleNamespace(**SAMPLE_USER)], USER_FIELDS),
+    })
+
+
+def warm_jwt():
+    get_token_claims(create_access_token({'sub': 'warmup', 'uid': 0}))
+
+
+def warm_password_hashing():
+    # direto, fora do executor: ele só é criado no worker, depois do fork
+    check_password('warmup', hash_password('warmup'))
+
+
+PROCESS_STEPS = {
+    'validators': warm_validators,
+    'jwt': warm_jwt,
+    'password_hashing': warm_password_hashing,
+}
+
+
+def warm_up_process():
+    # idempotente: depois do preload no mestre, os workers não repetem
+    for name, step in PROCESS_STEPS.items():
+        if name not in readiness.steps:
+            readiness.run(name, step)
+
+
+def pool_capacity(pool, size: int) -> int:
+    # SQLite em memória não usa QueuePool: uma conexão basta (o `size`
+    # do SingletonThreadPool é um atributo, não o método)
+    return min(size, pool.size()) if isinstance(pool, QueuePool) else 1
+
+
+def preconnect_pool(engine, size: int) -> int:
+    """Abre as conexões do pool ao mesmo tempo e as devolve a ele."""
+    connections = []
+    try:
+        for _ in range(pool_capacity(engine.pool, size)):
+            connections.append(engine.connect())
+            connections[-1].exec_driver_sql('SELECT 1')
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def preconnect_async_pool(engine: AsyncEngine, size: int) -> int:
+    connections = []
+    try:
+        for _ in range(pool_capacity(engine.sync_engine.pool, size)):
+            connections.append(await engine.connect())
+            await connections[-1].exec_driver_sql('SELECT 1')
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
+
+
+async def warm_up_worker():
+    settings = get_settings()
+    await to_thread.run_sync(warm_up_process)
+
+    # mesmos nomes de pool de /internal/pool
+    if settings.ASYNC_MODE:
+        router = get_async_replica_router()
+        engines = {'async': router.primary}
+        engines.update(
+            (f'async_replica{number}', engine)
+            for number, engine in enumerate(router.replicas)
+        )
+        for name, engine in engines.items():
+            readiness.connections[name] = await preconnect_async_pool(
+                engine, settings.DB_POOL_SIZE
+            )
+    else:
+        router = get_replica_router()
+        engines = {'sync': router.primary}
+        engines.update(
+            (f'replica{number}', engine)
+            for number, engine in enumerate(router.replicas)
+        )
+        for name, engine in engines.items():
+            readiness.connections[name] = await to_thread.run_sync(
+                preconnect_pool, engine, settings.DB_POOL_SIZE
+            )
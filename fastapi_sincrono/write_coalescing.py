@@ -0,0 +1,235 @@
+"""Group commit: escritas concorrentes de todos numa transação só.
+
+No SQLite cada commit é um fsync e o banco aceita um escritor por vez:
+o teto é de algumas centenas de commits por segundo, com qualquer número
+de workers. Com `WRITE_COALESCE_WINDOW_MS`, create/update de todos vão
+para um escritor único por processo, que junta o que chegar dentro da
+janela (até `WRITE_COALESCE_MAX_BATCH`) e faz um commit só. Cada
+requisição recebe o próprio resultado ou erro: se uma escrita falha, o
+lote é desfeito e refeito sem ela. Um SAVEPOINT por escrita evitaria
+refazer, mas no SQLite o RELEASE custa mais que a própria escrita, e
+falhas (404 no update) são raras.
+
+A janela troca latência por vazão: uma escrita sozinha espera a janela
+inteira. Com janela 0 o lote é só o que já estava na fila, o que acumula
+enquanto o commit anterior espera o fsync (`benchmarks.write_coalescing`).
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from http import HTTPStatus
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.database import get_engine
+from fastapi_sincrono.queries import (
+    insert_todo_returning,
+    update_user_todo_returning,
+)
+from fastapi_sincrono.replicas import record_session_write
+from fastapi_sincrono.request_metrics import Histogram, render_metric
+from fastapi_sincrono.schemas import TodoPublic
+from fastapi_sincrono.security import next_todos_version
+from fastapi_sincrono.settings import get_settings
+
+# limites superiores dos buckets de escritas por commit
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+# espera pelo fim do escritor no desligamento (s)
+CLOSE_TIMEOUT = 5
+# sentinela do desligamento na fila
+STOP = None
+
+
+class WriteCoalescer:
+    def __init__(self, session_factory, window: float, max_batch: int):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._jobs = SimpleQueue()
+        self._lock = Lock()
+        self._writer = None
+        self.batch_sizes = Histogram(BATCH_BUCKETS)
+
+    def _start(self):
+        # criado na primeira escrita: threads não sobrevivem ao fork. Um
+        # escritor encerrado (close) é recriado: nada fica na fila sem ele
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = Thread(
+                    target=self._run, name='write-coalescer', daemon=True
+                )
+                self._writer.start()
+
+    def submit_future(self, write, *args) -> Future:
+        """Enfileira `write(session, *args)`; o Future tem o resultado."""
+        self._start()
+        future = Future()
+        self._jobs.put((future, write, args))
+        return future
+
+    def submit(self, write, *args):
+        return self.submit_future(write, *args).result()
+
+    async def submit_async(self, write, *args):
+        return await asyncio.wrap_future(self.submit_future(write, *args))
+
+    def _collect(self) -> list:
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + self.window
+        while batch[-1] is not STOP and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self._jobs.get(timeout=remaining)
+                    if remaining > 0
+                    else self._jobs.get_nowait()
+                )
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            jobs = [job for job in batch if job is not STOP]
+            try:
+                if jobs:
+                    self.write_batch(jobs)
+            except BaseException as error:
+                # rollback, abrir ou fechar a sessão: o erro vai para quem
+                # ainda espera e o escritor segue vivo para o próximo lote
+                for future, _, _ in jobs:
+                    if not future.done():
+                        future.set_exception(error)
+            if len(jobs) < len(batch):
+                return
+
+    @staticmethod
+    def write_jobs(session: Session, jobs: list) -> list:
+        pending = [
+            job for job in jobs if job[0].set_running_or_notify_cancel()
+        ]
+        done = []
+        while len(done) < len(pending):
+            future, write, args = pending[len(done)]
+            try:
+                done.append((future, write(session, *args)))
+            except Exception as error:
+                # desfaz o lote e o refaz sem a escrita que falhou
+                session.rollback()
+                future.set_exception(error)
+                del pending[len(done)]
+                done = []
+        return done
+
+    def write_batch(self, jobs: list):
+        with self.session_factory() as session:
+            done = self.write_jobs(session, jobs)
+            try:
+                session.commit()
+            except Exception as error:
+                # commit do lote falhou: todas as escritas falham juntas
+                for future, _ in done:
+                    future.set_exception(error)
+                return
+
+        for future, result in done:
+            future.set_result(result)
+        with self._lock:
+            self.batch_sizes.observe(len(jobs))
+
+    def close(self):
+        """Processa o que está na fila e encerra o escritor."""
+        with self._lock:
+            writer = self._writer
+        if writer is not None:
+            self._jobs.put(STOP)
+            writer.join(CLOSE_TIMEOUT)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            samples = [
+                ('_bucket', {'le': limit}, count)
+                for limit, count in self.batch_sizes.cumulative()
+            ]
+            samples += [
+                ('_sum', {}, self.batch_sizes.sum),
+                ('_count', {}, self.batch_sizes.count),
+            ]
+        return render_metric(
+            'write_coalescer_batch_size',
+            'histogram',
+            'Todo writes per coalesced transaction.',
+            samples,
+        )
+
+
+@lru_cache
+def get_write_coalescer() -> WriteCoalescer | None:
+    # None (o padrão): cada requisição faz o próprio commit
+    settings = get_settings()
+    if settings.WRITE_COALESCE_WINDOW_MS is None:
+        return None
+    return WriteCoalescer(
+        lambda: Session(get_engine()),
+        settings.WRITE_COALESCE_WINDOW_MS / 1000,
+        settings.WRITE_COALESCE_MAX_BATCH,
+    )
+
+
+def run_todo_write(session: Session, coalescer, write, *args):
+    """Roda a escrita no escritor único ou na sessão da requisição."""
+    if coalescer is not None:
+        # a sessão da requisição devolve a conexão ao pool antes de
+        # esperar: com o pool cheio de requisições esperando, o escritor
+        # não conseguiria a dele
+        session.close()
+        result = coalescer.submit(write, *args)
+        # o commit foi na sessão do escritor: a requisição lê do primário
+        record_session_write(session)
+        return result
+    result = write(session, *args)
+    session.commit()
+    return result
+
+
+async def run_todo_write_async(session: AsyncSession, coalescer, write, *args):
+    """`run_todo_write` das rotas assíncronas: a mesma escrita síncrona."""
+    if coalescer is not None:
+        await session.close()
+        result = await coalescer.submit_async(write, *args)
+        record_session_write(session.sync_session)
+        return result
+    result = await session.run_sync(write, *args)
+    await session.commit()
+    return result
+
+
+# escritas que podem ser agrupadas: recebem a sessão, não fazem commit e
+# devolvem (todo serializado, versão); versão None quando nada mudou
+
+
+def create_todo_row(session: Session, user_id: int, values: dict):
+    version = next_todos_version(session, user_id)
+    todo_db = session.scalar(insert_todo_returning(user_id, values, version))
+    # serializa antes do commit, que expira a instância
+    return TodoPublic.model_validate(todo_db), version
+
+
+def update_todo_row(session: Session, user_id: int, todo_id, changes: dict):
+    # PATCH sem campos: só devolve o todo, sem gastar versão
+    version = next_todos_version(session, user_id) if changes else None
+    todo_db = session.scalar(
+        update_user_todo_returning(user_id, todo_id, changes, version)
+    )
+    if not todo_db:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Todo not found'
+        )
+    return TodoPublic.model_validate(todo_db), version
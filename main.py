@@ -1,5 +1,146 @@
+"""Servidor de produção: prefork com preload e aquecimento.
+
+O mestre importa o app e aquece validadores, JWT e Argon2 uma vez; os
+workers nascem por `fork` e herdam esse estado. Engines e o executor de
+hashing só são criados nos workers (conexões e threads não sobrevivem ao
+fork), que pré-conectam o pool no lifespan antes de `GET /internal/ready`
+responder 200.
+
+Workers: `--workers`, `WEB_CONCURRENCY` ou um por CPU disponível (um só
+com SQLite em memória, que não é compartilhado entre processos).
+
+Uso:
+    python main.py
+    python main.py --workers 4 --host 0.0.0.0 --port 8000
+"""
+
+import argparse
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+from sqlalchemy import make_url
+
+# preload: o app é importado no mestre, antes do fork
+from fastapi_sincrono.app import app
+from fastapi_sincrono.settings import get_settings
+from fastapi_sincrono.todo_events import get_todo_events
+from fastapi_sincrono.warmup import warm_up_process
+
+# espera antes de recriar um worker que morreu, para não entrar em loop
+RESTART_DELAY = 1.0
+
+logger = logging.getLogger('uvicorn.error')
+
+
+class Server(uvicorn.Server):
+    # o uvicorn espera as conexões terminarem antes do lifespan: os
+    # streams SSE (GET /todo/stream) são encerrados já no sinal
+    def handle_exit(self, sig, frame):
+        get_todo_events().close()
+        super().handle_exit(sig, frame)
+
+
+def worker_count(database_url: str, cpus: int | None = None) -> int:
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in {
+        None,
+        '',
+        ':memory:',
+    }:
+        return 1
+    return max(cpus or os.process_cpu_count() or 1, 1)
+
+
+def run_worker(config: uvicorn.Config, sock):
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # filho: o uvicorn instala os próprios handlers de SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    status = 0
+    try:
+        Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception('worker %s failed', os.getpid())
+        status = 1
+    os._exit(status)
+
+
+def supervise(config: uvicorn.Config, sock, workers: int):
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    children.update(run_worker(config, sock) for _ in range(workers))
+    logger.info('master %s started %s workers', os.getpid(), workers)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if stopping:
+            continue
+
+        logger.warning(
+            'worker %s exited (%s), restarting',
+            pid,
+            os.waitstatus_to_exitcode(status),
+        )
+        time.sleep(RESTART_DELAY)
+        if not stopping:
+            children.add(run_worker(config, sock))
+
+
 def main():
-    print('Hello from fastapi-sincrono!')
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--workers', type=int, default=os.environ.get('WEB_CONCURRENCY')
+    )
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    # o lifespan de cada worker aquece; o import do app já leu os settings
+    os.environ.setdefault('WARMUP_ON_STARTUP', 'true')
+    get_settings.cache_clear()
+    settings = get_settings()
+    workers = args.workers or worker_count(settings.DATABASE_URL)
+    if workers > 1 and not hasattr(os, 'fork'):
+        workers = 1
+
+    # aquecido uma vez aqui; os workers herdam e não repetem
+    warm_up_process()
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+    sock = config.bind_socket()
+    if workers == 1:
+        Server(config).run(sockets=[sock])
+    else:
+        supervise(config, sock, workers)
+    sock.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+"""add todo search index
+
+Revision ID: d81e5a0c6f3b
+Revises: c3a1f27d9b04
+Create Date: 2026-10-18 11:02:17.841552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81e5a0c6f3b'
+down_revision: Union[str, Sequence[str], None] = 'c3a1f27d9b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE todos_fts USING fts5(
+                title, description, content='todos', content_rowid='id'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos
+            BEGIN
+                INSERT INTO todos_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos
+            BEGIN
+                INSERT INTO todos_fts(todos_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER todos_fts_au
+            AFTER UPDATE OF title, description ON todos
+            BEGIN
+                INSERT INTO todos_fts(todos_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO todos_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        # indexa os todos que já existem
+        op.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        op.execute("""
+            CREATE INDEX ix_todos_search ON todos USING gin (
+                to_tsvector(
+                    'simple',
+                    coalesce(title, '') || ' ' || coalesce(description, '')
+                )
+            )
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_ai')
+        op.execute('DROP TABLE IF EXISTS todos_fts')
+
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_todos_search')
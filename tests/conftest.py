@@ -2,15 +2,25 @@ import pytest
 from factory import Factory, LazyAttribute, Sequence
 from factory.faker import Faker
 from factory.fuzzy import FuzzyChoice
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from fastapi_sincrono.app import app
-from fastapi_sincrono.database import get_session
+from fastapi_sincrono.database import (
+    get_async_session,
+    get_replica_router,
+    get_session,
+)
+from fastapi_sincrono.hashing import hash_password
 from fastapi_sincrono.models import Todo, TodoStatus, User, table_registry
-from fastapi_sincrono.security import get_password_hash
+from fastapi_sincrono.replicas import ReplicaRouter, WritePins
+from fastapi_sincrono.request_metrics import get_query_policy
+from fastapi_sincrono.routers.aio import auth, todo, users
+from fastapi_sincrono.security import get_identity_cache
 from fastapi_sincrono.settings import Settings
 
 
@@ -32,6 +42,19 @@ class TodoFactory(Factory):
     state = FuzzyChoice(TodoStatus)
 
 
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    get_identity_cache().clear()
+    yield
+    get_identity_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(monkeypatch):
+    # nos testes, estourar o orçamento de queries falha o teste
+    monkeypatch.setattr(get_query_policy(), 'strict', True)
+
+
 @pytest.fixture
 def client(session: Session):
     def get_session_override():
@@ -44,6 +67,63 @@ def client(session: Session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def async_client(tmp_path):
+    # arquivo compartilhado: o schema é criado pelo engine síncrono
+    db_file = tmp_path / 'async.db'
+    sync_engine = create_engine(f'sqlite:///{db_file}')
+    table_registry.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(
+        f'sqlite+aiosqlite:///{db_file}', poolclass=NullPool
+    )
+
+    async def get_async_session_override():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as session:
+            yield session
+
+    async_app = FastAPI()
+    async_app.include_router(auth.router)
+    async_app.include_router(users.router)
+    async_app.include_router(todo.router)
+    async_app.dependency_overrides[get_async_session] = (
+        get_async_session_override
+    )
+
+    with TestClient(async_app) as client:
+        yield client
+
+
+@pytest.fixture
+def replica_router(tmp_path):
+    # dois arquivos SQLite no lugar de primário e réplica; não há
+    # replicação entre eles, então dá para ver de onde veio cada leitura
+    primary, replica = (
+        create_engine(f'sqlite:///{tmp_path / name}.db')
+        for name in ('primary', 'replica')
+    )
+    for engine in (primary, replica):
+        table_registry.metadata.create_all(engine)
+
+    # pinos próprios: os de WRITE_PINS passariam de um teste ao outro
+    yield ReplicaRouter(primary, [replica], pin_seconds=60, pins=WritePins())
+
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def replica_client(replica_router):
+    app.dependency_overrides[get_replica_router] = lambda: replica_router
+    with TestClient(app) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
 @pytest.fixture
 def session():
     engine = create_engine(
@@ -62,7 +142,7 @@ def session():
 @pytest.fixture
 def user(session: Session):
     pwd = 'test01'
-    user = UserFactory(password=get_password_hash(pwd))
+    user = UserFactory(password=hash_password(pwd))
     session.add(user)
     session.commit()
     session.refresh(user)
@@ -74,7 +154,7 @@ def user(session: Session):
 @pytest.fixture
 def other_user(session: Session):
     pwd = 'test01'
-    user = UserFactory(password=get_password_hash(pwd))
+    user = UserFactory(password=hash_password(pwd))
     session.add(user)
     session.commit()
     session.refresh(user)
@@ -0,0 +1,123 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_sincrono.admission import (
+    AdmissionControl,
+    AdmissionMiddleware,
+    AdmissionPolicy,
+    get_admission_control,
+)
+from fastapi_sincrono.pool_metrics import PoolMetrics
+from tests.test_request_metrics import sample_value
+
+OVERLOADED = 10_000
+
+
+def make_control(**policy):
+    return AdmissionControl(
+        AdmissionPolicy(**policy),
+        threadpool_waiting=lambda: 0,
+        pool_wait_ms=lambda: 0.0,
+    )
+
+
+def test_route_class_should_use_longest_prefix():
+    control = make_control(
+        route_limits={'/auth/': 1, '/auth/token': 1, '/todo/': 1}
+    )
+
+    assert control.route_class('/auth/token') == '/auth/token'
+    assert control.route_class('/auth/refresh-token') == '/auth/'
+    assert control.route_class('/metrics') is None
+
+
+def test_admit_should_limit_in_flight_per_route_class():
+    control = make_control(route_limits={'/auth/': 1, '/todo/': 1})
+
+    assert control.admit('/auth/') is None
+    assert control.admit('/auth/') == 'in_flight'
+    # outra classe tem a própria cota
+    assert control.admit('/todo/') is None
+
+    control.release('/auth/')
+    assert control.admit('/auth/') is None
+    assert control.shed == {('/auth/', 'in_flight'): 1}
+
+
+@pytest.mark.parametrize(
+    ('policy', 'reason'),
+    [
+        ({'max_threadpool_waiting': 5}, 'threadpool'),
+        ({'max_pool_wait_ms': 500}, 'db_pool'),
+    ],
+)
+def test_admit_should_shed_when_saturated(policy, reason):
+    control = AdmissionControl(
+        AdmissionPolicy(route_limits={'/todo/': 100}, **policy),
+        threadpool_waiting=lambda: OVERLOADED,
+        pool_wait_ms=lambda: OVERLOADED,
+    )
+
+    assert control.admit('/todo/') == reason
+    assert control.in_flight['/todo/'] == 0
+
+
+def test_middleware_should_return_503_with_retry_after():
+    retry_after = 3
+    control = AdmissionControl(
+        AdmissionPolicy(
+            route_limits={'/busy/': 0, '/free/': 1},
+            max_threadpool_waiting=OVERLOADED,
+            retry_after=retry_after,
+        ),
+        pool_wait_ms=lambda: 0.0,
+    )
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, control=control)
+
+    @app.get('/busy/')
+    @app.get('/free/')
+    @app.get('/health')
+    def endpoint():
+        return {}
+
+    with TestClient(app) as client:
+        shed = client.get('/busy/')
+        # a vaga volta no fim: a segunda chamada também entra
+        admitted = [client.get('/free/').status_code for _ in range(2)]
+        unclassified = client.get('/health')
+
+    assert shed.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert shed.headers['retry-after'] == str(retry_after)
+    assert shed.json() == {'detail': 'Service Unavailable'}
+    assert admitted == [HTTPStatus.OK, HTTPStatus.OK]
+    assert unclassified.status_code == HTTPStatus.OK
+    assert control.in_flight['/free/'] == 0
+
+
+def test_metrics_should_export_shed_counts(client, monkeypatch):
+    sample = (
+        'http_requests_shed_total{route_class="/users/",reason="threadpool"}'
+    )
+    before = sample_value(client.get('/metrics').text, sample)
+    monkeypatch.setattr(
+        get_admission_control(), 'threadpool_waiting', lambda: OVERLOADED
+    )
+
+    response = client.get('/users/')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    # /metrics não pertence a nenhuma classe: nunca é recusado
+    assert sample_value(client.get('/metrics').text, sample) == before + 1
+
+
+def test_pool_recent_wait_should_decay_without_new_waits():
+    metrics = PoolMetrics()
+    metrics.observe_wait(1000)
+    assert metrics.recent_wait_ms() > 0
+
+    metrics.recent_at -= 20  # 20 meias-vidas depois
+    assert metrics.recent_wait_ms() < 1
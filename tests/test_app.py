@@ -1,7 +1,63 @@
+import json
+import subprocess
+import sys
 from http import HTTPStatus
 
+from fastapi_sincrono.app import app
+from fastapi_sincrono.openapi import OPENAPI_FILE, build_openapi
+
 
 def test_read_root_say_hello(client):
     response = client.get('/')
     assert response.status_code == HTTPStatus.OK  # 200
     assert response.json() == {'message': 'Testando'}
+
+
+def test_prebuilt_openapi_should_match_routes():
+    # se falhar: python -m fastapi_sincrono.openapi
+    assert json.loads(OPENAPI_FILE.read_text()) == build_openapi(app)
+
+
+def test_openapi_should_be_loaded_at_startup(client):
+    assert app.openapi_schema == json.loads(OPENAPI_FILE.read_text())
+    assert client.get('/openapi.json').json() == app.openapi_schema
+
+
+def test_import_app_should_not_create_engine_or_hasher():
+    code = (
+        'import fastapi_sincrono.app\n'
+        'from fastapi_sincrono import database, hashing, security\n'
+        'print(database.get_engine.cache_info().currsize,'
+        ' database.get_async_engine.cache_info().currsize,'
+        ' hashing.get_password_context.cache_info().currsize,'
+        ' security.get_hash_executor.cache_info().currsize)\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ['0', '0', '0', '0']
+
+
+def test_import_app_should_not_build_settings_dependent_state():
+    # main.py relê os settings depois do import (get_settings.cache_clear)
+    code = (
+        'import fastapi_sincrono.app\n'
+        'from fastapi_sincrono import admission, request_metrics, security\n'
+        'from fastapi_sincrono import todo_events\n'
+        'print(admission.get_admission_control.cache_info().currsize,'
+        ' request_metrics.get_query_policy.cache_info().currsize,'
+        ' security.get_identity_cache.cache_info().currsize,'
+        ' todo_events.get_todo_events.cache_info().currsize)\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ['0', '0', '0', '0']
@@ -0,0 +1,347 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.todo_events import get_todo_events
+from fastapi_sincrono.write_coalescing import (
+    WriteCoalescer,
+    get_write_coalescer,
+)
+
+EVENT_TIMEOUT = 5
+COALESCE_WINDOW = 0.01
+COALESCED_REQUESTS = 3
+
+
+@pytest.fixture
+def async_token(async_client):
+    async_client.post(
+        '/users/',
+        json={
+            'username': 'Rex',
+            'email': 'Rex@example.com',
+            'password': '1234',
+        },
+    )
+    response = async_client.post(
+        '/auth/token', data={'username': 'Rex', 'password': '1234'}
+    )
+    return response.json()['access_token']
+
+
+def test_async_create_user(async_client):
+    response = async_client.post(
+        '/users/',
+        json={
+            'username': 'Rex',
+            'email': 'Rex@example.com',
+            'password': '1234',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {
+        'id': 1,
+        'username': 'Rex',
+        'email': 'Rex@example.com',
+    }
+
+
+def test_async_create_user_when_username_already_exists_should_return_400(
+    async_client, async_token
+):
+    response = async_client.post(
+        '/users/',
+        json={
+            'username': 'Rex',
+            'email': 'other@example.com',
+            'password': '1234',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Username Already Exists'}
+
+
+def test_async_get_token_with_wrong_password_should_return_401(
+    async_client, async_token
+):
+    response = async_client.post(
+        '/auth/token', data={'username': 'Rex', 'password': 'wrong'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Incorrect Username or password'}
+
+
+def test_async_update_and_delete_user(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+
+    response = async_client.put(
+        '/users/1',
+        headers=headers,
+        json={
+            'username': 'Rex',
+            'email': 'TIRex@example.com',
+            'password': '4321',
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['email'] == 'TIRex@example.com'
+
+    response = async_client.delete('/users/1', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = async_client.get('/users/1')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_todo_crud(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+
+    response = async_client.post(
+        '/todo/', headers=headers, json={'title': 'Buy groceries'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    todo_id = response.json()['id']
+
+    response = async_client.patch(
+        f'/todo/{todo_id}', headers=headers, json={'state': 'doing'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['state'] == 'doing'
+
+    response = async_client.get('/todo/?state=doing', headers=headers)
+    assert [t['id'] for t in response.json()['todos']] == [todo_id]
+
+    response = async_client.delete(f'/todo/{todo_id}', headers=headers)
+    assert response.json() == {'message': 'Todo deleted successfully'}
+
+    response = async_client.delete(f'/todo/{todo_id}', headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_invalid_token_should_return_401(async_client):
+    response = async_client.get(
+        '/todo/', headers={'Authorization': 'Bearer token-invalido'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_async_todo_batch(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+
+    response = async_client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': 'First'}, {'title': 'Second'}]},
+    )
+    ids = [r['id'] for r in response.json()['results']]
+
+    response = async_client.patch(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'id': ids[0], 'state': 'done'}]},
+    )
+    assert response.json()['results'][0]['todo']['state'] == 'done'
+
+    response = async_client.request(
+        'DELETE', '/todo/batch', headers=headers, json={'ids': ids}
+    )
+    assert [r['status'] for r in response.json()['results']] == [
+        'deleted',
+        'deleted',
+    ]
+
+
+def test_async_export_todos(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    async_client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': 'First'}, {'title': 'Second'}]},
+    )
+
+    response = async_client.get('/todo/export?format=csv', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.text.splitlines()[0] == (
+        'id,title,description,state,created_at,updated_at'
+    )
+    assert len(response.text.splitlines()) == 1 + 2
+
+
+def test_async_import_todos(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    content = '\n'.join(['{"title": "First"}', '{"state": "doing"}'])
+
+    response = async_client.post(
+        '/todo/import?chunk_size=1',
+        headers=headers,
+        files={'file': ('todos.ndjson', content.encode())},
+    )
+
+    assert response.json() == {
+        'imported': 1,
+        'failed': 1,
+        'errors': [{'line': 2, 'errors': ['title: Field required']}],
+    }
+
+
+def test_async_conditional_get(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    etag = async_client.get('/todo/', headers=headers).headers['etag']
+
+    response = async_client.get(
+        '/todo/', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    async_client.post('/todo/', headers=headers, json={'title': 'nova'})
+    response = async_client.get(
+        '/todo/', headers={**headers, 'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    etag = async_client.get('/users/1').headers['etag']
+    response = async_client.get('/users/1', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_async_todo_stats(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    todo_id = async_client.post(
+        '/todo/', headers=headers, json={'title': 'nova'}
+    ).json()['id']
+    async_client.patch(
+        f'/todo/{todo_id}', headers=headers, json={'state': 'done'}
+    )
+
+    data = async_client.get('/todo/stats', headers=headers).json()
+
+    assert data['total'] == 1
+    assert data['states']['done'] == 1
+    assert [(day['created'], day['done']) for day in data['days']] == [(1, 1)]
+
+
+def test_async_todo_changes(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    async_client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': 'a'}, {'title': 'b'}]},
+    )
+    cursor = async_client.get('/todo/changes', headers=headers).json()[
+        'next_cursor'
+    ]
+    async_client.patch('/todo/2', headers=headers, json={'state': 'done'})
+    async_client.delete('/todo/1', headers=headers)
+
+    data = async_client.get(
+        '/todo/changes', headers=headers, params={'since': cursor}
+    ).json()
+
+    assert [todo['id'] for todo in data['todos']] == [2]
+    assert data['deleted'] == [1]
+    assert data['has_more'] is False
+
+
+def test_async_writes_should_publish_todo_events(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+
+    async def main():
+        subscription = get_todo_events().subscribe(1)
+        try:
+            await asyncio.to_thread(
+                async_client.patch,
+                '/todo/batch',
+                headers=headers,
+                json={'todos': [{'id': 1, 'state': 'done'}]},
+            )
+            await asyncio.to_thread(
+                async_client.post,
+                '/todo/',
+                headers=headers,
+                json={'title': 'a'},
+            )
+            return await subscription.next(EVENT_TIMEOUT)
+        finally:
+            get_todo_events().unsubscribe(subscription)
+
+    event = asyncio.run(main())
+
+    # o patch não encontrou o todo 1: só a criação vira evento
+    assert event.type == 'created'
+    assert event.version == 1
+
+
+def test_async_empty_patch_should_keep_the_version(async_client, async_token):
+    headers = {'Authorization': f'Bearer {async_token}'}
+    todo_id = async_client.post(
+        '/todo/', headers=headers, json={'title': 'a'}
+    ).json()['id']
+    etag = async_client.get('/todo/', headers=headers).headers['etag']
+
+    async def main():
+        subscription = get_todo_events().subscribe(1)
+        try:
+            response = await asyncio.to_thread(
+                async_client.patch,
+                f'/todo/{todo_id}',
+                headers=headers,
+                json={},
+            )
+            return response, subscription.queue.empty()
+        finally:
+            get_todo_events().unsubscribe(subscription)
+
+    response, no_events = asyncio.run(main())
+
+    assert response.json()['title'] == 'a'
+    assert no_events
+    assert async_client.get('/todo/', headers=headers).headers['etag'] == etag
+
+
+def test_async_stream_should_return_429_over_connection_limit(
+    async_client, async_token, monkeypatch
+):
+    monkeypatch.setattr(get_todo_events(), 'max_connections_per_user', 0)
+
+    response = async_client.get(
+        '/todo/stream', headers={'Authorization': f'Bearer {async_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_async_writes_should_go_through_the_coalescer(
+    async_client, async_token, tmp_path
+):
+    # o escritor único usa o engine síncrono, no mesmo arquivo
+    engine = create_engine(f'sqlite:///{tmp_path / "async.db"}')
+    coalescer = WriteCoalescer(lambda: Session(engine), COALESCE_WINDOW, 64)
+    async_client.app.dependency_overrides[get_write_coalescer] = lambda: (
+        coalescer
+    )
+    headers = {'Authorization': f'Bearer {async_token}'}
+
+    created = async_client.post('/todo/', headers=headers, json={'title': 'a'})
+    updated = async_client.patch(
+        f'/todo/{created.json()["id"]}', headers=headers, json={'title': 'b'}
+    )
+    missing = async_client.patch(
+        '/todo/999', headers=headers, json={'title': 'c'}
+    )
+    coalescer.close()
+    engine.dispose()
+
+    assert created.status_code == HTTPStatus.OK
+    assert updated.json()['title'] == 'b'
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+    # requisições em sequência: um lote para cada
+    assert coalescer.batch_sizes.count == COALESCED_REQUESTS
@@ -1,6 +1,19 @@
+import re
+
+import pytest
 from sqlalchemy import select
 
-from fastapi_sincrono.models import User
+from fastapi_sincrono.models import Todo, TodoStatus, User
+from fastapi_sincrono.pagination import encode_cursor, paginate
+from fastapi_sincrono.queries import (
+    select_todo_changes,
+    select_user_todo,
+    select_user_todos,
+)
+from fastapi_sincrono.schemas import FilterPage, FilterTodo
+
+# `SCAN todos` sem índice significa leitura da tabela inteira
+FULL_SCAN = re.compile(r'^SCAN todos\b')
 
 
 def test_create_user(session):
@@ -14,3 +27,51 @@ def test_create_user(session):
     )  # registro no formato objeto scalar
 
     assert result.username == 'Rex'
+
+
+def query_plan(session, query):
+    compiled = query.compile(
+        dialect=session.bind.dialect, compile_kwargs={'literal_binds': True}
+    )
+    rows = session.connection().exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {compiled}'
+    )
+    return [row.detail for row in rows]
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        paginate(select_user_todos(1, FilterTodo()), Todo.id, FilterPage()),
+        paginate(
+            select_user_todos(1, FilterTodo(state=TodoStatus.doing)),
+            Todo.id,
+            FilterPage(cursor=encode_cursor(id=10)),
+        ),
+        paginate(
+            select_user_todos(1, FilterTodo(title='Buy')),
+            Todo.id,
+            FilterPage(skip=20),
+        ),
+        paginate(
+            select_user_todos(1, FilterTodo(q='buy groceries')),
+            Todo.id,
+            FilterPage(),
+            ranked=True,
+        ),
+        select_user_todo(1, 1),
+        select_todo_changes(1, (3, 10), 20, 100),
+    ],
+    ids=[
+        'list',
+        'list_by_state_cursor',
+        'list_by_title',
+        'search',
+        'get_by_id',
+        'changes',
+    ],
+)
+def test_todo_queries_should_not_scan_todos_table(session, query):
+    plan = query_plan(session, query)
+
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
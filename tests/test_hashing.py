@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Event
+
+import pytest
+from anyio import to_thread
+from fastapi import HTTPException
+
+from fastapi_sincrono import security
+from fastapi_sincrono.hashing import (
+    check_password,
+    create_hash_executor,
+    hash_password,
+)
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def blocked_executor():
+    executor = create_hash_executor('thread', workers=1, max_pending=1)
+    release = Event()
+    executor.submit(release.wait)
+    yield executor
+    release.set()
+    executor.shutdown()
+
+
+def test_hash_executor_should_reject_when_saturated(blocked_executor):
+    with pytest.raises(HTTPException) as exc_info:
+        blocked_executor.submit(hash_password, 'secret')
+
+    assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {'Retry-After': '1'}
+    assert blocked_executor.rejected == 1
+
+
+def test_hash_executor_should_free_slot_after_task():
+    executor = create_hash_executor('thread', workers=1, max_pending=1)
+
+    hashed = executor.run(hash_password, 'secret')
+
+    assert executor.run(check_password, 'secret', hashed)
+    executor.shutdown()
+
+
+def test_process_hash_executor_should_hash_and_verify():
+    executor = create_hash_executor('process', workers=1, max_pending=2)
+
+    hashed = executor.run(hash_password, 'secret')
+
+    assert executor.run(check_password, 'secret', hashed)
+    assert not executor.run(check_password, 'wrong', hashed)
+    executor.shutdown()
+
+
+def test_login_should_not_hold_a_threadpool_token_while_hashing(
+    client, user, monkeypatch
+):
+    executor = create_hash_executor('thread', workers=1, max_pending=2)
+    release, queued = Event(), Event()
+    executor.submit(release.wait)
+    submit = executor.submit
+
+    def submit_and_signal(fn, *args):
+        future = submit(fn, *args)
+        queued.set()
+        return future
+
+    monkeypatch.setattr(executor, 'submit', submit_and_signal)
+    monkeypatch.setattr(security, 'get_hash_executor', lambda: executor)
+
+    with ThreadPoolExecutor(1) as requests:
+        login = requests.submit(
+            client.post,
+            '/auth/token',
+            data={'username': user.username, 'password': user.clean_password},
+        )
+        queued.wait(TIMEOUT)
+        # o hash está na fila do executor: nenhuma rota no threadpool
+        borrowed = client.portal.call(
+            lambda: to_thread.current_default_thread_limiter().borrowed_tokens
+        )
+        release.set()
+        response = login.result(TIMEOUT)
+    executor.shutdown()
+
+    assert borrowed == 0
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_login_should_return_503_when_hashing_is_saturated(
+    client, user, blocked_executor, monkeypatch
+):
+    monkeypatch.setattr(
+        security, 'get_hash_executor', lambda: blocked_executor
+    )
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.username, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Server busy, try again later'}
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_cheap_routes_should_not_wait_for_hashing(
+    client, token, blocked_executor, monkeypatch
+):
+    monkeypatch.setattr(
+        security, 'get_hash_executor', lambda: blocked_executor
+    )
+
+    response = client.get(
+        '/todo/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,137 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from fastapi_sincrono.database import (
+    build_engine,
+    get_engine,
+    get_pool_options,
+)
+from fastapi_sincrono.pool_metrics import (
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from fastapi_sincrono.settings import Settings
+
+OVERFLOW_ENTRIES = 2
+
+
+@pytest.fixture
+def small_pool_engine(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_options_from_settings():
+    settings = Settings(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=7, DB_POOL_TIMEOUT=2)
+    options = get_pool_options(
+        settings, 'sqlite:///file.db', InstrumentedQueuePool
+    )
+
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_size'] == settings.DB_POOL_SIZE
+    assert options['max_overflow'] == settings.DB_MAX_OVERFLOW
+    assert options['pool_timeout'] == settings.DB_POOL_TIMEOUT
+
+
+def test_pool_options_for_sqlite_memory_skip_queue_settings():
+    options = get_pool_options(
+        Settings(), 'sqlite:///:memory:', InstrumentedQueuePool
+    )
+
+    assert options == {'pool_pre_ping': Settings().DB_POOL_PRE_PING}
+
+
+def test_pool_metrics_should_handle_sqlite_memory_pool():
+    # SingletonThreadPool: sem fila, e `size` não é um método
+    engine = build_engine(Settings(), 'sqlite:///:memory:')
+
+    with engine.connect() as connection:
+        snapshot = engine.pool.metrics.snapshot(engine.pool)
+        assert connection.exec_driver_sql('select 1').scalar() == 1
+
+    assert snapshot['pool_size'] == snapshot['checked_out'] == 0
+    assert snapshot['checkouts'] == 1
+    engine.dispose()
+
+
+def test_pool_metrics_count_checkouts_overflow_and_timeouts(
+    small_pool_engine,
+):
+    expected_checkouts = 2
+    expected_waits = 3
+    metrics = instrument_engine(small_pool_engine)
+
+    first = small_pool_engine.connect()
+    second = small_pool_engine.connect()  # usa o overflow
+    with pytest.raises(PoolTimeoutError):
+        small_pool_engine.connect()
+    first.close()
+    second.close()
+
+    stats = metrics.snapshot(small_pool_engine.pool)
+    assert stats['checkouts'] == expected_checkouts
+    assert stats['checkins'] == expected_checkouts
+    assert stats['overflow_hits'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['wait_count'] == expected_waits
+    assert stats['wait_histogram_ms']['le_inf'] == expected_waits
+    assert stats['checked_out'] == 0
+
+
+def test_pool_metrics_count_overflow_entries_once(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "overflow.db"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=2,
+    )
+    metrics = instrument_engine(engine)
+
+    # entra no overflow uma vez, mesmo com duas conexões além do pool
+    connections = [engine.connect() for _ in range(3)]
+    for connection in connections[1:]:
+        connection.close()
+    # volta ao tamanho do pool e entra de novo
+    engine.connect().close()
+    connections[0].close()
+
+    assert metrics.snapshot(engine.pool)['overflow_hits'] == OVERFLOW_ENTRIES
+    engine.dispose()
+
+
+def test_pool_metrics_count_invalidations(small_pool_engine):
+    metrics = instrument_engine(small_pool_engine)
+
+    with small_pool_engine.connect() as connection:
+        connection.invalidate()
+
+    assert metrics.snapshot(small_pool_engine.pool)['invalidations'] == 1
+
+
+def test_pool_metrics_survive_dispose(small_pool_engine):
+    metrics = instrument_engine(small_pool_engine)
+    small_pool_engine.dispose()
+
+    with small_pool_engine.connect():
+        pass
+
+    assert small_pool_engine.pool.metrics is metrics
+    assert metrics.snapshot(small_pool_engine.pool)['wait_count'] == 1
+
+
+def test_internal_pool_endpoint_should_list_created_engines(client):
+    get_engine()
+    response = client.get('/internal/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'sync' in response.json()['pools']
@@ -0,0 +1,207 @@
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from zoneinfo import ZoneInfo
+
+from jwt import encode
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.app import app
+from fastapi_sincrono.database import get_replica_router
+from fastapi_sincrono.models import Todo, User
+from fastapi_sincrono.replicas import (
+    LAST_WRITE_COOKIE,
+    ReplicaRouter,
+    WritePins,
+)
+from fastapi_sincrono.security import create_access_token
+from fastapi_sincrono.settings import get_settings
+from tests.conftest import TodoFactory
+
+USER_ID = 7
+PIN_SECONDS = 60
+
+
+def add_user(*engines):
+    # o mesmo usuário (id 1) em cada banco, como se já replicado
+    for engine in engines:
+        with Session(engine) as session:
+            session.add(User(username='rex', email='rex@x.com', password='x'))
+            session.commit()
+    return 1
+
+
+def add_todo(engine, user_id, title):
+    with Session(engine) as session:
+        session.add(TodoFactory(title=title, user_id=user_id))
+        session.commit()
+
+
+def stale_headers(user_id):
+    # token emitido há uma hora: fora da janela de leitura no primário
+    settings = get_settings()
+    now = datetime.now(tz=ZoneInfo('UTC'))
+    token = encode(
+        {
+            'sub': 'rex',
+            'uid': user_id,
+            'iat': now - timedelta(hours=1),
+            'exp': now + timedelta(hours=1),
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+def todo_titles(client, headers):
+    response = client.get('/todo/', headers=headers)
+    return [todo['title'] for todo in response.json()['todos']]
+
+
+def test_reads_should_use_replica(replica_client, replica_router):
+    [replica] = replica_router.replicas
+    user_id = add_user(replica_router.primary, replica)
+    add_todo(replica, user_id, 'replica todo')
+
+    assert todo_titles(replica_client, stale_headers(user_id)) == [
+        'replica todo'
+    ]
+    assert replica_client.get(f'/users/{user_id}').status_code == (
+        HTTPStatus.OK
+    )
+
+
+def test_write_should_go_to_primary_and_pin_reads(
+    replica_client, replica_router
+):
+    [replica] = replica_router.replicas
+    user_id = add_user(replica_router.primary, replica)
+    headers = stale_headers(user_id)
+
+    replica_client.post('/todo/', headers=headers, json={'title': 'new'})
+
+    with Session(replica) as session:
+        assert session.scalar(select(Todo)) is None
+    # a réplica ainda não tem o todo, mas quem escreveu lê do primário
+    assert todo_titles(replica_client, headers) == ['new']
+
+
+def test_write_should_pin_user_without_cookies(replica_client, replica_router):
+    [replica] = replica_router.replicas
+    user_id = add_user(replica_router.primary, replica)
+    headers = stale_headers(user_id)
+
+    response = replica_client.post(
+        '/todo/', headers=headers, json={'title': 'new'}
+    )
+    # cliente sem cookies, atendido por outro worker: um router novo que
+    # só compartilha a tabela de pinos
+    replica_client.cookies.clear()
+    app.dependency_overrides[get_replica_router] = lambda: ReplicaRouter(
+        replica_router.primary,
+        [replica],
+        replica_router.pin_seconds,
+        replica_router.pins,
+    )
+
+    assert LAST_WRITE_COOKIE in response.cookies
+    assert todo_titles(replica_client, headers) == ['new']
+    assert replica_router.pins.is_pinned(user_id)
+
+
+def test_write_cookie_should_pin_reads(replica_client, replica_router):
+    [replica] = replica_router.replicas
+    user_id = add_user(replica_router.primary, replica)
+
+    replica_client.post(
+        '/todo/', headers=stale_headers(user_id), json={'title': 'new'}
+    )
+    replica_router.pins = WritePins()
+
+    # sem pino (outra máquina): o cookie ainda leva ao primário
+    assert todo_titles(replica_client, stale_headers(user_id)) == ['new']
+    replica_client.cookies.clear()
+    assert todo_titles(replica_client, stale_headers(user_id)) == []
+
+
+def test_login_should_not_pin_reads(replica_client, replica_router):
+    replica_client.post(
+        '/users/',
+        json={'username': 'rex', 'email': 'rex@x.com', 'password': 'secret'},
+    )
+    replica_client.cookies.clear()
+
+    response = replica_client.post(
+        '/auth/token', data={'username': 'rex', 'password': 'secret'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert LAST_WRITE_COOKIE not in response.cookies
+    assert not replica_router.pins.is_pinned(1)
+
+
+def test_write_pins_should_be_shared_with_forked_workers():
+    pins = WritePins()
+    worker = multiprocessing.get_context('fork').Process(
+        target=pins.pin, args=(USER_ID, time.time() + PIN_SECONDS)
+    )
+    worker.start()
+    worker.join()
+
+    assert pins.is_pinned(USER_ID)
+    assert not pins.is_pinned(USER_ID + pins.slots)
+    assert not pins.is_pinned(None)
+
+
+def test_failed_write_should_not_set_cookie(replica_client, replica_router):
+    user_id = add_user(replica_router.primary, *replica_router.replicas)
+
+    response = replica_client.patch(
+        '/todo/1', headers=stale_headers(user_id), json={'title': 'x'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert LAST_WRITE_COOKIE not in response.cookies
+
+
+def test_pin_should_expire(replica_client, replica_router):
+    replica_router.pin_seconds = 0
+    user_id = add_user(replica_router.primary, *replica_router.replicas)
+    headers = stale_headers(user_id)
+
+    replica_client.post('/todo/', headers=headers, json={'title': 'new'})
+
+    assert todo_titles(replica_client, headers) == []
+
+
+def test_fresh_token_should_read_from_primary(replica_client):
+    # cadastro e login no primário; a réplica ainda não tem o usuário
+    replica_client.post(
+        '/users/',
+        json={'username': 'rex', 'email': 'rex@x.com', 'password': 'secret'},
+    )
+    token = create_access_token({'sub': 'rex', 'uid': 1})
+
+    response = replica_client.get(
+        '/todo/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_replica_router_should_rotate_replicas_and_keep_writes_on_primary():
+    router = ReplicaRouter('primary', ['replica0', 'replica1'])
+
+    reads = [router.engine_for('GET') for _ in range(4)]
+
+    assert reads == ['replica0', 'replica1', 'replica0', 'replica1']
+    assert router.engine_for('POST') == 'primary'
+
+
+def test_replica_router_without_replicas_should_use_primary():
+    router = ReplicaRouter('primary')
+
+    assert router.engine_for('GET') == 'primary'
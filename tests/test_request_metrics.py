@@ -0,0 +1,141 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from fastapi_sincrono.request_metrics import (
+    Histogram,
+    MetricsMiddleware,
+    QueryBudget,
+    QueryBudgetExceeded,
+    QueryPolicy,
+    RequestMetrics,
+    get_query_policy,
+    params_shape,
+)
+
+
+def sample_value(metrics_text: str, sample: str) -> float:
+    match = re.search(rf'^{re.escape(sample)} (\S+)$', metrics_text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_server_timing_should_report_db_queries(client, user):
+    response = client.get(f'/users/{user.id}')
+
+    server_timing = response.headers['server-timing']
+    assert re.match(
+        r'db;dur=[\d.]+;desc="1 queries", app;dur=[\d.]+$', server_timing
+    )
+
+
+def test_metrics_should_count_requests_by_route_template(client, user):
+    sample = (
+        'http_requests_total{method="GET",route="/users/{user_id}",'
+        'status="200"}'
+    )
+    before = sample_value(client.get('/metrics').text, sample)
+
+    client.get(f'/users/{user.id}')
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert sample_value(response.text, sample) == before + 1
+    # a própria requisição de /metrics está em andamento
+    assert sample_value(response.text, 'http_requests_in_flight') == 1
+
+
+def test_metrics_should_record_db_time_and_unmatched_routes(client, user):
+    client.get(f'/users/{user.id}')
+    client.get('/does-not-exist')
+
+    text = client.get('/metrics').text
+
+    assert sample_value(
+        text,
+        'http_request_db_queries_count{method="GET",route="/users/{user_id}"}',
+    )
+    assert 'http_request_db_seconds_total{method="GET"' in text
+    assert 'route="unmatched",status="404"' in text
+    assert 'db_pool_wait_milliseconds_bucket{pool="sync",le="+Inf"}' in text
+
+
+def test_histogram_buckets_should_be_cumulative():
+    histogram = Histogram((1, 5))
+    values = (0.5, 1, 3, 10)
+    for value in values:
+        histogram.observe(value)
+
+    assert list(histogram.cumulative()) == [('1', 2), ('5', 3), ('+Inf', 4)]
+    assert histogram.sum == sum(values)
+
+
+@pytest.fixture
+def budget_app(session):
+    def make(policy: QueryPolicy):
+        app = FastAPI()
+        app.add_middleware(
+            MetricsMiddleware, metrics=RequestMetrics(), policy=policy
+        )
+
+        @app.get('/loop/{times}')
+        def loop(times: int):
+            for _ in range(times):
+                session.execute(text('SELECT 1'))
+
+        @app.get(
+            '/unlimited/{times}',
+            dependencies=[Depends(QueryBudget())],
+        )
+        def unlimited(times: int):
+            loop(times)
+
+        return TestClient(app)
+
+    return make
+
+
+def test_query_budget_strict_should_fail_on_repeated_statement(budget_app):
+    client = budget_app(
+        QueryPolicy(budget=QueryBudget(max_repeats=2), strict=True)
+    )
+
+    assert client.get('/loop/2').status_code == HTTPStatus.OK
+    with pytest.raises(QueryBudgetExceeded, match='possible N\\+1'):
+        client.get('/loop/3')
+
+
+def test_query_budget_should_log_warning_when_not_strict(budget_app, caplog):
+    client = budget_app(QueryPolicy(budget=QueryBudget(max_queries=1)))
+
+    response = client.get('/loop/2')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'GET /loop/{times}: 2 queries (budget 1)' in caplog.text
+
+
+def test_query_budget_dependency_should_override_default(budget_app):
+    client = budget_app(QueryPolicy(budget=QueryBudget(1, 1), strict=True))
+
+    assert client.get('/unlimited/5').status_code == HTTPStatus.OK
+
+
+def test_slow_query_log_should_have_route_and_params_shape(
+    client, user, caplog, monkeypatch
+):
+    monkeypatch.setattr(get_query_policy(), 'slow_query_ms', 0)
+
+    client.get(f'/users/{user.id}')
+
+    assert 'route=/users/{user_id} params=tuple[1]' in caplog.text
+    assert 'sql=SELECT users.id' in caplog.text
+
+
+def test_params_shape_should_hide_values():
+    assert params_shape(('secret', 1)) == 'tuple[2]'
+    assert params_shape([('a', 1), ('b', 2)]) == '2 x tuple[2]'
+    assert params_shape({'title': 'x'}) == 'dict[title]'
@@ -1,9 +1,13 @@
 from http import HTTPStatus
 
+import pytest
 from freezegun import freeze_time
 from jwt import decode
+from sqlalchemy import delete
 
-from fastapi_sincrono.security import create_access_token
+from fastapi_sincrono.identity_cache import IdentityCache
+from fastapi_sincrono.models import User
+from fastapi_sincrono.security import create_access_token, get_identity_cache
 
 
 def test_create_access_token(settings):
@@ -83,3 +87,113 @@ def test_refresh_token_after_expired(client, user):
 
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_access_token_should_carry_user_id(client, user, token, settings):
+    result = decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+
+    assert result['uid'] == user.id
+
+
+def test_current_user_should_be_served_from_identity_cache(
+    client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.get('/todo/', headers=headers)
+    client.get('/todo/', headers=headers)
+    stats = client.get('/internal/identity-cache').json()
+
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['size'] == 1
+
+
+def test_update_user_should_invalidate_identity_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todo/', headers=headers)
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'Renamed',
+            'email': user.email,
+            'password': user.clean_password,
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert get_identity_cache().stats()['invalidations'] == 1
+
+    # o token antigo tem o username antigo no `sub`
+    response = client.get('/todo/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_should_invalidate_identity_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todo/', headers=headers)
+
+    client.delete(f'/users/{user.id}', headers=headers)
+    response = client.get('/todo/', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    'write',
+    [
+        ('POST', '/todo/', {'title': 'nova'}),
+        ('PATCH', '/todo/1', {'title': 'nova'}),
+        ('DELETE', '/todo/1', None),
+    ],
+    ids=['create', 'update', 'delete'],
+)
+def test_write_should_return_401_when_cached_user_is_gone(
+    client, session, user, token, write
+):
+    method, path, body = write
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todo/', headers=headers)
+    # removido por outro worker: o cache deste processo não sabe
+    session.execute(delete(User).where(User.id == user.id))
+    session.commit()
+
+    response = client.request(method, path, headers=headers, json=body)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert get_identity_cache().get(user.id) is None
+
+
+def test_token_without_user_id_should_still_authenticate(client, user):
+    token = create_access_token(data={'sub': user.username})
+
+    response = client.get(
+        '/todo/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_identity_cache_should_evict_least_recently_used():
+    cache = IdentityCache(maxsize=2, ttl=60)
+    cache.set(1, {'id': 1})
+    cache.set(2, {'id': 2})
+    cache.get(1)
+    cache.set(3, {'id': 3})
+
+    assert cache.get(2) is None
+    assert cache.get(1) == {'id': 1}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_identity_cache_entries_should_expire():
+    cache = IdentityCache(maxsize=2, ttl=60)
+
+    with freeze_time('2024-01-01 12:00:00') as frozen:
+        cache.set(1, {'id': 1})
+        frozen.tick(61)
+
+        assert cache.get(1) is None
@@ -0,0 +1,104 @@
+import time
+
+import anyio
+import pytest
+from anyio import to_thread
+
+from fastapi_sincrono import threadpool
+from fastapi_sincrono.settings import Settings
+from fastapi_sincrono.threadpool import (
+    ThreadpoolMetrics,
+    ThreadpoolMisconfigured,
+    check_threadpool,
+    configure_threadpool,
+    run_in_threadpool,
+    threadpool_tokens,
+)
+from tests.test_request_metrics import sample_value
+
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+BLOCKED_SECONDS = 0.05
+CALLS = 3
+
+
+def make_settings(**overrides):
+    return Settings(**{
+        'DATABASE_URL': 'sqlite:///database.db',
+        'DB_POOL_SIZE': POOL_SIZE,
+        'DB_MAX_OVERFLOW': MAX_OVERFLOW,
+        **overrides,
+    })
+
+
+def test_threadpool_tokens_should_default_to_pool_capacity():
+    assert threadpool_tokens(make_settings()) == POOL_SIZE + MAX_OVERFLOW
+    assert threadpool_tokens(make_settings(THREADPOOL_TOKENS=1)) == 1
+
+
+@pytest.mark.parametrize(
+    ('tokens', 'overrides', 'problem'),
+    [
+        (POOL_SIZE + MAX_OVERFLOW + 1, {}, 'block waiting for a connection'),
+        (POOL_SIZE - 1, {}, 'sit idle'),
+        (POOL_SIZE, {}, None),
+        (POOL_SIZE + MAX_OVERFLOW + 1, {'ASYNC_MODE': True}, None),
+        (1, {'DATABASE_URL': 'sqlite://'}, None),
+    ],
+)
+def test_check_threadpool_should_compare_with_pool(tokens, overrides, problem):
+    result = check_threadpool(make_settings(**overrides), tokens)
+
+    if problem is None:
+        assert result is None
+    else:
+        assert problem in result
+
+
+def test_configure_threadpool_should_raise_when_strict():
+    settings = make_settings(THREADPOOL_TOKENS=1, THREADPOOL_STRICT=True)
+
+    with pytest.raises(ThreadpoolMisconfigured):
+        configure_threadpool(settings, ThreadpoolMetrics())
+
+
+def test_run_in_threadpool_should_measure_token_wait(monkeypatch):
+    metrics = ThreadpoolMetrics()
+    monkeypatch.setattr(threadpool, 'threadpool_metrics', metrics)
+
+    async def main():
+        limiter = configure_threadpool(
+            make_settings(THREADPOOL_TOKENS=1), metrics
+        )
+        # o limiter padrão do event loop, ajustado pela API pública
+        assert to_thread.current_default_thread_limiter() is limiter
+        async with anyio.create_task_group() as group:
+            for _ in range(CALLS):
+                group.start_soon(
+                    run_in_threadpool, time.sleep, BLOCKED_SECONDS
+                )
+        return metrics.snapshot()
+
+    snapshot = anyio.run(main)
+
+    # com um token só, as chamadas esperam umas pelas outras
+    assert metrics.wait.count == CALLS
+    assert metrics.wait.sum >= BLOCKED_SECONDS * (CALLS - 1) * 0.9
+    assert snapshot == {'total_tokens': 1, 'in_use': 0, 'waiting': 0}
+
+
+def test_metrics_should_report_threadpool_gauges(client, user):
+    # o login consulta o banco por `run_in_threadpool`
+    client.post(
+        '/auth/token',
+        data={'username': user.username, 'password': user.clean_password},
+    )
+
+    text = client.get('/metrics').text
+
+    # sem QueuePool, o padrão do anyio: lido no event loop do cliente
+    expected_tokens = client.portal.call(threadpool_tokens, Settings())
+    assert sample_value(text, 'threadpool_tokens') == expected_tokens
+    assert sample_value(text, 'threadpool_tokens_in_use') == 0
+    assert sample_value(text, 'threadpool_waiting') == 0
+    assert sample_value(text, 'threadpool_wait_seconds_count') >= 1
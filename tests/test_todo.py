@@ -1,7 +1,27 @@
-from datetime import datetime
+import csv
+import io
+import json
+import math
+import re
+from datetime import date, datetime
 from http import HTTPStatus
 
-from fastapi_sincrono.models import TodoStatus
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import delete, event, func, select
+
+from fastapi_sincrono.export import EXPORT_CHUNK_SIZE
+from fastapi_sincrono.models import (
+    Todo,
+    TodoDailyCount,
+    TodoStateCount,
+    TodoStatus,
+    TodoTombstone,
+)
+from fastapi_sincrono.pagination import encode_cursor
+from fastapi_sincrono.schemas import MAX_BATCH_SIZE, TodoList
+from fastapi_sincrono.security import create_access_token
+from fastapi_sincrono.todo_stats import rebuild_todo_stats
 from tests.conftest import TodoFactory
 
 
@@ -47,6 +67,22 @@ def test_list_todos_should_return_5_todos(client, token, user, session):
     assert len(response.json()['todos']) == expected_todos
 
 
+def test_list_todos_should_match_todo_list_schema(
+    client, token, user, session
+):
+    todos = TodoFactory.create_batch(3, user_id=user.id)
+    session.add_all(todos)
+    session.commit()
+
+    response = client.get(
+        '/todo/',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    expected = TodoList.model_validate({'todos': todos})
+    assert response.content == expected.model_dump_json().encode()
+
+
 def test_list_todos_pagination_should_return_2_todos(
     client, token, user, session
 ):
@@ -193,3 +229,833 @@ def test_patch_todo_should_return_not_found_message(client, token):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Todo not found'}
+
+
+def test_patch_todo_without_fields_should_return_todo(
+    client, token, user, session
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+    etag = client.get('/todo/', headers=headers).headers['etag']
+
+    response = client.patch(f'/todo/{todo.id}', headers=headers, json={})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == todo.title
+    # nada mudou: a versão dos todos (e o ETag da lista) continua a mesma
+    assert client.get('/todo/', headers=headers).headers['etag'] == etag
+
+
+def test_todo_writes_should_use_one_statement_each(client, token, session):
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    headers = {'authorization': f'bearer {token}'}
+
+    todo_id = client.post(
+        '/todo/', headers=headers, json={'title': 'todo'}
+    ).json()['id']
+    client.patch(f'/todo/{todo_id}', headers=headers, json={'state': 'done'})
+    client.delete(f'/todo/{todo_id}', headers=headers)
+
+    # INSERT/UPDATE/DELETE ... RETURNING, sem SELECT antes ou depois
+    todo_statements = [
+        statement.split()[0]
+        for statement in statements
+        if re.search(r'\btodos\b', statement)
+    ]
+    assert todo_statements == ['INSERT', 'UPDATE', 'DELETE']
+
+
+def test_list_todos_cursor_should_walk_all_pages_in_order(
+    client, token, user, session
+):
+    expected_todos = 5
+    session.bulk_save_objects(
+        TodoFactory.create_batch(expected_todos, user_id=user.id)
+    )
+    session.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get(
+            '/todo/',
+            params=params,
+            headers={'authorization': f'bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        ids += [todo['id'] for todo in data['todos']]
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert ids == sorted(ids)
+    assert len(ids) == expected_todos
+
+
+def test_list_todos_last_page_should_not_return_cursor(
+    client, token, user, session
+):
+    session.bulk_save_objects(TodoFactory.create_batch(2, user_id=user.id))
+    session.commit()
+
+    response = client.get(
+        '/todo/?limit=2',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_todos_invalid_cursor_should_return_400(client, token):
+    response = client.get(
+        '/todo/?cursor=not-a-cursor',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_list_todos_limit_above_max_should_return_422(client, token):
+    response = client.get(
+        '/todo/?limit=1000000',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_list_todos_search_should_return_ranked_matches(
+    client, token, user, session
+):
+    session.bulk_save_objects([
+        TodoFactory(user_id=user.id, title='Pay bills', description='rent'),
+        TodoFactory(
+            user_id=user.id,
+            title='Groceries groceries',
+            description='buy groceries',
+        ),
+        TodoFactory(user_id=user.id, title='Groceries', description='milk'),
+    ])
+    session.commit()
+
+    response = client.get(
+        '/todo/?q=grocer',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    titles = [todo['title'] for todo in response.json()['todos']]
+    assert titles == ['Groceries groceries', 'Groceries']
+
+
+def test_list_todos_search_should_follow_updates_and_deletes(
+    client, token, user, session
+):
+    todo = TodoFactory(user_id=user.id, title='Old title', description=None)
+    session.add(todo)
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+
+    client.patch(f'/todo/{todo.id}', headers=headers, json={'title': 'New'})
+    assert client.get('/todo/?q=old', headers=headers).json()['todos'] == []
+    assert len(client.get('/todo/?q=new', headers=headers).json()['todos'])
+
+    client.delete(f'/todo/{todo.id}', headers=headers)
+    assert client.get('/todo/?q=new', headers=headers).json()['todos'] == []
+
+
+def test_list_todos_search_should_ignore_fts_syntax(client, token):
+    response = client.get(
+        '/todo/',
+        params={'q': 'a" OR title:* NEAR('},
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['todos'] == []
+
+
+def test_list_todos_search_cursor_should_walk_all_matches(
+    client, token, user, session
+):
+    expected_todos = 5
+    session.bulk_save_objects(
+        TodoFactory.build_batch(
+            expected_todos, user_id=user.id, title='Buy groceries'
+        )
+    )
+    session.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {
+            'q': 'buy',
+            'limit': 2,
+            **({'cursor': cursor} if cursor else {}),
+        }
+        data = client.get(
+            '/todo/',
+            params=params,
+            headers={'authorization': f'bearer {token}'},
+        ).json()
+        ids += [todo['id'] for todo in data['todos']]
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert len(set(ids)) == expected_todos
+
+
+def test_search_cursor_should_start_after_skip(client, token, user, session):
+    expected_todos, skip = 5, 1
+    session.bulk_save_objects(
+        TodoFactory.build_batch(
+            expected_todos, user_id=user.id, title='Buy groceries'
+        )
+    )
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+
+    first = client.get(
+        '/todo/',
+        params={'q': 'buy', 'skip': skip, 'limit': 2},
+        headers=headers,
+    ).json()
+    rest = client.get(
+        '/todo/',
+        params={
+            'q': 'buy',
+            'limit': expected_todos,
+            'cursor': first['next_cursor'],
+        },
+        headers=headers,
+    ).json()
+    ids = [todo['id'] for todo in first['todos'] + rest['todos']]
+
+    # o skip conta uma vez só: nenhuma linha repetida nem pulada
+    assert len(set(ids)) == len(ids) == expected_todos - skip
+
+
+@pytest.mark.parametrize('q', [None, 'buy'])
+def test_list_todos_skip_with_cursor_should_return_400(client, token, q):
+    params = {'skip': 1, 'cursor': encode_cursor(offset=2, id=2)}
+    if q:
+        params['q'] = q
+
+    response = client.get(
+        '/todo/', params=params, headers={'authorization': f'bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'skip cannot be combined with cursor'}
+
+
+def test_create_todos_batch_should_return_created_todos(client, token):
+    response = client.post(
+        '/todo/batch',
+        headers={'authorization': f'bearer {token}'},
+        json={
+            'todos': [
+                {'title': 'First'},
+                {'title': 'Second', 'state': 'doing'},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert [r['status'] for r in results] == ['created', 'created']
+    assert [r['todo']['title'] for r in results] == ['First', 'Second']
+    assert [r['id'] for r in results] == [1, 2]
+    assert results[1]['todo']['state'] == 'doing'
+
+
+def test_create_todos_batch_should_use_one_insert(client, token, session):
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    client.post(
+        '/todo/batch',
+        headers={'authorization': f'bearer {token}'},
+        json={'todos': [{'title': f'todo {i}'} for i in range(50)]},
+    )
+
+    inserts = [s for s in statements if s.startswith('INSERT INTO todos')]
+    assert len(inserts) == 1
+
+
+def test_create_todos_batch_above_max_size_should_return_422(client, token):
+    response = client.post(
+        '/todo/batch',
+        headers={'authorization': f'bearer {token}'},
+        json={'todos': [{'title': 'x'}] * (MAX_BATCH_SIZE + 1)},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_update_todos_batch_should_report_each_item(
+    client, token, user, other_user, session
+):
+    mine = TodoFactory(user_id=user.id, state=TodoStatus.pending)
+    others = TodoFactory(user_id=other_user.id)
+    session.add_all([mine, others])
+    session.commit()
+
+    response = client.patch(
+        '/todo/batch',
+        headers={'authorization': f'bearer {token}'},
+        json={
+            'todos': [
+                {'id': mine.id, 'state': 'done'},
+                {'id': others.id, 'state': 'done'},
+                {'id': 9999, 'title': 'nope'},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert [r['status'] for r in results] == [
+        'updated',
+        'not_found',
+        'not_found',
+    ]
+    assert results[0]['todo']['state'] == 'done'
+    assert results[0]['todo']['title'] == mine.title
+
+
+def test_delete_todos_batch_should_report_each_item(
+    client, token, user, other_user, session
+):
+    mine = TodoFactory(user_id=user.id)
+    others = TodoFactory(user_id=other_user.id)
+    session.add_all([mine, others])
+    session.commit()
+
+    response = client.request(
+        'DELETE',
+        '/todo/batch',
+        headers={'authorization': f'bearer {token}'},
+        json={'ids': [mine.id, others.id]},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'results': [
+            {'id': mine.id, 'status': 'deleted', 'todo': None},
+            {'id': others.id, 'status': 'not_found', 'todo': None},
+        ]
+    }
+    assert session.scalar(select(Todo).where(Todo.id == others.id))
+
+
+def test_export_todos_ndjson_should_stream_only_user_todos(
+    client, token, user, other_user, session
+):
+    expected_todos = 3
+    session.bulk_save_objects([
+        *TodoFactory.build_batch(expected_todos, user_id=user.id),
+        *TodoFactory.build_batch(2, user_id=other_user.id),
+    ])
+    session.commit()
+
+    response = client.get(
+        '/todo/export', headers={'authorization': f'bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == expected_todos
+    assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+    assert set(rows[0]) == {
+        'id',
+        'title',
+        'description',
+        'state',
+        'created_at',
+        'updated_at',
+    }
+
+
+def test_export_todos_csv_should_have_header_and_rows(
+    client, token, user, session
+):
+    todo = TodoFactory(user_id=user.id, title='Hello, "world"')
+    session.add(todo)
+    session.commit()
+
+    response = client.get(
+        '/todo/export?format=csv',
+        headers={'authorization': f'bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'Hello, "world"'
+    assert rows[0]['state'] == todo.state.value
+
+
+def test_export_todos_should_stream_in_chunks(client, token, user, session):
+    total = EXPORT_CHUNK_SIZE * 2 + 1
+    session.bulk_save_objects(TodoFactory.build_batch(total, user_id=user.id))
+    session.commit()
+
+    with client.stream(
+        'GET', '/todo/export', headers={'authorization': f'bearer {token}'}
+    ) as response:
+        chunks = list(response.iter_text())
+
+    assert sum(chunk.count('\n') for chunk in chunks) == total
+
+
+def test_import_todos_ndjson_should_report_row_errors(client, token, user):
+    lines = [
+        json.dumps({'title': 'First'}),
+        '',
+        json.dumps({'title': 'Second', 'state': 'doing'}),
+        '{not json',
+        json.dumps({'description': 'no title'}),
+        json.dumps({'title': 'Bad state', 'state': 'sleeping'}),
+    ]
+
+    response = client.post(
+        '/todo/import',
+        headers={'authorization': f'bearer {token}'},
+        files={'file': ('todos.ndjson', '\n'.join(lines).encode())},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    summary = response.json()
+    assert (summary['imported'], summary['failed']) == (2, 3)
+    assert [error['line'] for error in summary['errors']] == [4, 5, 6]
+    assert summary['errors'][0]['errors'] == ['Invalid JSON']
+    assert summary['errors'][1]['errors'] == ['title: Field required']
+
+    response = client.get(
+        '/todo/', headers={'authorization': f'bearer {token}'}
+    )
+    titles = [todo['title'] for todo in response.json()['todos']]
+    assert titles == ['First', 'Second']
+
+
+def test_import_todos_csv_should_accept_export_output(
+    client, token, user, session
+):
+    expected_todos = 3
+    session.bulk_save_objects(
+        TodoFactory.build_batch(expected_todos, user_id=user.id)
+    )
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+    exported = client.get('/todo/export?format=csv', headers=headers).text
+
+    response = client.post(
+        '/todo/import?format=csv',
+        headers=headers,
+        files={'file': ('todos.csv', exported.encode())},
+    )
+
+    assert response.json() == {
+        'imported': expected_todos,
+        'failed': 0,
+        'errors': [],
+    }
+
+
+def test_import_todos_should_insert_in_chunks(client, token, session):
+    total, chunk_size = 25, 10
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    content = '\n'.join(
+        json.dumps({'title': f'todo {i}'}) for i in range(total)
+    )
+
+    response = client.post(
+        f'/todo/import?chunk_size={chunk_size}&commit_every=2',
+        headers={'authorization': f'bearer {token}'},
+        files={'file': ('todos.ndjson', content.encode())},
+    )
+
+    assert response.json()['imported'] == total
+    inserts = [s for s in statements if s.startswith('INSERT INTO todos')]
+    assert len(inserts) == math.ceil(total / chunk_size)
+
+
+def test_import_todos_should_report_invalid_encoding_per_line(client, token):
+    content = b'{"title": "ok"}\n\xff\xfe\n{"title": "also ok"}\n'
+
+    response = client.post(
+        '/todo/import',
+        headers={'authorization': f'bearer {token}'},
+        files={'file': ('todos.ndjson', content)},
+    )
+
+    assert response.json() == {
+        'imported': 2,
+        'failed': 1,
+        'errors': [{'line': 2, 'errors': ['Invalid UTF-8']}],
+    }
+
+
+def test_import_todos_csv_should_stop_on_invalid_encoding(client, token):
+    content = b'title,state\nok,doing\n\xff\xfe,done\n'
+
+    response = client.post(
+        '/todo/import?format=csv',
+        headers={'authorization': f'bearer {token}'},
+        files={'file': ('todos.csv', content)},
+    )
+
+    assert response.json() == {
+        'imported': 1,
+        'failed': 1,
+        'errors': [{'line': 3, 'errors': ['File is not valid UTF-8']}],
+    }
+
+
+def test_list_todos_with_etag_should_return_304_without_loading_todos(
+    client, token, user, session
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+    etag = client.get('/todo/', headers=headers).headers['etag']
+
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    response = client.get('/todo/', headers={**headers, 'if-none-match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.content
+    assert not [s for s in statements if 'FROM todos' in s]
+
+
+def test_list_todos_etag_should_change_after_writes(client, token, session):
+    headers = {'authorization': f'bearer {token}'}
+    etag = client.get('/todo/', headers=headers).headers['etag']
+
+    todo_id = client.post(
+        '/todo/', headers=headers, json={'title': 'nova'}
+    ).json()['id']
+    response = client.get('/todo/', headers={**headers, 'if-none-match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['todos']) == 1
+    etag = response.headers['etag']
+
+    client.delete(f'/todo/{todo_id}', headers=headers)
+    response = client.get('/todo/', headers={**headers, 'if-none-match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['todos'] == []
+
+
+def test_list_todos_etag_should_depend_on_query(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    etag = client.get('/todo/', headers=headers).headers['etag']
+
+    response = client.get(
+        '/todo/?title=x', headers={**headers, 'if-none-match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+
+
+def test_todo_stats_should_follow_writes(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': f'todo {i}'} for i in range(3)]},
+    )
+    todo_id = client.post(
+        '/todo/', headers=headers, json={'title': 'x', 'state': 'doing'}
+    ).json()['id']
+    client.patch(f'/todo/{todo_id}', headers=headers, json={'state': 'done'})
+    client.delete('/todo/1', headers=headers)
+
+    response = client.get('/todo/stats', headers=headers)
+
+    expected_total = 3
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert data['total'] == expected_total
+    assert data['states'] == {
+        'pending': 2,
+        'draft': 0,
+        'doing': 0,
+        'done': 1,
+        'trash': 0,
+    }
+    [today] = data['days']
+    assert today['created'] == expected_total
+    assert today['done'] == 1
+
+
+def test_todo_stats_etag_should_change_at_midnight(client, user):
+    def get_stats(etag=None):
+        token = create_access_token({'sub': user.username, 'uid': user.id})
+        headers = {'authorization': f'bearer {token}'}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        return client.get('/todo/stats', headers=headers)
+
+    with freeze_time('2024-01-01 23:59:00'):
+        etag = get_stats().headers['etag']
+        assert get_stats(etag).status_code == HTTPStatus.NOT_MODIFIED
+
+    # sem escritas, mas a janela de dias andou
+    with freeze_time('2024-01-02 00:01:00'):
+        response = get_stats(etag)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+
+
+def test_todo_stats_should_not_read_todos_table(client, token, session):
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    client.get('/todo/stats', headers={'authorization': f'bearer {token}'})
+
+    assert not [s for s in statements if re.search(r'\btodos\b', s)]
+
+
+def test_todo_stats_etag_should_differ_from_list_etag(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    etag = client.get('/todo/', headers=headers).headers['etag']
+
+    response = client.get(
+        '/todo/stats', headers={**headers, 'if-none-match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_rebuild_todo_stats_should_match_todos(session, user, other_user):
+    user_todos = 5
+    todos = [
+        *TodoFactory.create_batch(user_todos, user_id=user.id),
+        *TodoFactory.create_batch(3, user_id=other_user.id),
+    ]
+    session.add_all(todos)
+    session.commit()
+    expected = session.execute(
+        select(Todo.user_id, Todo.state, func.count())
+        .group_by(Todo.user_id, Todo.state)
+        .order_by(Todo.user_id, Todo.state)
+    ).all()
+    # contadores corrompidos: só o usuário pedido é recalculado
+    session.execute(delete(TodoStateCount))
+    session.execute(delete(TodoDailyCount))
+
+    rebuild_todo_stats(session, user.id)
+    assert (
+        session.scalar(select(func.sum(TodoDailyCount.created)))
+        == len(todos) - 3
+    )
+
+    rebuild_todo_stats(session)
+    counts = session.execute(
+        select(
+            TodoStateCount.user_id, TodoStateCount.state, TodoStateCount.count
+        )
+        .where(TodoStateCount.count != 0)
+        .order_by(TodoStateCount.user_id, TodoStateCount.state)
+    ).all()
+    assert counts == expected
+    assert session.scalar(select(func.sum(TodoDailyCount.created))) == len(
+        todos
+    )
+
+
+def enforce_foreign_keys(session):
+    # o SQLite só aplica as FKs com o pragma; o PostgreSQL sempre aplica
+    session.connection().exec_driver_sql('PRAGMA foreign_keys=ON')
+
+
+def test_deleting_user_should_delete_todo_stats(session, user):
+    enforce_foreign_keys(session)
+    # linhas zeradas pelos triggers continuam na tabela
+    session.add_all([
+        TodoStateCount(user_id=user.id, state=TodoStatus.done),
+        TodoDailyCount(user_id=user.id, day=date.today()),
+    ])
+    session.commit()
+
+    session.delete(user)
+    session.commit()
+
+    assert session.scalar(select(func.count(TodoStateCount.user_id))) == 0
+    assert session.scalar(select(func.count(TodoDailyCount.user_id))) == 0
+
+
+def test_deleting_user_should_delete_tombstones(session, user):
+    enforce_foreign_keys(session)
+    session.add(TodoTombstone(id=1, user_id=user.id, version=1))
+    session.commit()
+
+    session.delete(user)
+    session.commit()
+
+    assert session.scalar(select(func.count(TodoTombstone.id))) == 0
+
+
+def sync_changes(client, headers, since=None, **params):
+    if since is not None:
+        params['since'] = since
+    response = client.get('/todo/changes', headers=headers, params=params)
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+def test_todo_changes_should_start_with_every_todo(
+    client, token, user, session
+):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    session.commit()
+    headers = {'authorization': f'bearer {token}'}
+    client.post('/todo/', headers=headers, json={'title': 'new'})
+
+    data = sync_changes(client, headers)
+
+    assert [todo['id'] for todo in data['todos']] == [1, 2, 3]
+    assert data['deleted'] == []
+    assert data['has_more'] is False
+
+
+def test_todo_changes_should_return_only_writes_after_cursor(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': f'todo {i}'} for i in range(3)]},
+    )
+    cursor = sync_changes(client, headers)['next_cursor']
+
+    client.patch('/todo/2', headers=headers, json={'state': 'done'})
+    client.delete('/todo/1', headers=headers)
+    client.post('/todo/', headers=headers, json={'title': 'new'})
+    data = sync_changes(client, headers, cursor)
+
+    assert [(todo['id'], todo['state']) for todo in data['todos']] == [
+        (2, 'done'),
+        (4, 'pending'),
+    ]
+    assert data['deleted'] == [1]
+
+    # em dia: nada novo e o mesmo cursor
+    caught_up = sync_changes(client, headers, data['next_cursor'])
+    assert caught_up == {
+        'todos': [],
+        'deleted': [],
+        'next_cursor': data['next_cursor'],
+        'has_more': False,
+    }
+
+
+def test_todo_changes_should_page_inside_one_version(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    total = 5
+    # o lote inteiro tem a mesma versão: a página avança pelo id
+    client.post(
+        '/todo/batch',
+        headers=headers,
+        json={'todos': [{'title': f'todo {i}'} for i in range(total)]},
+    )
+    cursor = sync_changes(client, headers)['next_cursor']
+    client.request('DELETE', '/todo/batch', headers=headers, json={'ids': [1]})
+    client.patch(
+        '/todo/batch',
+        headers=headers,
+        json={
+            'todos': [
+                {'id': todo_id, 'title': 'edited'}
+                for todo_id in range(2, total + 1)
+            ]
+        },
+    )
+
+    seen, deleted, pages = [], [], 0
+    while True:
+        data = sync_changes(client, headers, cursor, limit=2)
+        seen += [todo['id'] for todo in data['todos']]
+        deleted += data['deleted']
+        cursor, pages = data['next_cursor'], pages + 1
+        if not data['has_more']:
+            break
+
+    assert seen == list(range(2, total + 1))
+    assert deleted == [1]
+    assert pages == math.ceil((total - 1) / 2)
+
+
+def test_todo_changes_should_see_imported_todos(client, token):
+    headers = {'authorization': f'bearer {token}'}
+    cursor = sync_changes(client, headers)['next_cursor']
+    client.post(
+        '/todo/import',
+        headers=headers,
+        files={'file': ('todos.ndjson', b'{"title": "a"}\n{"title": "b"}\n')},
+    )
+
+    data = sync_changes(client, headers, cursor)
+
+    assert [todo['title'] for todo in data['todos']] == ['a', 'b']
+
+
+def test_todo_changes_should_keep_other_users_apart(
+    client, token, other_user, session
+):
+    session.add(TodoFactory(user_id=other_user.id))
+    session.commit()
+    session.delete(session.scalar(select(Todo)))
+    session.commit()
+
+    data = sync_changes(
+        client, {'authorization': f'bearer {token}'}, since=None
+    )
+
+    assert data['todos'] == []
+    assert session.scalar(select(TodoTombstone.user_id)) == other_user.id
+
+
+def test_todo_changes_invalid_cursor_should_return_400(client, token):
+    response = client.get(
+        '/todo/changes',
+        headers={'authorization': f'bearer {token}'},
+        params={'since': encode_cursor(id=1)},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
@@ -0,0 +1,204 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+from fastapi_sincrono.app import app
+from fastapi_sincrono.todo_events import (
+    CLOSE,
+    RESYNC,
+    TodoEvent,
+    TodoEventBus,
+    get_todo_events,
+)
+
+QUEUE_SIZE = 2
+MAX_CONNECTIONS = 2
+TIMEOUT = 5
+
+
+def make_bus(**overrides):
+    return TodoEventBus(**{
+        'max_connections_per_user': MAX_CONNECTIONS,
+        'queue_size': QUEUE_SIZE,
+        'heartbeat_seconds': TIMEOUT,
+        **overrides,
+    })
+
+
+def test_event_should_encode_as_server_sent_event():
+    event = TodoEvent('created', b'{"id":1}', version=3)
+
+    assert event.encode() == b'id: 3\nevent: created\ndata: {"id":1}\n\n'
+    assert RESYNC.encode() == b'event: resync\ndata: {}\n\n'
+
+
+def test_bus_should_deliver_events_published_from_threads():
+    bus = make_bus()
+
+    async def main():
+        subscription = bus.subscribe(1)
+        other = bus.subscribe(2)
+        # rotas `def` publicam de uma thread do threadpool
+        await asyncio.to_thread(bus.publish_deleted, 1, 7, 4)
+        event = await subscription.next(TIMEOUT)
+        assert other.queue.empty()
+        return event
+
+    event = asyncio.run(main())
+
+    assert event == TodoEvent('deleted', b'{"id":7}', 4)
+    assert bus.counts['published'] == 1
+
+
+def test_bus_should_resync_slow_consumers():
+    bus = make_bus()
+
+    async def main():
+        subscription = bus.subscribe(1)
+        for version in range(QUEUE_SIZE + 1):
+            bus.publish_deleted(1, version, version)
+        await asyncio.sleep(0)
+        events = [subscription.queue.get_nowait()]
+        assert subscription.queue.empty()
+        bus.unsubscribe(subscription)
+        return events
+
+    # o pendente é descartado: o cliente busca o delta em /todo/changes
+    assert asyncio.run(main()) == [RESYNC]
+    assert bus.counts['overflows'] == 1
+
+
+def test_bus_should_cap_connections_per_user():
+    bus = make_bus()
+
+    async def main():
+        subscriptions = [bus.subscribe(1) for _ in range(MAX_CONNECTIONS)]
+        assert bus.subscribe(1) is None
+        assert bus.subscribe(2) is not None
+
+        bus.unsubscribe(subscriptions[0])
+        assert bus.subscribe(1) is not None
+
+    asyncio.run(main())
+
+    assert bus.counts['rejected'] == 1
+
+
+def test_bus_close_should_end_streams():
+    bus = make_bus()
+
+    async def main():
+        subscription = bus.subscribe(1)
+        bus.close()
+        return [chunk async for chunk in bus.stream(subscription)]
+
+    assert asyncio.run(main()) == [b'retry: 3000\n\n']
+
+
+def stream_scope(token):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/todo/stream',
+        'raw_path': b'/todo/stream',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'authorization', f'Bearer {token}'.encode())],
+        'client': ('testclient', 50000),
+        'server': ('testserver', 80),
+    }
+
+
+def read_event(chunk: bytes) -> dict:
+    fields = dict(
+        line.split(': ', 1) for line in chunk.decode().strip().splitlines()
+    )
+    return {**fields, 'data': json.loads(fields['data'])}
+
+
+def test_stream_should_push_writes_after_commit(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    async def main():
+        messages = asyncio.Queue()
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def next_body():
+            message = await asyncio.wait_for(messages.get(), TIMEOUT)
+            return message['body']
+
+        # o stream roda neste event loop; as escritas, no do TestClient
+        task = asyncio.create_task(
+            app(stream_scope(token), receive, messages.put)
+        )
+        start = await asyncio.wait_for(messages.get(), TIMEOUT)
+        retry = await next_body()
+
+        response = await asyncio.to_thread(
+            client.post, '/todo/', headers=headers, json={'title': 'nova'}
+        )
+        created = await next_body()
+        await asyncio.to_thread(
+            client.delete, f'/todo/{response.json()["id"]}', headers=headers
+        )
+        deleted = await next_body()
+
+        disconnect.set()
+        get_todo_events().close()
+        await asyncio.wait_for(task, TIMEOUT)
+        return start, retry, read_event(created), read_event(deleted)
+
+    start, retry, created, deleted = asyncio.run(main())
+
+    assert start['status'] == HTTPStatus.OK
+    assert (b'content-type', b'text/event-stream; charset=utf-8') in (
+        start['headers']
+    )
+    assert retry == b'retry: 3000\n\n'
+    assert created['event'] == 'created'
+    assert created['data']['title'] == 'nova'
+    assert deleted == {
+        'id': str(int(created['id']) + 1),
+        'event': 'deleted',
+        'data': {'id': created['data']['id']},
+    }
+    assert get_todo_events().connections() == 0
+
+
+def test_stream_should_return_429_over_connection_limit(
+    client, token, monkeypatch
+):
+    monkeypatch.setattr(get_todo_events(), 'max_connections_per_user', 0)
+
+    response = client.get(
+        '/todo/stream', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {'detail': 'Too many open streams'}
+
+
+def test_stream_should_require_authentication(client):
+    response = client.get('/todo/stream')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_close_sentinel_should_survive_overflow():
+    bus = make_bus(queue_size=1)
+
+    async def main():
+        subscription = bus.subscribe(1)
+        bus.publish(1, RESYNC)
+        bus.close()
+        await asyncio.sleep(0)
+        return subscription.queue.get_nowait()
+
+    assert asyncio.run(main()) is CLOSE
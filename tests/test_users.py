@@ -1,6 +1,12 @@
 from http import HTTPStatus
+from types import SimpleNamespace
 
-from fastapi_sincrono.schemas import UserPublic
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+
+from fastapi_sincrono.models import User
+from fastapi_sincrono.queries import unique_violation
+from fastapi_sincrono.schemas import UserList, UserPublic
 
 
 def test_create_user(client):
@@ -50,10 +56,39 @@ def test_create_user_when_username_already_exists_should_return_400(
     assert response.json() == {'detail': 'Username Already Exists'}
 
 
+def test_create_user_should_use_a_single_insert(client, session):
+    statements = []
+    event.listen(
+        session.bind,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    client.post(
+        '/users/',
+        json={
+            'username': 'Rex',
+            'email': 'Rex@example.com',
+            'password': '1234',
+        },
+    )
+
+    assert [statement.split()[0] for statement in statements] == ['INSERT']
+
+
+def test_unique_violation_should_read_postgres_constraint_name():
+    # psycopg: o nome da constraint vem em `diag`, não na mensagem
+    orig = Exception('Key (username)=(email) already exists.')
+    orig.diag = SimpleNamespace(constraint_name='users_username_key')
+    error = IntegrityError('INSERT', {}, orig)
+
+    assert unique_violation(error, ('email', 'username')) == 'username'
+
+
 def test_read_users(client):
     response = client.get('/users/')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
 
 
 def test_read_users_list(client, user):
@@ -62,7 +97,10 @@ def test_read_users_list(client, user):
 
     assert 'password' not in response.json()
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {
+        'users': [user_schema],
+        'next_cursor': None,
+    }
 
 
 def test_read_users_by_id(client, user):
@@ -147,3 +185,83 @@ def test_delete_user_when_not_owner_should_return_403(
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_read_users_with_cursor(client, user, other_user):
+    response = client.get('/users/?limit=1')
+    data = response.json()
+
+    assert [u['id'] for u in data['users']] == [user.id]
+    assert data['next_cursor']
+
+    response = client.get(f'/users/?limit=1&cursor={data["next_cursor"]}')
+    data = response.json()
+
+    assert [u['id'] for u in data['users']] == [other_user.id]
+    assert data['next_cursor'] is None
+
+
+def test_read_user_by_id_with_etag_should_return_304(client, user):
+    response = client.get(f'/users/{user.id}')
+    etag = response.headers['etag']
+
+    assert response.headers['last-modified']
+
+    response = client.get(f'/users/{user.id}', headers={'if-none-match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert not response.content
+
+
+def test_read_user_by_id_with_if_modified_since_should_return_304(
+    client, user
+):
+    response = client.get(f'/users/{user.id}')
+
+    response = client.get(
+        f'/users/{user.id}',
+        headers={'if-modified-since': response.headers['last-modified']},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_read_user_by_id_etag_should_change_after_update(client, user, token):
+    etag = client.get(f'/users/{user.id}').headers['etag']
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'renamed',
+            'email': user.email,
+            'password': user.clean_password,
+        },
+    )
+    response = client.get(f'/users/{user.id}', headers={'if-none-match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'renamed'
+    assert response.headers['etag'] != etag
+
+
+def test_read_users_should_serialize_like_user_list(client, session, user):
+    # caracteres que o JSON escapa ou que não são ASCII
+    session.add(
+        User(username='Zoë "q" \\ <b>', email='zoe@example.com', password='x')
+    )
+    session.commit()
+
+    for params in ({}, {'limit': 1}):
+        response = client.get('/users/', params=params)
+        users = session.scalars(
+            select(User).order_by(User.id).limit(params.get('limit'))
+        ).all()
+        expected = UserList(
+            users=[UserPublic.model_validate(u) for u in users],
+            next_cursor=response.json()['next_cursor'],
+        )
+
+        # o caminho rápido (dump_rows) não passa pelo UserList
+        assert response.content == expected.model_dump_json().encode()
@@ -0,0 +1,136 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+
+from fastapi_sincrono import warmup
+from fastapi_sincrono.warmup import (
+    Readiness,
+    preconnect_pool,
+    readiness,
+    warm_jwt,
+    warm_up_process,
+    warm_validators,
+)
+from main import worker_count
+
+ROOT = Path(__file__).parent.parent
+POOL_SIZE = 3
+WORKERS = 2
+CPUS = 8
+START_TIMEOUT = 30
+
+
+def test_warm_up_process_should_run_each_step_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, 'readiness', Readiness())
+    monkeypatch.setattr(
+        warmup,
+        'PROCESS_STEPS',
+        {'a': lambda: calls.append('a'), 'b': lambda: calls.append('b')},
+    )
+
+    warm_up_process()
+    warm_up_process()
+
+    assert calls == ['a', 'b']
+    assert set(warmup.readiness.steps) == {'a', 'b'}
+
+
+def test_warm_steps_should_run_without_errors():
+    warm_validators()
+    warm_jwt()
+
+
+def test_preconnect_pool_should_fill_the_pool(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}', pool_size=POOL_SIZE
+    )
+
+    assert preconnect_pool(engine, POOL_SIZE + 1) == POOL_SIZE
+    assert engine.pool.checkedin() == POOL_SIZE
+    engine.dispose()
+
+
+def test_preconnect_pool_should_open_one_connection_in_memory():
+    # SingletonThreadPool: `size` é um atributo, não o método do QueuePool
+    engine = create_engine('sqlite:///:memory:')
+
+    assert preconnect_pool(engine, POOL_SIZE) == 1
+    engine.dispose()
+
+
+def test_ready_should_return_503_until_warmed_up(client, monkeypatch):
+    monkeypatch.setattr(readiness, 'ready', False)
+    assert client.get('/internal/ready').status_code == (
+        HTTPStatus.SERVICE_UNAVAILABLE
+    )
+
+    monkeypatch.setattr(readiness, 'ready', True)
+    response = client.get('/internal/ready')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['ready'] is True
+
+
+@pytest.mark.parametrize(
+    ('url', 'expected'),
+    [
+        ('sqlite://', 1),
+        ('sqlite:///:memory:', 1),
+        ('sqlite:///database.db', CPUS),
+        ('postgresql+psycopg://app@db/app', CPUS),
+    ],
+)
+def test_worker_count_should_follow_cpus(url, expected):
+    assert worker_count(url, cpus=CPUS) == expected
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_main_should_become_ready_with_prefork_workers(tmp_path):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, 'main.py', '--port', str(port)],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            'DATABASE_URL': f'sqlite:///{tmp_path / "main.db"}',
+            'WEB_CONCURRENCY': str(WORKERS),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + START_TIMEOUT
+        response = None
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                response = httpx.get(f'http://127.0.0.1:{port}/internal/ready')
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        assert response is not None
+        assert response.status_code == HTTPStatus.OK
+        body = response.json()
+        assert set(body['steps_ms']) == {
+            'validators',
+            'jwt',
+            'password_hashing',
+        }
+        assert body['connections']['sync'] > 0
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=START_TIMEOUT) == 0
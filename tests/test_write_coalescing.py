@@ -0,0 +1,209 @@
+from http import HTTPStatus
+from typing import override
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from fastapi_sincrono.app import app
+from fastapi_sincrono.database import get_session
+from fastapi_sincrono.models import Todo, User, table_registry
+from fastapi_sincrono.schemas import TodoSchema
+from fastapi_sincrono.security import create_access_token, get_identity_cache
+from fastapi_sincrono.write_coalescing import (
+    WriteCoalescer,
+    create_todo_row,
+    get_write_coalescer,
+)
+
+WINDOW = 0.05
+WRITES = 5
+MAX_BATCH = 3
+# WRITES em lotes de até MAX_BATCH
+BATCHES = 2
+REQUESTS = 3
+POOL_TIMEOUT = 2
+
+
+def values(title):
+    return TodoSchema(title=title).model_dump()
+
+
+@pytest.fixture
+def coalescer(session):
+    coalescer = WriteCoalescer(lambda: Session(session.bind), WINDOW, 64)
+    yield coalescer
+    coalescer.close()
+
+
+def fail_after_insert(session, user_id):
+    create_todo_row(session, user_id, values('desfeito'))
+    raise ValueError('boom')
+
+
+def test_coalescer_should_commit_concurrent_writes_together(
+    coalescer, session, user
+):
+    futures = [
+        coalescer.submit_future(create_todo_row, user.id, values(str(n)))
+        for n in range(WRITES)
+    ]
+    results = [future.result() for future in futures]
+
+    # um lote, um commit
+    assert coalescer.batch_sizes.count == 1
+    assert coalescer.batch_sizes.sum == WRITES
+    # cada escrita tem a própria versão, na ordem de chegada
+    assert [version for _, version in results] == list(range(1, WRITES + 1))
+    assert session.scalar(select(func.count(Todo.id))) == WRITES
+
+
+def test_coalescer_should_isolate_failing_write(coalescer, session, user):
+    futures = [
+        coalescer.submit_future(create_todo_row, user.id, values('antes')),
+        coalescer.submit_future(fail_after_insert, user.id),
+        coalescer.submit_future(create_todo_row, user.id, values('depois')),
+    ]
+
+    with pytest.raises(ValueError, match='boom'):
+        futures[1].result()
+    # o lote é refeito sem a escrita que falhou: versões sem buracos
+    assert [futures[0].result()[1], futures[2].result()[1]] == [1, 2]
+    assert session.scalars(select(Todo.title)).all() == ['antes', 'depois']
+    assert coalescer.batch_sizes.count == 1
+
+
+def test_coalescer_should_cap_batch_size(session, user):
+    coalescer = WriteCoalescer(
+        lambda: Session(session.bind), WINDOW, MAX_BATCH
+    )
+    futures = [
+        coalescer.submit_future(create_todo_row, user.id, values(str(n)))
+        for n in range(WRITES)
+    ]
+    for future in futures:
+        future.result()
+    coalescer.close()
+
+    assert coalescer.batch_sizes.count == BATCHES
+    assert coalescer.batch_sizes.sum == WRITES
+
+
+def test_coalescer_should_fail_batch_when_commit_fails(tmp_path, user):
+    engine = create_engine(f'sqlite:///{tmp_path / "empty.db"}')
+    coalescer = WriteCoalescer(lambda: Session(engine), 0, 64)
+
+    # banco sem tabelas: o erro chega à requisição
+    future = coalescer.submit_future(create_todo_row, user.id, values('x'))
+    with pytest.raises(Exception, match='no such table'):
+        future.result()
+
+    coalescer.close()
+    engine.dispose()
+
+
+class BrokenRollbackSession(Session):
+    @override
+    def rollback(self):
+        raise ConnectionError('conexão perdida')
+
+
+def test_coalescer_should_survive_session_errors(session, user):
+    sessions = iter([
+        ConnectionError('sem conexão'),
+        BrokenRollbackSession(session.bind),
+    ])
+
+    def session_factory():
+        # depois das falhas, sessões normais
+        item = next(sessions, None) or Session(session.bind)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    coalescer = WriteCoalescer(session_factory, 0, 64)
+    try:
+        # falha ao abrir a sessão
+        with pytest.raises(ConnectionError, match='sem conexão'):
+            coalescer.submit(create_todo_row, user.id, values('a'))
+        # a escrita falha e o rollback também
+        with pytest.raises(ConnectionError, match='conexão perdida'):
+            coalescer.submit(fail_after_insert, user.id)
+        # o escritor continua vivo
+        _, version = coalescer.submit(create_todo_row, user.id, values('b'))
+    finally:
+        coalescer.close()
+
+    assert version == 1
+    assert session.scalars(select(Todo.title)).all() == ['b']
+
+
+def test_coalescer_should_restart_a_closed_writer(coalescer, user):
+    coalescer.close()
+
+    _, version = coalescer.submit(create_todo_row, user.id, values('a'))
+
+    assert version == 1
+
+
+def test_routes_should_write_through_the_coalescer(client, token, coalescer):
+    app.dependency_overrides[get_write_coalescer] = lambda: coalescer
+    headers = {'Authorization': f'Bearer {token}'}
+
+    created = client.post('/todo/', headers=headers, json={'title': 'nova'})
+    updated = client.patch(
+        f'/todo/{created.json()["id"]}',
+        headers=headers,
+        json={'state': 'done'},
+    )
+    missing = client.patch('/todo/999', headers=headers, json={'title': 'x'})
+
+    assert created.status_code == HTTPStatus.OK
+    assert updated.json()['state'] == 'done'
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+    assert missing.json() == {'detail': 'Todo not found'}
+    # requisições em sequência: um lote para cada
+    coalescer.close()
+    assert coalescer.batch_sizes.count == REQUESTS
+
+
+def test_routes_should_release_the_pool_before_waiting(tmp_path):
+    # pool de uma conexão: se a requisição a segurasse enquanto espera,
+    # o escritor ficaria sem conexão até o pool_timeout
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}',
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(username='pool', email='pool@example.com', password='x')
+        session.add(user)
+        session.commit()
+        token = create_access_token({'sub': user.username, 'uid': user.id})
+    coalescer = WriteCoalescer(lambda: Session(engine), 0, 64)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_write_coalescer] = lambda: coalescer
+    try:
+        with TestClient(app) as client:
+            # sem cache: get_current_user busca o usuário no banco
+            get_identity_cache().clear()
+            response = client.post(
+                '/todo/',
+                headers={'Authorization': f'Bearer {token}'},
+                json={'title': 'nova'},
+            )
+    finally:
+        app.dependency_overrides.clear()
+        coalescer.close()
+        engine.dispose()
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'nova'